@@ -1,7 +1,19 @@
+import glob
+import json
 import logging
 import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from optimise import fast_paths, profiling
+from agent.conversation_memory import ConversationMemory
+from optimise import caching, fast_paths, profiling
+from optimise.client_pool import client_pool
+from optimise.difficulty import LEVEL_LABELS, load_classifier, log_labelled_prompt
+from optimise.costs import MODEL_PRICING, PIPELINE_CALLS, estimate_cost, estimate_pipeline_cost, estimate_tokens
+from optimise.generation import create_model, output_tokens
+from optimise.model_selector import MODELS, ModelRouter, answered
 
 # Load environment variables for Strands agent
 load_dotenv()
@@ -14,27 +26,115 @@ try:
 except ImportError:
     STRANDS_AVAILABLE = False
 
+# Cascade order: cheapest first, escalating only when an answer fails its check
+CASCADE_TIERS = ('low', 'medium', 'high')
+
+def acceptable_answer(user_input, answer):
+    """Local answer check with no LLM call: non-empty, not an error, and not hedging."""
+    return answered(answer)
+
+
+AGENT_TYPES = ('tree-of-thought-agent', 'standard-agent', 'task-decomposition-tree')
+
+# Auto mode: the pipeline each prompt difficulty starts with, until statistics say otherwise
+AUTO_DEFAULT_PIPELINES = {
+    'low': 'standard-agent',
+    'medium': 'tree-of-thought-agent',
+    'high': 'task-decomposition-tree'
+}
+# Starting latency guesses (seconds) for pipelines that haven't been observed
+PIPELINE_LATENCIES = {
+    'standard-agent': 3.0,
+    'tree-of-thought-agent': 6.0,
+    'task-decomposition-tree': 20.0
+}
+DEFAULT_AUTO_ROUTER_PATH = "agent_router.json"
+# Race mode: (name, agent type, agent options), cheapest first. Racers are
+# stateless, so an answer the user never saw can't leak into later turns.
+RACE_PIPELINES = (
+    ('nova-lite', 'standard-agent', {'model': 'us.amazon.nova-lite-v1:0'}),
+    ('tree-of-thought', 'tree-of-thought-agent', {'max_history_turns': 0}),
+)
+DEFAULT_RACE_LOG_PATH = "race_log.jsonl"
+BENCHMARK_RESULTS_PATTERN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                         "evaluation", "benchmark_results_*.json")
+
+
+def _pool_entry(model_id, profile, agent_kwargs):
+    """Pool key and factory for Agents built with these arguments."""
+    key = (model_id, profile) + tuple(sorted(agent_kwargs.items()))
+    return key, lambda: Agent(model=create_model(model_id, profile), **agent_kwargs)
+
+
+def pooled_agent(model_id, profile=None, **agent_kwargs):
+    """Borrow a warm Agent for one call from the shared client pool.
+
+    Args:
+        model_id: Bedrock model ID
+        profile: Generation profile (see optimise.generation), or None for model defaults
+        agent_kwargs: Extra Agent arguments (hashable values), e.g. callback_handler=None
+    """
+    return client_pool.checkout(*_pool_entry(model_id, profile, agent_kwargs))
+
+
+def warm_agent(model_id, profile=None, **agent_kwargs):
+    """Create a pooled Agent ahead of its first call, so setup errors surface early."""
+    client_pool.warm(*_pool_entry(model_id, profile, agent_kwargs))
+
+
+def keeps_history(max_history_turns=8, max_history_tokens=2000, summarize_history=False, **_):
+    """Whether a TreeOfThoughtAgent built with these options answers from earlier turns."""
+    return max_history_tokens > 0 and (max_history_turns > 0 or summarize_history)
+
+
 class TreeOfThoughtAgent:
     """Tree-of-Thought Agent using Claude Sonnet 3.5 via Strands."""
 
-    def __init__(self):
+    def __init__(self, max_history_turns=8, max_history_tokens=2000, summarize_history=False,
+                 stream_output=True):
+        """Initialize the agent and its conversation memory.
+
+        Args:
+            max_history_turns: Most recent turns re-sent verbatim with each input
+            max_history_tokens: Token budget for the history sent with each input
+            summarize_history: Keep a rolling summary of older turns, written by Nova Lite
+            stream_output: Stream the response to stdout as it is generated
+        """
         self.logger = logging.getLogger(__name__)
 
         if not STRANDS_AVAILABLE:
             raise ImportError("Strands is not installed. Please install strands package.")
 
+        self.model = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+        self._agent_kwargs = {} if stream_output else {'callback_handler': None}
         try:
-            # Initialize Strands agent with Claude Sonnet 3.5
-            self.agent = Agent(model="anthropic.claude-3-5-sonnet-20240620-v1:0")
+            # Warm a pooled Strands agent with Claude Sonnet 3.5
+            warm_agent(self.model, **self._agent_kwargs)
             self.logger.info(f"Tree-of-Thought Agent initialized with Strands Agent (Claude Sonnet 3.5)")
         except Exception as e:
             self.logger.error(f"Failed to initialize Strands Agent: {e}")
             raise
 
+        # Bounds the history re-sent each turn so long sessions keep flat latency
+        self.memory = ConversationMemory(
+            max_turns=max_history_turns,
+            max_history_tokens=max_history_tokens,
+            summarize=summarize_history
+        )
+        self.last_output_tokens = None
+        # Answers depend on the conversation so far, so they can't be reused across turns
+        self.stateful = keeps_history(max_history_turns, max_history_tokens, summarize_history)
+
     def run(self, user_input):
         """Process input using Tree-of-Thought approach via Strands."""
         try:
-            result = self.agent(user_input)
+            with pooled_agent(self.model, **self._agent_kwargs) as agent:
+                # The pooled agent starts empty; send the managed window as its history
+                agent.messages = self.memory.history_messages()
+                result = agent(user_input)
+            self.last_output_tokens = output_tokens(result)
+            self.logger.info(f"Tree-of-Thought response: {self.last_output_tokens} output tokens")
+            self.memory.record_turn(user_input, str(result).strip())
             return result
         except Exception as e:
             self.logger.error(f"Tree-of-Thought Agent error: {e}", exc_info=True)
@@ -44,7 +144,23 @@ class TreeOfThoughtAgent:
 class StandardAgent:
     """Standard Agent with dynamic model selection based on prompt difficulty."""
 
-    def __init__(self):
+    def __init__(self, use_local_classifier=True, min_confidence=0.75, cascade=False, cascade_check=None,
+                 router=None, model=None, stream_output=True):
+        """Initialize the agent and its difficulty classifiers.
+
+        Args:
+            use_local_classifier: Classify difficulty locally first, asking the LLM only when unsure
+            min_confidence: Local classifier confidence needed to skip the LLM classifier
+            cascade: Instead of picking one model up front, answer with Nova Lite and
+                escalate to Haiku, then Sonnet, while the answer fails its check
+            cascade_check: Callable (prompt, answer) -> bool deciding whether a cascade
+                answer is good enough; defaults to check_answer
+            router: Optional ModelRouter; the assessed difficulty becomes the task
+                class and the router may pick a different model for it from
+                observed latency, cost and success
+            model: Always answer with this model, skipping difficulty assessment
+            stream_output: Stream the response to stdout as it is generated
+        """
         self.logger = logging.getLogger(__name__)
 
         if not STRANDS_AVAILABLE:
@@ -56,17 +172,54 @@ class StandardAgent:
             'medium': 'anthropic.claude-3-haiku-20240307-v1:0',
             'low': 'us.amazon.nova-lite-v1:0'
         }
-
-        # Initialize a classifier agent to assess difficulty (using fastest model)
+        self.model = model
+        self.last_model = None
+        self.last_output_tokens = None
+        self.min_confidence = min_confidence
+        self.cascade = cascade
+        self.cascade_check = cascade_check or self.check_answer
+        self.last_tier = None       # tier that produced the last cascade answer
+        self.last_cascade = []      # per-tier attempts of the last cascade request
+        self.tier_counts = Counter()
+        self.router = router
+        self._agent_kwargs = {} if stream_output else {'callback_handler': None}
+
+        # A fixed model or the cascade skips difficulty assessment, so no classifier is needed
+        assesses_difficulty = model is None and not cascade
+
+        # Local classifier: no network round trip for most prompts
+        self.local_classifier = None
+        if use_local_classifier and assesses_difficulty:
+            try:
+                self.local_classifier = load_classifier()
+            except Exception as e:
+                self.logger.error(f"Failed to load local difficulty classifier: {e}. Using the LLM classifier only.")
+
+        # Warm a classifier agent to assess difficulty (using fastest model)
         try:
-            self.classifier_agent = Agent(model=self.models['low'])
-            self.logger.info(f"Standard Agent initialized with dynamic model selection")
+            if assesses_difficulty:
+                # Only one word is needed back, so the classifier runs with tight output limits
+                # Silent, so its one-word answers aren't streamed to stdout
+                warm_agent(self.models['low'], 'classifier', callback_handler=None)
+                self.logger.info(f"Standard Agent initialized with dynamic model selection")
+            elif model is not None:
+                warm_agent(model, **self._agent_kwargs)
+                self.logger.info(f"Standard Agent initialized with fixed model {model}")
+            else:
+                self.logger.info(f"Standard Agent initialized with cascade")
         except Exception as e:
             self.logger.error(f"Failed to initialize classifier agent: {e}")
             raise
 
     def assess_difficulty(self, user_input):
         """Assess the difficulty of the prompt and return appropriate model."""
+        if self.local_classifier is not None:
+            difficulty, confidence = self.local_classifier.predict(user_input)
+            if confidence >= self.min_confidence:
+                self.logger.info(f"Local classifier: {difficulty} ({confidence:.2f}) for prompt: {user_input[:50]}...")
+                return self.models[difficulty]
+            self.logger.debug(f"Local classifier unsure ({difficulty}, {confidence:.2f}); asking the LLM classifier")
+
         try:
             # Create a prompt to classify difficulty
             classification_prompt = f"""Analyze the following user prompt and classify its difficulty level as either "low", "medium", or "high".
@@ -80,7 +233,9 @@ User prompt: "{user_input}"
 
 Respond with ONLY one word: low, medium, or high."""
 
-            response = self.classifier_agent(classification_prompt)
+            with pooled_agent(self.models['low'], 'classifier', callback_handler=None) as classifier:
+                response = classifier(classification_prompt)
+            self.logger.debug(f"Difficulty classifier returned {output_tokens(response)} output tokens")
 
             # Parse response and extract difficulty
             # Convert AgentResult to string first
@@ -98,6 +253,10 @@ Respond with ONLY one word: low, medium, or high."""
                 self.logger.warning(f"Unclear difficulty classification: {response}. Defaulting to medium.")
                 selected_difficulty = 'medium'
 
+            if selected_difficulty in difficulty:
+                # Clear LLM labels become training data for the local classifier
+                log_labelled_prompt(user_input, selected_difficulty)
+
             self.logger.info(f"Assessed difficulty: {selected_difficulty} for prompt: {user_input[:50]}...")
             return self.models[selected_difficulty]
 
@@ -105,18 +264,98 @@ Respond with ONLY one word: low, medium, or high."""
             self.logger.error(f"Error assessing difficulty: {e}. Defaulting to medium model.")
             return self.models['medium']
 
+    def check_answer(self, user_input, answer):
+        """Cheap confidence check for a cascade answer.
+
+        Empty, failed and hedging answers fail outright. Otherwise Nova Lite is
+        asked for a one-word verdict under the tight 'verdict' profile.
+
+        Returns:
+            True if the answer can be returned without escalating
+        """
+        if not answered(answer):
+            return False
+
+        judge_prompt = f"""Question: "{user_input}"
+
+Proposed answer: "{answer}"
+
+Does the proposed answer correctly and completely answer the question?
+Respond with ONLY one word: YES or NO"""
+
+        try:
+            with pooled_agent(self.models['low'], 'verdict', callback_handler=None) as judge:
+                verdict = str(judge(judge_prompt)).strip().upper()
+        except Exception as e:
+            # Don't pay for a stronger model because the check itself failed
+            self.logger.warning(f"Cascade check failed: {e}. Accepting the answer.")
+            return True
+        return 'YES' in verdict
+
+    def _run_cascade(self, user_input):
+        """Answer with the cheapest tier whose answer passes the cascade check."""
+        attempts = []
+        result = None
+        for tier in CASCADE_TIERS:
+            model = self.models[tier]
+            try:
+                # Silent: rejected answers must not reach the console
+                with pooled_agent(model, callback_handler=None) as agent:
+                    result = agent(user_input)
+                answer = str(result).strip()
+                # The strongest tier's answer is final, so it isn't checked
+                passed = tier == CASCADE_TIERS[-1] or self.cascade_check(user_input, answer)
+            except Exception as e:
+                self.logger.error(f"Cascade tier {tier} ({model}) failed: {e}")
+                result, passed = f"Error processing request: {e}", False
+
+            attempts.append({'tier': tier, 'model': model, 'passed': passed,
+                             'output_tokens': output_tokens(result)})
+            if passed:
+                break
+            self.logger.info(f"Cascade: {tier} answer failed the check; escalating")
+
+        self.last_cascade = attempts
+        self.last_tier = attempts[-1]['tier'] if attempts[-1]['passed'] else None
+        self.last_output_tokens = attempts[-1]['output_tokens']
+        self.tier_counts[self.last_tier or 'failed'] += 1
+        self.logger.info(f"Cascade answered by tier: {self.last_tier} after {len(attempts)} attempt(s)")
+        return result
+
     def run(self, user_input):
         """Process input using dynamically selected model via Strands."""
+        if self.cascade:
+            return self._run_cascade(user_input)
+
         try:
-            # Assess difficulty and select appropriate model
-            selected_model = self.assess_difficulty(user_input)
+            routed = self.router is not None and self.model is None
+            if self.model is not None:
+                selected_model = self.model
+            else:
+                # Assess difficulty and select appropriate model
+                selected_model = self.assess_difficulty(user_input)
+                difficulty = next(level for level, model in self.models.items() if model == selected_model)
+                if routed:
+                    selected_model = self.router.choose('standard', difficulty, candidates=MODELS,
+                                                        default=selected_model)
+            self.last_model = selected_model
             self.logger.info(f"Selected model: {selected_model}")
 
-            # Create agent with selected model
-            agent = Agent(model=selected_model)
-
-            # Run the actual query
-            result = agent(user_input)
+            # Borrow a warm agent for the selected model and run the actual query
+            started = time.perf_counter()
+            result = None
+            try:
+                with pooled_agent(selected_model, **self._agent_kwargs) as agent:
+                    result = agent(user_input)
+            finally:
+                if routed:
+                    answer = str(result).strip() if result is not None else ""
+                    # An answer that looks fine isn't known to be right; only errors and hedges are graded
+                    self.router.record('standard', difficulty, selected_model, time.perf_counter() - started,
+                                       None if acceptable_answer(user_input, answer) else False,
+                                       estimate_cost(user_input, answer, selected_model))
+            self.last_output_tokens = output_tokens(result)
+            self.logger.info(f"{selected_model} response: {self.last_output_tokens} output tokens")
             return result
 
         except Exception as e:
@@ -127,7 +366,12 @@ Respond with ONLY one word: low, medium, or high."""
 class TaskDecompositionTreeAgent:
     """Agent using Task Decomposition Tree approach."""
 
-    def __init__(self):
+    def __init__(self, **orchestrator_options):
+        """Initialize the agent.
+
+        Args:
+            orchestrator_options: Keyword arguments for TaskOrchestrator
+        """
         self.logger = logging.getLogger(__name__)
 
         if not STRANDS_AVAILABLE:
@@ -137,7 +381,7 @@ class TaskDecompositionTreeAgent:
             # Import the orchestrator
             from agent.task_orchestrator import TaskOrchestrator
 
-            self.orchestrator = TaskOrchestrator()
+            self.orchestrator = TaskOrchestrator(**orchestrator_options)
             self.logger.info("Task Decomposition Tree Agent initialized successfully")
         except Exception as e:
             self.logger.error(f"Failed to initialize Task Decomposition Tree Agent: {e}")
@@ -162,26 +406,355 @@ class TaskDecompositionTreeAgent:
             return f"Error processing request: {e}"
 
 
+def typical_pipeline_cost(agent_type):
+    """Cost of a pipeline's typical calls, each with ~500 input and ~200 output tokens."""
+    return sum((0.5 * MODEL_PRICING[model]['input'] + 0.2 * MODEL_PRICING[model]['output']) * count
+               for model, count in PIPELINE_CALLS.get(agent_type, {}).items())
+
+
+def seed_router_from_benchmarks(router, pattern=BENCHMARK_RESULTS_PATTERN):
+    """Start a pipeline router from saved benchmark results.
+
+    Each agent type and level in a results file (see evaluation/evaluate_benchmark.py)
+    seeds the arm for that pipeline and difficulty, unless the arm already has
+    statistics. Newer files are read first.
+
+    Returns:
+        Number of arms seeded
+    """
+    logger = logging.getLogger(__name__)
+    seeded = 0
+    for path in sorted(glob.glob(pattern), reverse=True):
+        try:
+            with open(path, "r") as f:
+                results = json.load(f).get('results', [])
+        except Exception as e:
+            logger.error(f"Failed to read benchmark results {path}: {e}")
+            continue
+
+        for entry in results:
+            difficulty = LEVEL_LABELS.get(entry.get('level'))
+            agent_type = entry.get('agent_type')
+            if difficulty is None or agent_type not in AGENT_TYPES:
+                continue
+            # Older runs didn't price every agent; fall back to the typical cost
+            cost = entry.get('avg_cost_per_prompt_usd') or typical_pipeline_cost(agent_type)
+            if router.seed('pipeline', difficulty, agent_type, entry.get('total_prompts', 0),
+                           entry.get('successes', 0), entry.get('avg_time_per_prompt_seconds', 0.0), cost):
+                seeded += 1
+    if seeded:
+        router.flush()
+        logger.info(f"Seeded {seeded} pipeline routing arms from benchmark results")
+    return seeded
+
+
+class AutoAgent:
+    """Chooses the tree-of-thought, standard or task decomposition tree pipeline per prompt."""
+
+    def __init__(self, router=None, objective='cost', min_success=0.8, seed_from_benchmarks=True,
+                 pipeline_options=None):
+        """Initialize the pipeline router and the local complexity estimate.
+
+        Args:
+            router: ModelRouter over AGENT_TYPES; by default one persisted to agent_router.json
+            objective: 'cost' for the cheapest pipeline that meets min_success, or 'latency'
+            min_success: Success rate a pipeline must reach on a difficulty to be chosen
+            seed_from_benchmarks: Start unobserved pipelines from evaluation/benchmark_results_*.json
+            pipeline_options: Constructor arguments per agent type,
+                e.g. {'standard-agent': {'cascade': True}}
+        """
+        self.logger = logging.getLogger(__name__)
+
+        if not STRANDS_AVAILABLE:
+            raise ImportError("Strands is not installed. Please install strands package.")
+
+        self.classifier = None
+        try:
+            self.classifier = load_classifier()
+        except Exception as e:
+            self.logger.error(f"Failed to load local difficulty classifier: {e}. Treating prompts as medium.")
+
+        self.router = router or ModelRouter(
+            path=DEFAULT_AUTO_ROUTER_PATH,
+            objective=objective,
+            min_success=min_success,
+            default_latencies=PIPELINE_LATENCIES,
+            default_costs={agent_type: typical_pipeline_cost(agent_type) for agent_type in AGENT_TYPES}
+        )
+        if seed_from_benchmarks:
+            seed_router_from_benchmarks(self.router)
+
+        self.pipeline_options = pipeline_options or {}
+        self.stateful = keeps_history(**(self.pipeline_options.get('tree-of-thought-agent') or {}))
+        self.last_difficulty = None
+        self.last_pipeline = None
+        self.pipeline_counts = Counter()
+        self._pipelines = {}
+        self._lock = threading.Lock()
+        self.logger.info("Auto Agent initialized")
+
+    def estimate_complexity(self, user_input):
+        """Local low/medium/high estimate of a prompt; no LLM call."""
+        if self.classifier is None:
+            return 'medium'
+        difficulty, confidence = self.classifier.predict(user_input)
+        self.logger.debug(f"Estimated complexity: {difficulty} ({confidence:.2f})")
+        return difficulty
+
+    def _pipeline(self, agent_type):
+        """The agent for a pipeline, created on first use."""
+        with self._lock:
+            if agent_type not in self._pipelines:
+                self._pipelines[agent_type] = create_agent(agent_type, self.pipeline_options.get(agent_type))
+            return self._pipelines[agent_type]
+
+    def run(self, user_input):
+        """Process input with the pipeline chosen for its estimated complexity."""
+        difficulty = self.estimate_complexity(user_input)
+        agent_type = self.router.choose('pipeline', difficulty, candidates=list(AGENT_TYPES),
+                                        default=AUTO_DEFAULT_PIPELINES[difficulty])
+        self.last_difficulty = difficulty
+        self.last_pipeline = agent_type
+        self.pipeline_counts[agent_type] += 1
+        self.logger.info(f"Auto: {difficulty} prompt routed to {agent_type}")
+
+        try:
+            agent = self._pipeline(agent_type)
+        except Exception as e:
+            self.logger.error(f"Failed to initialize {agent_type}: {e}", exc_info=True)
+            return f"Error processing request: {e}"
+
+        started = time.perf_counter()
+        result = agent.run(user_input)
+        answer = str(result).strip()
+        # Success rates come from graded benchmark runs. A live answer can't be graded, but an
+        # error or a hedge is a known failure; anything else only updates latency and cost
+        self.router.record('pipeline', difficulty, agent_type, time.perf_counter() - started,
+                           None if acceptable_answer(user_input, answer) else False,
+                           estimate_pipeline_cost(agent_type, user_input, answer))
+        return result
+
+
+class RaceAgent:
+    """Runs a cheap and a strong pipeline concurrently and returns the first acceptable answer."""
+
+    def __init__(self, racers=RACE_PIPELINES, accept=None, hedge_after_s=0.0,
+                 log_path=DEFAULT_RACE_LOG_PATH, max_history=1000):
+        """Initialize the racing pipelines.
+
+        Args:
+            racers: (name, agent type, agent options) per pipeline, cheapest first.
+                When no answer is accepted, the strongest racer's answer is returned.
+            accept: Callable (prompt, answer) -> bool deciding whether an answer wins
+                the race; should be local and fast. Defaults to acceptable_answer
+            hedge_after_s: Start the racers after the first only once this many seconds
+                pass without an accepted answer (or as soon as one is rejected);
+                0 starts them all at once
+            log_path: JSONL file each race is appended to once every racer has settled, or None
+            max_history: Races kept in memory for latency percentiles
+        """
+        self.logger = logging.getLogger(__name__)
+
+        if not STRANDS_AVAILABLE:
+            raise ImportError("Strands is not installed. Please install strands package.")
+
+        self.racers = []
+        for name, agent_type, options in racers:
+            options = dict(options or {})
+            if agent_type in ('tree-of-thought-agent', 'standard-agent'):
+                # Two racers streaming at once would interleave on stdout
+                options.setdefault('stream_output', False)
+            self.racers.append((name, agent_type, create_agent(agent_type, options)))
+        if not self.racers:
+            raise ValueError("Race mode needs at least one racer")
+        self.stateful = any(getattr(agent, 'stateful', False) for _, _, agent in self.racers)
+
+        self.accept = accept or acceptable_answer
+        self.hedge_after_s = hedge_after_s
+        self.log_path = log_path
+        self.last_race = None
+        self.wins = Counter()
+        self.latencies = deque(maxlen=max_history)
+        self.total_cost = 0.0
+        self.wasted_cost = 0.0
+        self._lock = threading.Lock()
+        self.logger.info(f"Race Agent initialized with racers: {', '.join(name for name, _, _ in self.racers)}")
+
+    def _run_racer(self, index, agent_type, agent, user_input, race_started, start_all, decided):
+        """Run one racer. Returns None if the race was decided before it started."""
+        if index:
+            start_all.wait(self.hedge_after_s)
+        if decided.is_set():
+            return None
+
+        try:
+            result = agent.run(user_input)
+            answer = str(result).strip()
+        except Exception as e:
+            self.logger.error(f"Racer {agent_type} failed: {e}", exc_info=True)
+            result = answer = f"Error processing request: {e}"
+
+        model = getattr(agent, 'last_model', None)
+        cost = estimate_cost(user_input, answer, model) if model else estimate_pipeline_cost(agent_type, user_input, answer)
+        return {'result': result, 'answer': answer, 'cost': cost,
+                'finished_s': time.perf_counter() - race_started}
+
+    def run(self, user_input):
+        """Race the pipelines on the input and return the first accepted answer."""
+        race_started = time.perf_counter()
+        start_all = threading.Event()   # wakes hedged racers
+        decided = threading.Event()     # racers that haven't started yet skip the call
+        if not self.hedge_after_s:
+            start_all.set()
+
+        executor = ThreadPoolExecutor(max_workers=len(self.racers))
+        futures = {
+            executor.submit(self._run_racer, index, agent_type, agent, user_input,
+                            race_started, start_all, decided): name
+            for index, (name, agent_type, agent) in enumerate(self.racers)
+        }
+        # Don't wait for the losers
+        executor.shutdown(wait=False)
+
+        outcomes = {}
+        winner = None
+        for future in as_completed(futures):
+            name = futures[future]
+            outcomes[name] = future.result()
+            if outcomes[name] is None:
+                continue
+            if self.accept(user_input, outcomes[name]['answer']):
+                winner = name
+                break
+            self.logger.info(f"Race: {name} answer rejected")
+            start_all.set()
+        decided.set()
+        start_all.set()
+
+        # Nothing accepted: fall back to the strongest racer that answered
+        returned = winner or next((name for name, _, _ in reversed(self.racers) if outcomes.get(name)), None)
+        latency = time.perf_counter() - race_started
+
+        race = {'winner': winner, 'returned': returned, 'latency_s': latency,
+                'prompt_tokens': estimate_tokens(user_input), 'racers': {}}
+        for name, outcome in outcomes.items():
+            status = 'won' if name == winner else 'fallback' if name == returned else 'rejected'
+            race['racers'][name] = self._racer_entry(outcome, status)
+
+        # Losers can't be interrupted mid-call; their spend is counted when they finish
+        running = [future for future in futures if futures[future] not in outcomes]
+        settle_lock = threading.Lock()
+        unsettled = [len(running)]
+
+        def settle(future):
+            outcome = None if future.cancelled() else future.result()
+            with settle_lock:
+                race['racers'][futures[future]] = self._racer_entry(outcome, 'abandoned')
+                unsettled[0] -= 1
+                finished = unsettled[0] == 0
+            if finished:
+                self._finish_race(race)
+
+        with self._lock:
+            self.wins[winner or 'none'] += 1
+            self.latencies.append(latency)
+            self.last_race = race
+        self.logger.info(f"Race won by {winner or 'nobody'} in {latency:.2f}s; returning {returned}")
+
+        if running:
+            for future in running:
+                future.cancel()
+                future.add_done_callback(settle)
+        else:
+            self._finish_race(race)
+
+        if returned is None:
+            return "Error processing request: no racer returned an answer"
+        return outcomes[returned]['result']
+
+    @staticmethod
+    def _racer_entry(outcome, status):
+        """Race record for one racer; racers that never started cost nothing."""
+        if outcome is None:
+            return {'status': 'cancelled', 'finished_s': None, 'cost': 0.0}
+        return {'status': status, 'finished_s': outcome['finished_s'], 'cost': outcome['cost']}
+
+    def _finish_race(self, race):
+        """Total a race's spend once every racer has settled, and log it."""
+        race['total_cost'] = sum(entry['cost'] for entry in race['racers'].values())
+        race['wasted_cost'] = sum(entry['cost'] for entry in race['racers'].values()
+                                  if entry['status'] not in ('won', 'fallback'))
+        with self._lock:
+            self.total_cost += race['total_cost']
+            self.wasted_cost += race['wasted_cost']
+        self.logger.info(f"Race settled: ${race['total_cost']:.6f} spent, ${race['wasted_cost']:.6f} wasted")
+
+        if not self.log_path:
+            return
+        try:
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(dict(race, timestamp=time.time())) + "\n")
+        except Exception as e:
+            self.logger.error(f"Failed to log race to {self.log_path}: {e}")
+
+    def race_stats(self):
+        """Wins per racer, p50/p99 race latency, and total and wasted spend so far."""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            stats = {
+                'races': sum(self.wins.values()),
+                'wins': dict(self.wins),
+                'total_cost': self.total_cost,
+                'wasted_cost': self.wasted_cost
+            }
+        for label, quantile in (('p50_latency_s', 0.5), ('p99_latency_s', 0.99)):
+            stats[label] = latencies[round(quantile * (len(latencies) - 1))] if latencies else None
+        return stats
+
+
+def create_agent(agent_type, agent_options=None):
+    """Build the agent for an agent type.
+
+    Args:
+        agent_type: One of AGENT_TYPES, 'auto' or 'race'
+        agent_options: Keyword arguments for the agent's constructor
+    """
+    agent_options = agent_options or {}
+    if agent_type == 'tree-of-thought-agent':
+        return TreeOfThoughtAgent(**agent_options)
+    elif agent_type == 'standard-agent':
+        return StandardAgent(**agent_options)
+    elif agent_type == 'task-decomposition-tree':
+        return TaskDecompositionTreeAgent(**agent_options)
+    elif agent_type == 'auto':
+        return AutoAgent(**agent_options)
+    elif agent_type == 'race':
+        return RaceAgent(**agent_options)
+    raise ValueError(f"Unknown agent type: {agent_type}")
+
+
 class AgentController:
-    def __init__(self, config=None, agent_type='tree-of-thought-agent'):
+    def __init__(self, config=None, agent_type='tree-of-thought-agent', use_response_cache=False, agent_options=None):
         """Initialize AgentController with specified agent type.
 
         Args:
             config: Optional config dict (unused, kept for compatibility)
-            agent_type: Type of agent to use ('tree-of-thought-agent', 'standard-agent', 'task-decomposition-tree')
+            agent_type: Type of agent to use ('tree-of-thought-agent', 'standard-agent', 'task-decomposition-tree',
+                'auto' to choose one of them per prompt, or 'race' to run several at once)
+            use_response_cache: Answer repeated prompts from the process-wide response cache.
+                Ignored for agents whose answers depend on the conversation history
+            agent_options: Keyword arguments for the agent's constructor, e.g. {'cascade': True}
         """
         self.logger = logging.getLogger(__name__)
         self.agent_type = agent_type
 
         # Initialize the appropriate agent based on type
-        if agent_type == 'tree-of-thought-agent':
-            self.agent = TreeOfThoughtAgent()
-        elif agent_type == 'standard-agent':
-            self.agent = StandardAgent()
-        elif agent_type == 'task-decomposition-tree':
-            self.agent = TaskDecompositionTreeAgent()
-        else:
-            raise ValueError(f"Unknown agent type: {agent_type}")
+        self.agent = create_agent(agent_type, agent_options)
+
+        # A cached answer would ignore earlier turns and skip recording this one
+        self.use_response_cache = use_response_cache and not getattr(self.agent, 'stateful', False)
+        if use_response_cache and not self.use_response_cache:
+            self.logger.info(f"Response cache disabled: {agent_type} answers depend on conversation history")
 
         self.logger.info(f"AgentController initialized with agent type: {agent_type}")
 
@@ -196,11 +769,24 @@ class AgentController:
             self.logger.info("Fast path triggered!")
             return fast_result
 
+        # --- Response Cache Check (repeated prompts) ---
+        cache_key = caching.make_cache_key(self.agent_type, input_data)
+        if self.use_response_cache:
+            cached_result = caching.get_cached_response(cache_key)
+            if cached_result is not None:
+                self.logger.info("Response cache hit!")
+                return cached_result
+
         # --- Use Selected Agent ---
         try:
             self.logger.info(f"Using {self.agent_type} agent to process input")
             result = self.agent.run(input_data)
             self.logger.info(f"{self.agent_type} agent returned response")
+
+            # Agents report failures as "Error ..." strings; never cache those
+            response_text = str(result).strip()
+            if self.use_response_cache and not response_text.startswith("Error"):
+                caching.set_cached_response(cache_key, response_text)
             return result
         except Exception as e:
             self.logger.error(f"{self.agent_type} agent failed: {e}", exc_info=True)
@@ -0,0 +1,182 @@
+"""
+Conversation Memory for Multi-Turn Chat Agents
+
+A Strands Agent keeps every earlier message and re-sends all of them on each
+call, so the input (and latency) of a chat turn grows with the length of the
+session. ConversationMemory bounds what is sent:
+- A sliding window keeps only the most recent turns
+- A token budget drops the oldest turns in the window until history fits
+- Optionally, dropped turns are folded into a rolling summary by a cheap model,
+  in the background so the chat turn never waits for it
+
+Each turn reports how many tokens of history were sent with it.
+"""
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any
+
+from optimise.costs import estimate_tokens
+from optimise.generation import create_model
+
+# Try to import Strands components
+try:
+    from strands import Agent
+    STRANDS_AVAILABLE = True
+except ImportError:
+    STRANDS_AVAILABLE = False
+
+
+DEFAULT_SUMMARY_MODEL = 'us.amazon.nova-lite-v1:0'
+
+
+class ConversationMemory:
+    """
+    Bounded chat history for an agent that is called once per user turn.
+
+    Call history_messages() before a turn to get the messages to send, then
+    record_turn() with the user input and the response once it returns.
+    """
+
+    def __init__(self, max_turns: int = 8, max_history_tokens: int = 2000,
+                 summarize: bool = False, summary_model: str = DEFAULT_SUMMARY_MODEL,
+                 max_summary_tokens: int = 300):
+        """
+        Initialize the conversation memory.
+
+        Args:
+            max_turns: Most recent user/assistant turns kept verbatim
+            max_history_tokens: Token budget for the history sent with a turn,
+                summary included
+            summarize: Fold turns that leave the window into a rolling summary
+            summary_model: Model used to write the summary
+            max_summary_tokens: Upper bound on the length of the summary
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_turns = max(0, max_turns)
+        self.max_history_tokens = max(0, max_history_tokens)
+        self.max_summary_tokens = max_summary_tokens
+        self.summary = ""
+        self.last_report: Dict[str, Any] = {}
+        self._turns = deque()  # (user_text, assistant_text, tokens)
+        self._lock = threading.Lock()
+
+        self._summarizer = None
+        self._executor = None
+        if summarize:
+            if not STRANDS_AVAILABLE:
+                self.logger.warning("Strands is not installed; conversation summaries are disabled")
+            else:
+                try:
+                    self._summarizer = Agent(model=create_model(summary_model, 'summary'), callback_handler=None)
+                    # One worker, so summaries are folded in the order turns were dropped
+                    self._executor = ThreadPoolExecutor(max_workers=1)
+                except Exception as e:
+                    self.logger.error(f"Failed to initialize summary agent: {e}. Summaries are disabled.")
+
+    def history_messages(self) -> List[Dict[str, Any]]:
+        """
+        Build the history to send with the next turn, and report its size.
+
+        Returns:
+            Strands messages: the rolling summary (if any) as an opening
+            exchange, followed by the turns in the window, oldest first
+        """
+        with self._lock:
+            summary = self.summary
+            turns = list(self._turns)
+
+        messages = []
+        summary_tokens = 0
+        if summary:
+            summary_text = f"Summary of our conversation so far:\n{summary}"
+            summary_tokens = estimate_tokens(summary_text)
+            messages.append(self._message('user', summary_text))
+            messages.append(self._message('assistant', "Understood. I'll keep that context in mind."))
+
+        for user_text, assistant_text, _ in turns:
+            messages.append(self._message('user', user_text))
+            messages.append(self._message('assistant', assistant_text))
+
+        history_tokens = summary_tokens + sum(tokens for _, _, tokens in turns)
+        self.last_report = {
+            'history_tokens': history_tokens,
+            'summary_tokens': summary_tokens,
+            'turns_sent': len(turns)
+        }
+        self.logger.info(f"Sending {history_tokens} tokens of history "
+                         f"({len(turns)} turns, {summary_tokens} summary tokens)")
+        return messages
+
+    def record_turn(self, user_text: str, assistant_text: str):
+        """
+        Add a finished turn and drop the oldest turns that no longer fit.
+
+        Args:
+            user_text: The user's input for the turn
+            assistant_text: The agent's response
+        """
+        tokens = estimate_tokens(user_text) + estimate_tokens(assistant_text)
+        dropped = []
+        with self._lock:
+            self._turns.append((user_text, assistant_text, tokens))
+            budget = self.max_history_tokens - estimate_tokens(self.summary)
+            while self._turns and (len(self._turns) > self.max_turns
+                                   or sum(t for _, _, t in self._turns) > budget):
+                dropped.append(self._turns.popleft())
+
+        if dropped:
+            self.logger.debug(f"Dropped {len(dropped)} turns from the conversation window")
+            if self._executor is not None:
+                self._executor.submit(self._fold_into_summary, dropped)
+
+    def clear(self):
+        """Forget the whole conversation, summary included."""
+        with self._lock:
+            self._turns.clear()
+            self.summary = ""
+
+    def close(self):
+        """Wait for any pending summary and stop the summary worker."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    @staticmethod
+    def _message(role: str, text: str) -> Dict[str, Any]:
+        return {'role': role, 'content': [{'text': text}]}
+
+    def _fold_into_summary(self, dropped: list):
+        """Rewrite the rolling summary to include turns that left the window."""
+        with self._lock:
+            previous = self.summary
+
+        transcript = "\n".join(f"User: {user_text}\nAssistant: {assistant_text}"
+                               for user_text, assistant_text, _ in dropped)
+        prompt = f"""Update the summary of a conversation with the new exchanges below.
+
+Current summary:
+{previous or "(none)"}
+
+New exchanges:
+{transcript}
+
+Keep facts, names, numbers, decisions and open questions the user may refer back to.
+Respond with ONLY the updated summary, in at most {self.max_summary_tokens * 3 // 4} words."""
+
+        try:
+            self._summarizer.messages = []
+            summary = str(self._summarizer(prompt)).strip()
+        except Exception as e:
+            self.logger.error(f"Failed to summarize conversation: {e}. Keeping the previous summary.")
+            return
+        finally:
+            self._summarizer.messages = []
+
+        # A summary that overruns its budget is cut rather than crowding out recent turns
+        summary = summary[:self.max_summary_tokens * 4]
+        with self._lock:
+            self.summary = summary
+        self.logger.debug(f"Conversation summary updated ({estimate_tokens(summary)} tokens)")
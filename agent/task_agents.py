@@ -8,10 +8,24 @@ This module implements the specialized agents used in the three-phase process:
 4. Synthesizer: Combines results from sub-tasks
 """
 
+import asyncio
+import hashlib
 import logging
 import json
+import re
+import threading
+import time
 from typing import List, Dict, Optional, Any
 
+from agent.task_tree import exact_task_key
+from optimise.caching import LRUCache
+from optimise.client_pool import ClientPool, client_pool
+from optimise.costs import estimate_cost
+from optimise.difficulty import leaf_difficulty
+from optimise.generation import create_model, output_tokens
+from optimise.model_selector import MODELS, ModelRouter, answered
+from optimise.semantic_cache import SemanticCache
+
 try:
     from strands import Agent
     STRANDS_AVAILABLE = True
@@ -19,24 +33,224 @@ except ImportError:
     STRANDS_AVAILABLE = False
 
 
-class DecomposerAgent:
+# A verdict response starts with the verdict; "I don't KNOW" is not a NO
+_VERDICT_PATTERN = re.compile(r'^\W*(YES|NO)\b', re.IGNORECASE)
+_VERDICT_WORD = re.compile(r'\b(YES|NO)\b', re.IGNORECASE)
+
+
+def _json_payload(response_text: str, opener: str, closer: str):
+    """The JSON value from the first `opener` to the last `closer` in a response, or None."""
+    try:
+        start = response_text.index(opener)
+        end = response_text.rindex(closer) + 1
+        return json.loads(response_text[start:end])
+    except ValueError:
+        return None
+
+
+def _is_verdict(value) -> bool:
+    return isinstance(value, bool) or (isinstance(value, str) and value.strip().upper() in ('YES', 'NO'))
+
+
+def _route_success(profile: str, response_text: str) -> Optional[bool]:
     """
-    Phase 1: Decomposition Agent
+    The router's success signal for a response: whether it is usable by the call that asked for it.
 
-    Breaks down complex tasks into smaller, simpler sub-tasks.
-    Uses Claude Haiku for fast, efficient decomposition.
+    Structured responses must parse the way their callers parse them, and a
+    verdict must start with YES or NO. Free text can't be graded live, so it
+    is only a known failure when it is an error or hedges or refuses, and
+    None (ungraded) otherwise.
+    """
+    if profile == 'decomposer':
+        sub_tasks = _json_payload(response_text, '[', ']')
+        return (isinstance(sub_tasks, list) and bool(sub_tasks)
+                and all(isinstance(task, str) and task.strip() for task in sub_tasks))
+    if profile == 'leaf_batch':
+        verdicts = _json_payload(response_text, '[', ']')
+        return isinstance(verdicts, list) and bool(verdicts) and all(_is_verdict(verdict) for verdict in verdicts)
+    if profile == 'expansion':
+        expansion = _json_payload(response_text, '{', '}')
+        return (isinstance(expansion, dict) and isinstance(expansion.get('is_leaf'), bool)
+                and isinstance(expansion.get('sub_tasks') or [], list))
+    if profile == 'verdict':
+        return _VERDICT_PATTERN.match(response_text) is not None
+    return None if answered(response_text) else False
+
+
+class BaseTaskAgent:
     """
+    Shared plumbing for the task tree agents.
 
-    def __init__(self):
-        """Initialize the Decomposer agent."""
+    Strands Agents are not safe to drive from two threads at once, so every
+    call checks an Agent out of a shared ClientPool and returns it afterwards.
+    Concurrent calls (threads or coroutines) get separate Agents, and warm
+    Agents are reused across calls, task agents and orchestrators.
+
+    Every call is one-shot: the Agent's message history is cleared before
+    each prompt, so input size doesn't grow with the number of calls, and no
+    console callback is attached, so responses aren't streamed to stdout.
+
+    Each call is made with a generation profile (see optimise.generation) that
+    caps its output length and sets its temperature and stop sequences, and
+    the output tokens it returned are counted per profile.
+
+    With a ModelRouter, the model is chosen per call (the profile is the
+    router's role) and each call's latency, cost and whether its response was
+    well-formed are fed back to the router.
+    """
+
+    def __init__(self, model: str, profile: str, pool: Optional[ClientPool] = None,
+                 router: Optional[ModelRouter] = None):
+        """
+        Initialize the shared agent state.
+
+        Args:
+            model: Bedrock model ID used for every call made by this agent,
+                or the router's starting choice when routing
+            profile: Generation profile used unless a call asks for another
+            pool: Pool to borrow Agents from (defaults to the process-wide pool)
+            router: Optional ModelRouter choosing the model per call
+        """
         self.logger = logging.getLogger(__name__)
 
         if not STRANDS_AVAILABLE:
             raise ImportError("Strands is not installed. Please install strands package.")
 
+        self.model = model
+        self.profile = profile
+        self.pool = pool if pool is not None else client_pool
+        self.router = router
+        self._usage: Dict[str, Dict[str, int]] = {}
+        self._model_calls: Dict[str, int] = {}
+        self._usage_lock = threading.Lock()
+        # Warm one agent eagerly so model errors surface in __init__
+        self.pool.warm((model, profile), self._new_agent)
+
+    def _checkout(self, profile: str, model: Optional[str] = None):
+        """Borrow a pooled Agent for one call with the given generation profile."""
+        model = model or self.model
+        return self.pool.checkout((model, profile), lambda: self._new_agent(profile, model))
+
+    def _new_agent(self, profile: Optional[str] = None, model: Optional[str] = None):
+        """Create a silent Agent; callback_handler=None stops the default stdout streaming."""
+        return Agent(model=create_model(model or self.model, profile or self.profile), callback_handler=None)
+
+    def _route(self, profile: str, task_class: str, default: Optional[str]) -> str:
+        """The model for the next call with this profile."""
+        default = default or self.model
+        if self.router is None:
+            return default
+        return self.router.choose(profile, task_class, candidates=MODELS, default=default)
+
+    def _record_route(self, profile: str, task_class: str, model: str, started: float, prompt: str, result):
+        """Report a routed call's latency, cost and success back to the router."""
+        if self.router is None:
+            return
+        response_text = str(result).strip() if result is not None else ""
+        self.router.record(profile, task_class, model, time.perf_counter() - started,
+                           _route_success(profile, response_text) if result is not None else False,
+                           estimate_cost(prompt, response_text, model))
+
+    def _invoke(self, prompt: str, profile: Optional[str] = None, task_class: str = 'default',
+                model: Optional[str] = None):
+        """
+        Send a prompt to the model through an Agent borrowed from the client pool.
+
+        The Agent is held only for this call, and the pool drops its history
+        on checkout, so only this prompt is sent.
+
+        Args:
+            prompt: The full prompt text
+            profile: Generation profile for this call (defaults to the agent's own)
+            task_class: What kind of input this is, for the router
+            model: Model for this call (defaults to the agent's own); a router
+                may still pick another
+
+        Returns:
+            The raw AgentResult
+        """
+        profile = profile or self.profile
+        model = self._route(profile, task_class, model)
+        started = time.perf_counter()
+        result = None
+        try:
+            # The pool clears the agent's history on checkout and on return
+            with self._checkout(profile, model) as agent:
+                result = agent(prompt)
+        finally:
+            self._record_route(profile, task_class, model, started, prompt, result)
+        return self._record_usage(profile, model, result)
+
+    async def _invoke_async(self, prompt: str, profile: Optional[str] = None, task_class: str = 'default',
+                            model: Optional[str] = None):
+        """
+        Send a prompt to the model without blocking the event loop.
+
+        The pooled Agent stays checked out until the call completes, since
+        many coroutines on one event loop may be talking to the same task
+        agent at once.
+
+        Args:
+            prompt: The full prompt text
+            profile: Generation profile for this call (defaults to the agent's own)
+            task_class: What kind of input this is, for the router
+            model: Model for this call (defaults to the agent's own); a router
+                may still pick another
+
+        Returns:
+            The raw AgentResult
+        """
+        profile = profile or self.profile
+        model = self._route(profile, task_class, model)
+        started = time.perf_counter()
+        result = None
+        try:
+            with self._checkout(profile, model) as agent:
+                result = await agent.invoke_async(prompt)
+        finally:
+            self._record_route(profile, task_class, model, started, prompt, result)
+        return self._record_usage(profile, model, result)
+
+    def _record_usage(self, profile: str, model: str, result):
+        """Count a finished call, the model that served it and the output tokens it returned."""
+        tokens = output_tokens(result)
+        with self._usage_lock:
+            usage = self._usage.setdefault(profile, {'calls': 0, 'output_tokens': 0})
+            usage['calls'] += 1
+            usage['output_tokens'] += tokens or 0
+            self._model_calls[model] = self._model_calls.get(model, 0) + 1
+        self.logger.debug(f"{type(self).__name__} '{profile}' call to {model} returned {tokens} output tokens")
+        return result
+
+    def usage_stats(self) -> Dict[str, Dict[str, int]]:
+        """Returns the number of calls and output tokens so far, per generation profile."""
+        with self._usage_lock:
+            return {profile: dict(usage) for profile, usage in self._usage.items()}
+
+    def model_call_counts(self) -> Dict[str, int]:
+        """Returns the number of calls so far, per model."""
+        with self._usage_lock:
+            return dict(self._model_calls)
+
+
+class DecomposerAgent(BaseTaskAgent):
+    """
+    Phase 1: Decomposition Agent
+
+    Breaks down complex tasks into smaller, simpler sub-tasks.
+    Uses Claude Haiku for fast, efficient decomposition.
+    """
+
+    def __init__(self, router: Optional[ModelRouter] = None):
+        """
+        Initialize the Decomposer agent.
+
+        Args:
+            router: Optional ModelRouter choosing the model per call from
+                observed latency, cost and success
+        """
         # Use Claude Haiku as specified
-        self.model = "anthropic.claude-3-haiku-20240307-v1:0"
-        self.agent = Agent(model=self.model)
+        super().__init__("anthropic.claude-3-haiku-20240307-v1:0", profile='decomposer', router=router)
         self.logger.info(f"Decomposer Agent initialized with model: {self.model}")
 
     def decompose(self, task_description: str) -> List[str]:
@@ -49,7 +263,29 @@ class DecomposerAgent:
         Returns:
             List of sub-task descriptions
         """
-        prompt = f"""You are a task decomposition expert. Your job is to break down complex tasks into smaller, logical sub-tasks.
+        try:
+            self.logger.debug(f"Decomposing task: {task_description}")
+            response = self._invoke(self._decompose_prompt(task_description))
+        except Exception as e:
+            self.logger.error(f"Error during decomposition: {e}", exc_info=True)
+            return [f"Complete: {task_description}"]
+
+        return self._parse_sub_tasks(response, task_description)
+
+    async def decompose_async(self, task_description: str) -> List[str]:
+        """Async variant of decompose()."""
+        try:
+            self.logger.debug(f"Decomposing task: {task_description}")
+            response = await self._invoke_async(self._decompose_prompt(task_description))
+        except Exception as e:
+            self.logger.error(f"Error during decomposition: {e}", exc_info=True)
+            return [f"Complete: {task_description}"]
+
+        return self._parse_sub_tasks(response, task_description)
+
+    def _decompose_prompt(self, task_description: str) -> str:
+        """Build the decomposition prompt for a task."""
+        return f"""You are a task decomposition expert. Your job is to break down complex tasks into smaller, logical sub-tasks.
 
 Given the following task:
 "{task_description}"
@@ -69,10 +305,18 @@ Response: ["Make toast", "Make tea"]
 
 Now decompose the given task:"""
 
-        try:
-            self.logger.debug(f"Decomposing task: {task_description}")
-            response = self.agent(prompt)
+    def _parse_sub_tasks(self, response, task_description: str) -> List[str]:
+        """
+        Extract the sub-task list from a decomposition response.
+
+        Args:
+            response: The raw model response
+            task_description: The task that was decomposed (used for the fallback)
 
+        Returns:
+            List of sub-task descriptions
+        """
+        try:
             # Parse the JSON response
             # Clean up the response to extract JSON
             # Convert AgentResult to string first
@@ -104,7 +348,213 @@ Now decompose the given task:"""
             return [f"Complete: {task_description}"]
 
 
-class VerifierAgent:
+    def expand(self, task_description: str, parent_task: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Leaf check, decomposition and self-review in a single model call.
+
+        Args:
+            task_description: The task to expand
+            parent_task: Optional parent task for context
+
+        Returns:
+            Dict with 'is_leaf', 'sub_tasks' and 'valid' keys, or None if the
+            response could not be parsed (callers should fall back to the
+            separate verifier/decomposer calls)
+        """
+        try:
+            self.logger.debug(f"Expanding task: {task_description}")
+            response = self._invoke(self._expand_prompt(task_description, parent_task), profile='expansion')
+        except Exception as e:
+            self.logger.error(f"Error during fused expansion: {e}", exc_info=True)
+            return None
+
+        return self._parse_expansion(response)
+
+    async def expand_async(self, task_description: str, parent_task: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Async variant of expand()."""
+        try:
+            self.logger.debug(f"Expanding task: {task_description}")
+            response = await self._invoke_async(self._expand_prompt(task_description, parent_task), profile='expansion')
+        except Exception as e:
+            self.logger.error(f"Error during fused expansion: {e}", exc_info=True)
+            return None
+
+        return self._parse_expansion(response)
+
+    def _expand_prompt(self, task_description: str, parent_task: Optional[str]) -> str:
+        """Build the fused leaf-check/decompose/verify prompt."""
+        context = f"\nParent task: {parent_task}" if parent_task else ""
+
+        return f"""You are a task planning expert. Decide whether a task is atomic and, if it is not, break it down and review your own breakdown.
+
+Task: "{task_description}"{context}
+
+A task is ATOMIC (a leaf) if:
+1. It is simple and well-defined
+2. It can be completed in a single step
+3. It does NOT require breaking down into sub-steps
+4. A simple AI model could answer/execute it reliably
+
+If the task is NOT atomic, decompose it into 2-5 smaller sub-tasks that:
+1. Are logical and necessary steps to complete the main task
+2. Can potentially be worked on in parallel (when possible)
+3. Are simpler than the original task
+4. Together, complete the original task
+
+Then review your decomposition: set "valid" to true only if the sub-tasks are logical steps toward the task, together complete it, and are each simpler than it.
+
+IMPORTANT: Return ONLY a JSON object, nothing else.
+Atomic task: {{"is_leaf": true, "sub_tasks": [], "valid": true}}
+Non-atomic task: {{"is_leaf": false, "sub_tasks": ["sub-task 1", "sub-task 2"], "valid": true}}
+
+Example:
+Task: "Make breakfast"
+Response: {{"is_leaf": false, "sub_tasks": ["Make toast", "Make tea"], "valid": true}}
+
+Now expand the given task:"""
+
+    def _parse_expansion(self, response) -> Optional[Dict[str, Any]]:
+        """
+        Extract the fused expansion verdict from a model response.
+
+        Args:
+            response: The raw model response
+
+        Returns:
+            The normalized verdict dict, or None if it could not be parsed
+        """
+        response_text = str(response).strip()
+
+        try:
+            if '{' in response_text and '}' in response_text:
+                start = response_text.index('{')
+                end = response_text.rindex('}') + 1
+                expansion = json.loads(response_text[start:end])
+            else:
+                expansion = json.loads(response_text)
+
+            if not isinstance(expansion, dict) or not isinstance(expansion.get('is_leaf'), bool):
+                raise ValueError("Response is not an expansion object")
+
+            sub_tasks = expansion.get('sub_tasks') or []
+            if not isinstance(sub_tasks, list):
+                raise ValueError("sub_tasks is not a list")
+
+        except (json.JSONDecodeError, ValueError) as e:
+            self.logger.error(f"Failed to parse fused expansion: {e}")
+            self.logger.error(f"Response was: {response_text}")
+            return None
+
+        result = {
+            'is_leaf': expansion['is_leaf'],
+            'sub_tasks': [str(task) for task in sub_tasks],
+            'valid': bool(expansion.get('valid', True))
+        }
+        self.logger.info(f"Expanded task: is_leaf={result['is_leaf']}, "
+                         f"{len(result['sub_tasks'])} sub-tasks, valid={result['valid']}")
+        return result
+
+
+class MemoStore:
+    """
+    Hit-counting memo on top of an optimise.caching cache.
+
+    The default in-memory LRUCache is bounded; a SQLiteCache persists the
+    memo and shares it between processes.
+    """
+
+    def __init__(self, cache=None, max_entries: int = 4096):
+        """
+        Initialize the memo.
+
+        Args:
+            cache: Cache backend (LRUCache or SQLiteCache); defaults to an
+                in-memory LRUCache of `max_entries` entries that never expire
+            max_entries: Size of the default cache
+        """
+        self.cache = cache if cache is not None else LRUCache(max_entries=max_entries, default_ttl=None)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Return the remembered value, or None if there isn't one."""
+        value = self.cache.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key: str, value):
+        """Remember a value that came from the model."""
+        self.cache.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counts for this memo."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class VerdictStore(MemoStore):
+    """
+    Memo of verifier verdicts, so an identical question is only paid for once.
+
+    Leaf verdicts are keyed by the exact (task, parent) pair, and
+    decomposition verdicts by the exact parent plus its sorted sub-tasks;
+    only whitespace is normalized (see exact_task_key).
+    """
+
+    @staticmethod
+    def leaf_key(task_description: str, parent_task: Optional[str]) -> str:
+        """Key for an is-leaf verdict."""
+        return f"verdict:leaf\x1f{exact_task_key(task_description)}\x1f{exact_task_key(parent_task or '')}"
+
+    @staticmethod
+    def decomposition_key(parent_task: str, sub_tasks: List[str]) -> str:
+        """Key for a decomposition verdict; sub-task order doesn't matter."""
+        keys = sorted(exact_task_key(sub_task) for sub_task in sub_tasks)
+        return f"verdict:decomposition\x1f{exact_task_key(parent_task)}\x1f" + "\x1e".join(keys)
+
+    def put(self, key: str, verdict: bool):
+        """Remember a verdict that came from the model."""
+        super().put(key, bool(verdict))
+
+
+class SubtreeMemo(MemoStore):
+    """
+    Memo of leaf solves and syntheses for incremental re-execution.
+
+    A leaf is keyed by a hash of its exact task (see exact_task_key), and a
+    synthesis by a hash of its exact task plus its children's tasks and
+    results; the memo outlives a prompt, so only whitespace is ignored. When
+    an edited prompt produces a tree that overlaps an earlier one, unchanged
+    leaves hit the memo, their parents see identical child results and hit
+    too, and only the changed branches are recomputed.
+    """
+
+    @staticmethod
+    def leaf_key(task_description: str) -> str:
+        """Key for a leaf solve."""
+        digest = hashlib.sha256(exact_task_key(task_description).encode('utf-8')).hexdigest()
+        return f"subtree:leaf\x1f{digest}"
+
+    @staticmethod
+    def synthesis_key(parent_task: str, sub_results: List[Dict[str, str]]) -> str:
+        """Key for a synthesis; children's results are compared exactly."""
+        payload = json.dumps([exact_task_key(parent_task)] + [
+            [exact_task_key(item['task']), str(item['result'])] for item in sub_results
+        ])
+        return f"subtree:synthesis\x1f{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+class VerifierAgent(BaseTaskAgent):
     """
     Phase 2: Verification Agent
 
@@ -112,16 +562,19 @@ class VerifierAgent:
     Acts as a peer reviewer to ensure quality.
     """
 
-    def __init__(self):
-        """Initialize the Verifier agent."""
-        self.logger = logging.getLogger(__name__)
-
-        if not STRANDS_AVAILABLE:
-            raise ImportError("Strands is not installed. Please install strands package.")
+    def __init__(self, verdicts: Optional[VerdictStore] = None, router: Optional[ModelRouter] = None):
+        """
+        Initialize the Verifier agent.
 
+        Args:
+            verdicts: Optional store of earlier verdicts; questions it can
+                answer are not sent to the model again
+            router: Optional ModelRouter choosing the model per call from
+                observed latency, cost and success
+        """
         # Use Claude Haiku for fast verification
-        self.model = "anthropic.claude-3-haiku-20240307-v1:0"
-        self.agent = Agent(model=self.model)
+        super().__init__("anthropic.claude-3-haiku-20240307-v1:0", profile='verdict', router=router)
+        self.verdicts = verdicts
         self.logger.info(f"Verifier Agent initialized with model: {self.model}")
 
     def is_leaf_node(self, task_description: str, parent_task: Optional[str] = None) -> bool:
@@ -135,9 +588,196 @@ class VerifierAgent:
         Returns:
             True if the task is a leaf node, False otherwise
         """
+        key = VerdictStore.leaf_key(task_description, parent_task)
+        remembered = self._recall(key)
+        if remembered is not None:
+            return remembered
+
+        try:
+            self.logger.debug(f"Verifying if leaf node: {task_description}")
+            response = self._invoke(self._leaf_prompt(task_description, parent_task))
+        except Exception as e:
+            self.logger.error(f"Error during verification: {e}", exc_info=True)
+            # Default to considering it a leaf to avoid infinite decomposition
+            return True
+
+        is_leaf = self._parse_yes_no(response)
+        self.logger.info(f"Task '{task_description}' is leaf: {is_leaf}")
+        return self._remember(key, is_leaf)
+
+    async def is_leaf_node_async(self, task_description: str, parent_task: Optional[str] = None) -> bool:
+        """Async variant of is_leaf_node()."""
+        key = VerdictStore.leaf_key(task_description, parent_task)
+        remembered = self._recall(key)
+        if remembered is not None:
+            return remembered
+
+        try:
+            self.logger.debug(f"Verifying if leaf node: {task_description}")
+            response = await self._invoke_async(self._leaf_prompt(task_description, parent_task))
+        except Exception as e:
+            self.logger.error(f"Error during verification: {e}", exc_info=True)
+            return True
+
+        is_leaf = self._parse_yes_no(response)
+        self.logger.info(f"Task '{task_description}' is leaf: {is_leaf}")
+        return self._remember(key, is_leaf)
+
+    def verify_decomposition(self, parent_task: str, sub_tasks: List[str]) -> bool:
+        """
+        Verify if a decomposition is logical and complete.
+
+        Args:
+            parent_task: The original task
+            sub_tasks: The proposed sub-tasks
+
+        Returns:
+            True if decomposition is valid, False otherwise
+        """
+        key = VerdictStore.decomposition_key(parent_task, sub_tasks)
+        remembered = self._recall(key)
+        if remembered is not None:
+            return remembered
+
+        try:
+            self.logger.debug(f"Verifying decomposition of: {parent_task}")
+            response = self._invoke(self._decomposition_prompt(parent_task, sub_tasks))
+        except Exception as e:
+            self.logger.error(f"Error during decomposition verification: {e}", exc_info=True)
+            # Default to accepting the decomposition
+            return True
+
+        is_valid = self._parse_yes_no(response)
+        self.logger.info(f"Decomposition valid: {is_valid}")
+        return self._remember(key, is_valid)
+
+    async def verify_decomposition_async(self, parent_task: str, sub_tasks: List[str]) -> bool:
+        """Async variant of verify_decomposition()."""
+        key = VerdictStore.decomposition_key(parent_task, sub_tasks)
+        remembered = self._recall(key)
+        if remembered is not None:
+            return remembered
+
+        try:
+            self.logger.debug(f"Verifying decomposition of: {parent_task}")
+            response = await self._invoke_async(self._decomposition_prompt(parent_task, sub_tasks))
+        except Exception as e:
+            self.logger.error(f"Error during decomposition verification: {e}", exc_info=True)
+            return True
+
+        is_valid = self._parse_yes_no(response)
+        self.logger.info(f"Decomposition valid: {is_valid}")
+        return self._remember(key, is_valid)
+
+    def classify_leaves(self, parent_task: Optional[str], tasks: List[str],
+                        fallback: bool = True) -> Optional[List[bool]]:
+        """
+        Decide for a whole group of sibling tasks whether each one is a leaf.
+
+        All siblings are classified in one prompt instead of one is_leaf_node
+        call each. Siblings with a remembered verdict are left out of the
+        prompt, and no call is made if all of them are known.
+
+        Args:
+            parent_task: The task the siblings were decomposed from
+            tasks: The sibling tasks to classify
+            fallback: If the batch verdict can't be parsed, classify each task
+                with is_leaf_node instead of returning None
+
+        Returns:
+            One leaf verdict per task, in order, or None if the batch verdict
+            was unusable and fallback is disabled
+        """
+        known = self._recall_leaves(parent_task, tasks)
+        unknown = [task for task, verdict in zip(tasks, known) if verdict is None]
+        if not unknown:
+            return known
+
+        try:
+            self.logger.debug(f"Classifying {len(unknown)} sibling tasks of: {parent_task}")
+            verdicts = self._parse_verdicts(self._invoke(self._batch_leaf_prompt(parent_task, unknown), profile='leaf_batch'), len(unknown))
+        except Exception as e:
+            self.logger.error(f"Error during batch leaf classification: {e}", exc_info=True)
+            verdicts = None
+
+        if verdicts is None:
+            if not fallback:
+                return None
+            self.logger.warning("Batch leaf classification failed. Falling back to per-task checks.")
+            # is_leaf_node remembers the verdicts it got from the model, and never its default
+            verdicts = [self.is_leaf_node(task, parent_task) for task in unknown]
+            return self._merge_leaves(parent_task, known, unknown, verdicts, remember=False)
+
+        return self._merge_leaves(parent_task, known, unknown, verdicts)
+
+    async def classify_leaves_async(self, parent_task: Optional[str], tasks: List[str],
+                                    fallback: bool = True) -> Optional[List[bool]]:
+        """Async variant of classify_leaves(); the fallback checks run concurrently."""
+        known = self._recall_leaves(parent_task, tasks)
+        unknown = [task for task, verdict in zip(tasks, known) if verdict is None]
+        if not unknown:
+            return known
+
+        try:
+            self.logger.debug(f"Classifying {len(unknown)} sibling tasks of: {parent_task}")
+            response = await self._invoke_async(self._batch_leaf_prompt(parent_task, unknown), profile='leaf_batch')
+            verdicts = self._parse_verdicts(response, len(unknown))
+        except Exception as e:
+            self.logger.error(f"Error during batch leaf classification: {e}", exc_info=True)
+            verdicts = None
+
+        if verdicts is None:
+            if not fallback:
+                return None
+            self.logger.warning("Batch leaf classification failed. Falling back to per-task checks.")
+            verdicts = await asyncio.gather(*(self.is_leaf_node_async(task, parent_task) for task in unknown))
+            return self._merge_leaves(parent_task, known, unknown, list(verdicts), remember=False)
+
+        return self._merge_leaves(parent_task, known, unknown, verdicts)
+
+    def _recall(self, key: str) -> Optional[bool]:
+        """Look up a remembered verdict, if a verdict store is configured."""
+        if self.verdicts is None:
+            return None
+        try:
+            verdict = self.verdicts.get(key)
+        except Exception as e:
+            self.logger.error(f"Verdict lookup failed: {e}")
+            return None
+        if verdict is not None:
+            self.logger.debug(f"Reusing remembered verdict for {key!r}: {verdict}")
+        return verdict
+
+    def _remember(self, key: str, verdict: bool) -> bool:
+        """Store a verdict the model just gave and pass it through."""
+        if self.verdicts is not None:
+            try:
+                self.verdicts.put(key, verdict)
+            except Exception as e:
+                self.logger.error(f"Failed to store verdict: {e}")
+        return verdict
+
+    def _recall_leaves(self, parent_task: Optional[str], tasks: List[str]) -> List[Optional[bool]]:
+        """Remembered leaf verdicts for a group of siblings (None where unknown)."""
+        return [self._recall(VerdictStore.leaf_key(task, parent_task)) for task in tasks]
+
+    def _merge_leaves(self, parent_task: Optional[str], known: List[Optional[bool]],
+                      unknown: List[str], verdicts: List[bool], remember: bool = True) -> List[bool]:
+        """Fill the unknown slots of `known` with new verdicts, remembering them unless told not to."""
+        new_verdicts = iter(verdicts)
+        merged = []
+        for verdict in known:
+            merged.append(verdict if verdict is not None else next(new_verdicts))
+        if remember:
+            for task, verdict in zip(unknown, verdicts):
+                self._remember(VerdictStore.leaf_key(task, parent_task), verdict)
+        return merged
+
+    def _leaf_prompt(self, task_description: str, parent_task: Optional[str]) -> str:
+        """Build the leaf-check prompt for a task."""
         context = f"\nParent task: {parent_task}" if parent_task else ""
 
-        prompt = f"""You are a task verification expert. Your job is to determine if a task is "atomic" (simple enough to be executed in one step by a simple AI model).
+        return f"""You are a task verification expert. Your job is to determine if a task is "atomic" (simple enough to be executed in one step by a simple AI model).
 
 Task: "{task_description}"{context}
 
@@ -162,35 +802,9 @@ Examples of NON-LEAF NODES (need decomposition):
 Is this task a leaf node?
 Respond with ONLY one word: YES or NO"""
 
-        try:
-            self.logger.debug(f"Verifying if leaf node: {task_description}")
-            response = self.agent(prompt)
-
-            # Parse response
-            # Convert AgentResult to string first
-            response_text = str(response).strip().upper()
-            is_leaf = 'YES' in response_text
-
-            self.logger.info(f"Task '{task_description}' is leaf: {is_leaf}")
-            return is_leaf
-
-        except Exception as e:
-            self.logger.error(f"Error during verification: {e}", exc_info=True)
-            # Default to considering it a leaf to avoid infinite decomposition
-            return True
-
-    def verify_decomposition(self, parent_task: str, sub_tasks: List[str]) -> bool:
-        """
-        Verify if a decomposition is logical and complete.
-
-        Args:
-            parent_task: The original task
-            sub_tasks: The proposed sub-tasks
-
-        Returns:
-            True if decomposition is valid, False otherwise
-        """
-        prompt = f"""You are a task verification expert. Evaluate if the following task decomposition is logical and complete.
+    def _decomposition_prompt(self, parent_task: str, sub_tasks: List[str]) -> str:
+        """Build the decomposition-review prompt."""
+        return f"""You are a task verification expert. Evaluate if the following task decomposition is logical and complete.
 
 Parent Task: "{parent_task}"
 
@@ -204,25 +818,93 @@ Is this a good decomposition? Check if:
 
 Respond with ONLY one word: YES or NO"""
 
+    def _batch_leaf_prompt(self, parent_task: Optional[str], tasks: List[str]) -> str:
+        """Build the prompt that classifies a group of sibling tasks at once."""
+        context = f'\nParent task: "{parent_task}"\n' if parent_task else ""
+
+        return f"""You are a task verification expert. Your job is to determine, for each task below, if it is "atomic" (simple enough to be executed in one step by a simple AI model).
+{context}
+Tasks:
+{chr(10).join(f'{i+1}. {task}' for i, task in enumerate(tasks))}
+
+A task is a LEAF NODE (atomic) if:
+1. It is simple and well-defined
+2. It can be completed in a single step
+3. It does NOT require breaking down into sub-steps
+4. A simple AI model could answer/execute it reliably
+
+Examples of LEAF NODES:
+- "What is 2+2?"
+- "Get bread from pantry"
+- "Boil water"
+- "Define what photosynthesis means"
+- "Turn on the toaster"
+
+Examples of NON-LEAF NODES (need decomposition):
+- "Make breakfast" (needs: make toast, make tea, etc.)
+- "Explain quantum physics" (needs: multiple concepts explained)
+- "Build a web application" (needs: many sub-tasks)
+
+Is each task a leaf node?
+IMPORTANT: Return ONLY a JSON array with exactly one "YES" or "NO" per task, in the same order, nothing else.
+Format: ["YES", "NO", "YES"]"""
+
+    def _parse_verdicts(self, response, expected: int) -> Optional[List[bool]]:
+        """
+        Extract a list of YES/NO verdicts from a batch classification response.
+
+        Args:
+            response: The raw model response
+            expected: Number of verdicts the response must contain
+
+        Returns:
+            The verdicts as booleans, or None if the response is unusable
+        """
+        response_text = str(response).strip()
+
         try:
-            self.logger.debug(f"Verifying decomposition of: {parent_task}")
-            response = self.agent(prompt)
+            start = response_text.index('[')
+            end = response_text.rindex(']') + 1
+            raw_verdicts = json.loads(response_text[start:end])
+        except ValueError as e:
+            self.logger.error(f"Failed to parse batch verdicts: {e}")
+            self.logger.error(f"Response was: {response_text}")
+            return None
+
+        if not isinstance(raw_verdicts, list) or len(raw_verdicts) != expected:
+            self.logger.error(f"Expected {expected} batch verdicts, got: {response_text}")
+            return None
+
+        verdicts = []
+        for verdict in raw_verdicts:
+            if isinstance(verdict, bool):
+                verdicts.append(verdict)
+            elif isinstance(verdict, str) and verdict.strip().upper() in ('YES', 'NO'):
+                verdicts.append(verdict.strip().upper() == 'YES')
+            else:
+                self.logger.error(f"Unrecognized batch verdict: {verdict!r}")
+                return None
 
-            # Parse response
-            # Convert AgentResult to string first
-            response_text = str(response).strip().upper()
-            is_valid = 'YES' in response_text
+        self.logger.info(f"Batch classified {expected} tasks: {sum(verdicts)} leaves")
+        return verdicts
 
-            self.logger.info(f"Decomposition valid: {is_valid}")
-            return is_valid
+    @staticmethod
+    def _parse_yes_no(response) -> bool:
+        """Interpret a YES/NO verdict from the model: its first whole YES or NO word."""
+        # Convert AgentResult to string first
+        verdict = _VERDICT_WORD.search(str(response))
+        return verdict is not None and verdict.group(1).upper() == 'YES'
 
-        except Exception as e:
-            self.logger.error(f"Error during decomposition verification: {e}", exc_info=True)
-            # Default to accepting the decomposition
-            return True
 
+# Solver model per leaf difficulty: cheap by default, stronger for code and logic
+DEFAULT_LEAF_MODELS = {
+    'low': 'us.amazon.nova-lite-v1:0',
+    'medium': 'anthropic.claude-3-haiku-20240307-v1:0',
+    'high': 'anthropic.claude-3-5-sonnet-20240620-v1:0'
+}
 
-class SolverAgent:
+
+class SolverAgent(BaseTaskAgent):
     """
     Solver Agent for Leaf Nodes
 
@@ -230,47 +912,121 @@ class SolverAgent:
     Used in Phase 3 to execute leaf nodes.
     """
 
-    def __init__(self):
-        """Initialize the Solver agent."""
-        self.logger = logging.getLogger(__name__)
-
-        if not STRANDS_AVAILABLE:
-            raise ImportError("Strands is not installed. Please install strands package.")
+    def __init__(self, cache: Optional[SemanticCache] = None, memo: Optional[SubtreeMemo] = None,
+                 router: Optional[ModelRouter] = None, leaf_models: Optional[Dict[str, str]] = None):
+        """
+        Initialize the Solver agent.
 
+        Args:
+            cache: Optional semantic cache consulted before each solve, so
+                near-duplicate leaf tasks are answered without a model call
+            memo: Optional subtree memo holding exact earlier solves
+            router: Optional ModelRouter choosing the model per call from
+                observed latency, cost and success
+            leaf_models: Optional model per leaf difficulty (low/medium/high,
+                see DEFAULT_LEAF_MODELS); each leaf is scored locally and sent
+                to its model. Without it every leaf uses Nova Lite.
+        """
         # Use Amazon Nova Lite for fast, efficient execution
-        self.model = "us.amazon.nova-lite-v1:0"
-        self.agent = Agent(model=self.model)
+        super().__init__("us.amazon.nova-lite-v1:0", profile='solver', router=router)
+        self.cache = cache
+        self.memo = memo
+        self.leaf_models = leaf_models
         self.logger.info(f"Solver Agent initialized with model: {self.model}")
 
-    def solve(self, task_description: str) -> str:
+    def solve(self, task_description: str, route_leaf: bool = True) -> str:
         """
         Execute an atomic task and return the result.
 
         Args:
             task_description: The task to execute
+            route_leaf: Pick the model from the task's difficulty; False always
+                uses the cheap default model
 
         Returns:
             The result/answer for the task
         """
-        prompt = f"""You are a helpful assistant. Please complete the following task or answer the following question:
+        cached = self._cached_result(task_description)
+        if cached is not None:
+            return cached
 
-{task_description}
+        try:
+            self.logger.debug(f"Solving task: {task_description}")
+            difficulty, model = self._leaf_model(task_description, route_leaf)
+            response = self._invoke(self._solve_prompt(task_description), task_class=difficulty, model=model)
+            self.logger.info(f"Task solved successfully")
+            # Convert AgentResult to string first
+            return self._cache_result(task_description, str(response).strip())
 
-Provide a clear, concise answer or solution."""
+        except Exception as e:
+            self.logger.error(f"Error during task execution: {e}", exc_info=True)
+            return f"Error executing task: {str(e)}"
+
+    async def solve_async(self, task_description: str, route_leaf: bool = True) -> str:
+        """Async variant of solve()."""
+        cached = self._cached_result(task_description)
+        if cached is not None:
+            return cached
 
         try:
             self.logger.debug(f"Solving task: {task_description}")
-            response = self.agent(prompt)
+            difficulty, model = self._leaf_model(task_description, route_leaf)
+            response = await self._invoke_async(self._solve_prompt(task_description),
+                                                task_class=difficulty, model=model)
             self.logger.info(f"Task solved successfully")
-            # Convert AgentResult to string first
-            return str(response).strip()
+            return self._cache_result(task_description, str(response).strip())
 
         except Exception as e:
             self.logger.error(f"Error during task execution: {e}", exc_info=True)
             return f"Error executing task: {str(e)}"
 
+    def _leaf_model(self, task_description: str, route_leaf: bool = True):
+        """Score a leaf and pick its model. Returns (difficulty, model ID)."""
+        if not route_leaf or self.leaf_models is None:
+            return 'default', self.model
+        difficulty = leaf_difficulty(task_description)
+        model = self.leaf_models.get(difficulty, self.model)
+        if model != self.model:
+            self.logger.info(f"Routing {difficulty}-difficulty leaf to {model}: {task_description[:50]}")
+        return difficulty, model
+
+    def _cached_result(self, task_description: str) -> Optional[str]:
+        """Look up a previous answer to the same or a near-identical task."""
+        try:
+            if self.memo is not None:
+                result = self.memo.get(SubtreeMemo.leaf_key(task_description))
+                if result is not None:
+                    self.logger.debug(f"Reusing memoized solve for: {task_description}")
+                    return result
+            if self.cache is not None:
+                return self.cache.lookup(task_description)
+        except Exception as e:
+            self.logger.error(f"Solver cache lookup failed: {e}")
+        return None
+
+    def _cache_result(self, task_description: str, result: str) -> str:
+        """Remember a successful answer and pass it through."""
+        if not result:
+            return result
+        try:
+            if self.memo is not None:
+                self.memo.put(SubtreeMemo.leaf_key(task_description), result)
+            if self.cache is not None:
+                self.cache.store(task_description, result)
+        except Exception as e:
+            self.logger.error(f"Failed to cache solver result: {e}")
+        return result
+
+    def _solve_prompt(self, task_description: str) -> str:
+        """Build the solver prompt for a leaf task."""
+        return f"""You are a helpful assistant. Please complete the following task or answer the following question:
+
+{task_description}
 
-class SynthesizerAgent:
+Provide a clear, concise answer or solution."""
+
+
+class SynthesizerAgent(BaseTaskAgent):
     """
     Phase 3: Synthesizer Agent
 
@@ -278,16 +1034,19 @@ class SynthesizerAgent:
     Works bottom-up, merging solutions like a merge sort.
     """
 
-    def __init__(self):
-        """Initialize the Synthesizer agent."""
-        self.logger = logging.getLogger(__name__)
-
-        if not STRANDS_AVAILABLE:
-            raise ImportError("Strands is not installed. Please install strands package.")
+    def __init__(self, memo: Optional[SubtreeMemo] = None, router: Optional[ModelRouter] = None):
+        """
+        Initialize the Synthesizer agent.
 
+        Args:
+            memo: Optional subtree memo; a synthesis whose task and child
+                results are unchanged is reused instead of recomputed
+            router: Optional ModelRouter choosing the model per call from
+                observed latency, cost and success
+        """
         # Use Amazon Nova Lite as specified
-        self.model = "us.amazon.nova-lite-v1:0"
-        self.agent = Agent(model=self.model)
+        super().__init__("us.amazon.nova-lite-v1:0", profile='synthesizer', router=router)
+        self.memo = memo
         self.logger.info(f"Synthesizer Agent initialized with model: {self.model}")
 
     def synthesize(self, parent_task: str, sub_results: List[Dict[str, str]]) -> str:
@@ -301,13 +1060,68 @@ class SynthesizerAgent:
         Returns:
             Combined result for the parent task
         """
+        memoized = self._memoized(parent_task, sub_results)
+        if memoized is not None:
+            return memoized
+
+        try:
+            self.logger.debug(f"Synthesizing results for: {parent_task}")
+            response = self._invoke(self._synthesis_prompt(parent_task, sub_results))
+            self.logger.info(f"Synthesis completed successfully")
+            # Convert AgentResult to string first
+            return self._memoize(parent_task, sub_results, str(response).strip())
+
+        except Exception as e:
+            self.logger.error(f"Error during synthesis: {e}", exc_info=True)
+            return self._fallback(parent_task, sub_results)
+
+    async def synthesize_async(self, parent_task: str, sub_results: List[Dict[str, str]]) -> str:
+        """Async variant of synthesize()."""
+        memoized = self._memoized(parent_task, sub_results)
+        if memoized is not None:
+            return memoized
+
+        try:
+            self.logger.debug(f"Synthesizing results for: {parent_task}")
+            response = await self._invoke_async(self._synthesis_prompt(parent_task, sub_results))
+            self.logger.info(f"Synthesis completed successfully")
+            return self._memoize(parent_task, sub_results, str(response).strip())
+
+        except Exception as e:
+            self.logger.error(f"Error during synthesis: {e}", exc_info=True)
+            return self._fallback(parent_task, sub_results)
+
+    def _memoized(self, parent_task: str, sub_results: List[Dict[str, str]]) -> Optional[str]:
+        """Look up an earlier synthesis of the same task from the same child results."""
+        if self.memo is None:
+            return None
+        try:
+            result = self.memo.get(SubtreeMemo.synthesis_key(parent_task, sub_results))
+        except Exception as e:
+            self.logger.error(f"Subtree memo lookup failed: {e}")
+            return None
+        if result is not None:
+            self.logger.debug(f"Reusing memoized synthesis for: {parent_task}")
+        return result
+
+    def _memoize(self, parent_task: str, sub_results: List[Dict[str, str]], result: str) -> str:
+        """Remember a successful synthesis and pass it through."""
+        if self.memo is not None and result:
+            try:
+                self.memo.put(SubtreeMemo.synthesis_key(parent_task, sub_results), result)
+            except Exception as e:
+                self.logger.error(f"Failed to memoize synthesis: {e}")
+        return result
+
+    def _synthesis_prompt(self, parent_task: str, sub_results: List[Dict[str, str]]) -> str:
+        """Build the synthesis prompt from the children's results."""
         # Format the sub-results
         results_text = "\n\n".join(
             f"Sub-task: {item['task']}\nResult: {item['result']}"
             for item in sub_results
         )
 
-        prompt = f"""You are a synthesis expert. Your job is to combine results from sub-tasks into a complete answer for the parent task.
+        return f"""You are a synthesis expert. Your job is to combine results from sub-tasks into a complete answer for the parent task.
 
 Parent Task: "{parent_task}"
 
@@ -321,16 +1135,9 @@ The answer should:
 3. Be clear and well-organized
 4. Flow naturally as a unified response"""
 
-        try:
-            self.logger.debug(f"Synthesizing results for: {parent_task}")
-            response = self.agent(prompt)
-            self.logger.info(f"Synthesis completed successfully")
-            # Convert AgentResult to string first
-            return str(response).strip()
-
-        except Exception as e:
-            self.logger.error(f"Error during synthesis: {e}", exc_info=True)
-            # Fallback: concatenate results
-            fallback = f"Results for: {parent_task}\n\n"
-            fallback += "\n\n".join(f"- {item['result']}" for item in sub_results)
-            return fallback
+    @staticmethod
+    def _fallback(parent_task: str, sub_results: List[Dict[str, str]]) -> str:
+        """Concatenate the children's results when the model call fails."""
+        fallback = f"Results for: {parent_task}\n\n"
+        fallback += "\n\n".join(f"- {item['result']}" for item in sub_results)
+        return fallback
@@ -7,10 +7,21 @@ This module orchestrates the three-phase process:
 3. Phase 3: Synthesis (Bottom-Up)
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Optional, Any
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Tuple
 from agent.task_tree import TaskDecompositionTree, TaskNode, TaskStatus
-from agent.task_agents import DecomposerAgent, VerifierAgent, SolverAgent, SynthesizerAgent
+from agent.task_agents import (DecomposerAgent, VerifierAgent, SolverAgent, SynthesizerAgent, VerdictStore,
+                               SubtreeMemo, DEFAULT_LEAF_MODELS)
+from agent.task_scheduler import DataflowScheduler
+from optimise.costs import estimate_cost
+from optimise.model_selector import ModelRouter
+from optimise.parallel import run_parallel_tasks
+from optimise.plan_cache import PlanCache
+from optimise.semantic_cache import SemanticCache
 
 
 class TaskOrchestrator:
@@ -23,16 +34,79 @@ class TaskOrchestrator:
     3. Synthesize results bottom-up to get the final answer
     """
 
-    def __init__(self):
-        """Initialize the orchestrator with all required agents."""
+    def __init__(self, build_mode: str = 'serial', max_concurrency: int = 4,
+                 max_inflight_solves: int = 4, leaf_timeout: Optional[float] = None,
+                 execution_mode: str = 'phased', expansion_mode: str = 'three-call',
+                 batch_leaf_checks: bool = True, speculative_root: bool = False,
+                 optimistic_expansion: bool = False, deduplicate_subtasks: bool = True,
+                 plan_cache: Optional[PlanCache] = None, solver_cache: Optional[SemanticCache] = None,
+                 memoize_verdicts: bool = True, verdict_store: Optional[VerdictStore] = None,
+                 memoize_subtrees: bool = True, subtree_memo: Optional[SubtreeMemo] = None,
+                 router: Optional[ModelRouter] = None, route_leaves: bool = True):
+        """
+        Initialize the orchestrator with all required agents.
+
+        Args:
+            build_mode: 'serial' expands one node at a time; 'concurrent' expands
+                sibling subtrees in parallel and yields the same tree and node IDs
+            max_concurrency: Maximum number of nodes expanded at once in concurrent mode
+            max_inflight_solves: Maximum number of leaves solved at once (1 = sequential)
+            leaf_timeout: Seconds a single leaf solve may take before it is marked failed
+            execution_mode: 'phased' runs build, execution and synthesis one after
+                another; 'dataflow' schedules each node as soon as its inputs are
+                ready (uses max_concurrency workers, ignores build_mode)
+            expansion_mode: 'three-call' asks the verifier, decomposer and verifier
+                again per node; 'fused' makes one combined decomposer call per node
+            batch_leaf_checks: After a decomposition is accepted, classify all of its
+                sub-tasks as leaf/non-leaf in one verifier call
+            speculative_root: In phased mode, solve the whole task on the cheap solver
+                while the root is being verified, and answer with it if the root
+                is a leaf
+            optimistic_expansion: In three-call mode, start expanding a node's
+                children as soon as it is decomposed, and roll them back if the
+                decomposition review then rejects it
+            deduplicate_subtasks: Solve identical leaf tasks once and share the
+                result with every parent that asked for them
+            plan_cache: Cache of verified trees keyed by prompt template; on a hit
+                decomposition and verification are skipped entirely
+            solver_cache: Semantic cache of leaf results; near-duplicate leaf
+                tasks are answered from it instead of calling the solver
+            memoize_verdicts: Remember leaf and decomposition verdicts so identical
+                questions are not sent to the verifier twice
+            verdict_store: Store to remember verdicts in (e.g. backed by a
+                SQLiteCache to persist them); defaults to a bounded in-memory store
+            memoize_subtrees: Reuse leaf solves and syntheses whose task (and, for
+                syntheses, child results) are unchanged, so an edited prompt only
+                recomputes the branches that changed
+            subtree_memo: Memo to reuse results from; defaults to a bounded
+                in-memory memo
+            router: ModelRouter shared by all four agents; when set, each call's
+                model is chosen from observed latency, cost and success
+            route_leaves: Score each leaf locally and solve hard ones (code,
+                logic puzzles) on a stronger model; otherwise every leaf is
+                solved on Nova Lite
+        """
+        if build_mode not in ('serial', 'concurrent'):
+            raise ValueError(f"Unknown build mode: {build_mode}")
+        if execution_mode not in ('phased', 'dataflow'):
+            raise ValueError(f"Unknown execution mode: {execution_mode}")
+        if expansion_mode not in ('three-call', 'fused'):
+            raise ValueError(f"Unknown expansion mode: {expansion_mode}")
+
         self.logger = logging.getLogger(__name__)
 
         # Initialize all agents
         try:
-            self.decomposer = DecomposerAgent()
-            self.verifier = VerifierAgent()
-            self.solver = SolverAgent()
-            self.synthesizer = SynthesizerAgent()
+            self.decomposer = DecomposerAgent(router=router)
+            if memoize_verdicts and verdict_store is None:
+                verdict_store = VerdictStore()
+            self.verifier = VerifierAgent(verdicts=verdict_store if memoize_verdicts else None, router=router)
+            if memoize_subtrees and subtree_memo is None:
+                subtree_memo = SubtreeMemo()
+            subtree_memo = subtree_memo if memoize_subtrees else None
+            self.solver = SolverAgent(cache=solver_cache, memo=subtree_memo, router=router,
+                                      leaf_models=DEFAULT_LEAF_MODELS if route_leaves else None)
+            self.synthesizer = SynthesizerAgent(memo=subtree_memo, router=router)
             self.logger.info("Task Orchestrator initialized with all agents")
         except Exception as e:
             self.logger.error(f"Failed to initialize agents: {e}")
@@ -40,6 +114,19 @@ class TaskOrchestrator:
 
         self.tree: Optional[TaskDecompositionTree] = None
         self.max_depth = 5  # Prevent infinite recursion
+        self.build_mode = build_mode
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_inflight_solves = max(1, max_inflight_solves)
+        self.leaf_timeout = leaf_timeout
+        self.execution_mode = execution_mode
+        self.expansion_mode = expansion_mode
+        self.batch_leaf_checks = batch_leaf_checks
+        self.speculative_root = speculative_root
+        self.optimistic_expansion = optimistic_expansion
+        self.deduplicate_subtasks = deduplicate_subtasks
+        self.plan_cache = plan_cache
+        self._verification_pool: Optional[ThreadPoolExecutor] = None  # deferred checks of the current task
+        self._model_calls_before: Dict[str, int] = {}  # per-model totals when the current task started
 
     def process_task(self, task_description: str) -> str:
         """
@@ -52,11 +139,36 @@ class TaskOrchestrator:
             The final result after synthesis
         """
         self.logger.info(f"Starting task processing: {task_description}")
+        self._model_calls_before = self._model_call_totals()
+        if self.optimistic_expansion:
+            self._verification_pool = ThreadPoolExecutor(max_workers=self.max_concurrency)
 
         try:
+            # Reuse a verified plan from an earlier prompt with the same template
+            cached_tree = self._cached_tree(task_description)
+            if cached_tree is not None:
+                self.tree = cached_tree
+                self.logger.info("=== Phase 1 & 2 skipped: using cached plan ===")
+                self.tree.print_tree()
+                self.logger.info("=== Phase 3: Execution and Synthesis ===")
+                result = self._execute_and_synthesize()
+                self.logger.info("Task processing completed successfully (cached plan)")
+                return result
+
             # Initialize the tree
             self.tree = TaskDecompositionTree(task_description)
 
+            if self.execution_mode == 'dataflow':
+                self.logger.info("=== Dataflow: Decomposition, Execution and Synthesis ===")
+                result = DataflowScheduler(self).run()
+                self.tree.print_tree()
+                self._store_plan(self.tree)
+                self.logger.info("Task processing completed successfully")
+                return result
+
+            # Race a cheap solve of the whole task against the root's leaf check
+            speculation = self._start_speculative_solve() if self.speculative_root else None
+
             # Phase 1 & 2: Build the tree (decomposition + verification)
             self.logger.info("=== Phase 1 & 2: Decomposition and Verification ===")
             self._build_tree()
@@ -65,9 +177,18 @@ class TaskOrchestrator:
             self.logger.info("Task tree built successfully:")
             self.tree.print_tree()
 
+            if speculation is not None:
+                if self.tree.root.is_leaf:
+                    result = self._use_speculative_solve(speculation)
+                    self._store_plan(self.tree)
+                    self.logger.info("Task processing completed successfully (speculative root solve)")
+                    return result
+                self._discard_speculative_solve(speculation)
+
             # Phase 3: Execute and synthesize
             self.logger.info("=== Phase 3: Execution and Synthesis ===")
             result = self._execute_and_synthesize()
+            self._store_plan(self.tree)
 
             self.logger.info("Task processing completed successfully")
             return result
@@ -75,6 +196,101 @@ class TaskOrchestrator:
         except Exception as e:
             self.logger.error(f"Error processing task: {e}", exc_info=True)
             return f"Error processing task: {str(e)}"
+        finally:
+            if self._verification_pool is not None:
+                # Checks still pending belong to an aborted build; don't wait for them
+                self._verification_pool.shutdown(wait=False, cancel_futures=True)
+                self._verification_pool = None
+
+    def _cached_tree(self, task_description: str) -> Optional[TaskDecompositionTree]:
+        """Instantiate the cached plan for a task's template, if there is one."""
+        if self.plan_cache is None:
+            return None
+
+        try:
+            plan = self.plan_cache.lookup(task_description)
+        except Exception as e:
+            self.logger.error(f"Plan cache lookup failed: {e}")
+            return None
+        if plan is None:
+            return None
+
+        tree = TaskDecompositionTree.from_plan(plan)
+        tree.root.metadata['plan_cache'] = 'hit'
+        return tree
+
+    def _store_plan(self, tree: TaskDecompositionTree):
+        """Cache a freshly built tree under its prompt template if the task succeeded."""
+        if self.plan_cache is None:
+            return
+
+        if tree.root.error is not None:
+            tree.root.metadata['plan_cache'] = 'miss'
+            return
+
+        try:
+            stored = self.plan_cache.store(tree.root.task_description, tree.to_dict())
+        except Exception as e:
+            self.logger.error(f"Failed to store plan: {e}")
+            stored = False
+        tree.root.metadata['plan_cache'] = 'stored' if stored else 'miss'
+
+    def _start_speculative_solve(self) -> Future:
+        """Start solving the root task on the cheap solver in the background."""
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(self.solver.solve, self.tree.root.task_description, route_leaf=False)
+        executor.shutdown(wait=False)
+        return future
+
+    def _use_speculative_solve(self, speculation: Future) -> str:
+        """
+        Adopt the speculative answer for a root that turned out to be a leaf.
+
+        Args:
+            speculation: The in-flight speculative solve
+
+        Returns:
+            The speculative answer
+        """
+        root = self.tree.root
+        root.status = TaskStatus.EXECUTING
+        start_time = time.perf_counter()
+        try:
+            result = speculation.result(timeout=self.leaf_timeout)
+        except Exception as e:
+            self.logger.error(f"Speculative root solve failed: {e}")
+            root.metadata['speculative_solve'] = 'failed'
+            root.set_error(str(e))
+            return f"Error: {e}"
+
+        root.metadata['speculative_solve'] = 'used'
+        root.metadata['speculative_wait_ms'] = (time.perf_counter() - start_time) * 1000
+        root.set_result(result)
+        return result
+
+    def _discard_speculative_solve(self, speculation: Future):
+        """
+        Drop the speculative answer for a root that needs decomposition.
+
+        The call is cancelled if it has not started; otherwise its estimated
+        cost is recorded as wasted spend on the root once it finishes.
+        """
+        root = self.tree.root
+        if speculation.cancel():
+            root.metadata['speculative_solve'] = 'cancelled'
+            root.metadata['speculative_wasted_cost'] = 0.0
+            return
+
+        root.metadata['speculative_solve'] = 'discarded'
+        prompt = self.solver._solve_prompt(root.task_description)
+
+        def record_waste(future: Future):
+            response = '' if future.cancelled() or future.exception() else future.result()
+            root.metadata['speculative_wasted_cost'] = estimate_cost(prompt, response, self.solver.model)
+            self.logger.info(f"Discarded speculative root solve "
+                             f"(wasted ~${root.metadata['speculative_wasted_cost']:.6f})")
+
+        speculation.add_done_callback(record_waste)
 
     def _build_tree(self):
         """
@@ -82,8 +298,11 @@ class TaskOrchestrator:
 
         This combines Phase 1 (Decomposition) and Phase 2 (Verification).
         """
-        # Start with root node
-        self._decompose_node(self.tree.root, depth=0)
+        if self.build_mode == 'concurrent':
+            self._build_tree_concurrent()
+        else:
+            # Start with root node
+            self._decompose_node(self.tree.root, depth=0)
 
     def _decompose_node(self, node: TaskNode, depth: int):
         """
@@ -93,59 +312,332 @@ class TaskOrchestrator:
             node: The node to decompose
             depth: Current depth in the tree (for max depth check)
         """
-        # Check max depth to prevent infinite recursion
-        if depth >= self.max_depth:
-            self.logger.warning(f"Max depth {self.max_depth} reached for node {node.node_id}. Marking as leaf.")
-            node.mark_as_leaf()
-            node.status = TaskStatus.VERIFIED
-            return
-
         self.logger.debug(f"Processing node at depth {depth}: {node.task_description}")
 
-        # Phase 2: Check if this is a leaf node
         parent_task = None
         if node.parent_id and node.parent_id in self.tree.nodes:
             parent_task = self.tree.nodes[node.parent_id].task_description
 
-        is_leaf = self.verifier.is_leaf_node(node.task_description, parent_task)
+        node.status = TaskStatus.DECOMPOSING
+        sub_tasks, verification = self._expand_task(node.task_description, parent_task, depth, node.metadata)
 
-        if is_leaf:
-            # This is a leaf node - no further decomposition needed
+        if sub_tasks is None:
             node.mark_as_leaf()
             node.status = TaskStatus.VERIFIED
             self.logger.info(f"Node {node.node_id} verified as leaf")
             return
 
-        # Phase 1: Decompose the task
-        node.status = TaskStatus.DECOMPOSING
-        sub_tasks = self.decomposer.decompose(node.task_description)
+        # Add sub-tasks as children
+        for index, sub_task in enumerate(sub_tasks):
+            if verification is not None and verification.done() and not verification.result():
+                # Already rejected - stop speculating on the remaining children
+                break
+            child_node = self.tree.add_node(sub_task, node.node_id)
+            child_node.metadata.update(self._child_metadata(node.metadata, index))
+            # Recursively decompose each child
+            self._decompose_node(child_node, depth + 1)
 
-        if not sub_tasks or len(sub_tasks) == 0:
-            # Decomposition failed or returned empty - mark as leaf
-            self.logger.warning(f"Decomposition returned no sub-tasks for {node.node_id}. Marking as leaf.")
+        if not self._verification_passed(node.task_description, verification):
+            # Roll back the speculative subtree; IDs are rewound with it
+            self.tree.remove_children(node.node_id)
+            node.metadata.pop('child_leaf_verdicts', None)
+            node.metadata['speculation_rolled_back'] = True
             node.mark_as_leaf()
             node.status = TaskStatus.VERIFIED
             return
 
+        # Mark this node as verified (not a leaf, but properly decomposed)
+        node.status = TaskStatus.VERIFIED
+        self.logger.info(f"Node {node.node_id} decomposed into {len(sub_tasks)} sub-tasks")
+
+    def _expand_task(self, task_description: str, parent_task: Optional[str], depth: int,
+                     metadata: Dict[str, Any]) -> Tuple[Optional[List[str]], Optional[Future]]:
+        """
+        Run the leaf check, decomposition and verification for a single task.
+
+        This touches no tree state, so it is safe to call from worker threads.
+
+        Args:
+            task_description: The task to expand
+            parent_task: Description of the parent task (None for root)
+            depth: Depth of the task in the tree
+            metadata: Node metadata to record the expansion's call count and latency in
+
+        Returns:
+            Tuple of (sub-tasks or None if the task should be a leaf, pending
+            verification). With optimistic expansion the decomposition is
+            returned before it is verified, together with a Future that
+            resolves to the verifier's verdict; callers must roll the children
+            back if it resolves to False. Otherwise the verification is None.
+        """
+        # Check max depth to prevent infinite recursion
+        if depth >= self.max_depth:
+            self.logger.warning(f"Max depth {self.max_depth} reached for '{task_description}'. Marking as leaf.")
+            return None, None
+
+        start_time = time.perf_counter()
+        known_leaf = metadata.get('batch_leaf_verdict')
+        verification = None
+        if known_leaf:
+            # Already classified as a leaf together with its siblings
+            sub_tasks, calls = None, 0
+        elif self.expansion_mode == 'fused':
+            sub_tasks, calls = self._expand_fused(task_description, parent_task)
+        else:
+            sub_tasks, calls, verification = self._expand_three_call(
+                task_description, parent_task, check_leaf=known_leaf is None,
+                defer_verification=self.optimistic_expansion)
+
+        if sub_tasks is not None and self._classify_children(depth):
+            verdicts = self.verifier.classify_leaves(task_description, sub_tasks, fallback=False)
+            calls += 1
+            if verdicts is not None:
+                metadata['child_leaf_verdicts'] = verdicts
+
+        metadata['expansion_calls'] = calls
+        metadata['expansion_time_ms'] = (time.perf_counter() - start_time) * 1000
+        return sub_tasks, verification
+
+    def _verification_passed(self, task_description: str, verification) -> bool:
+        """
+        Wait for a deferred decomposition check from optimistic expansion.
+
+        Args:
+            task_description: The task whose decomposition is being checked
+            verification: The pending verification Future, or None if the
+                decomposition was verified up front
+
+        Returns:
+            True if the speculative children may be kept
+        """
+        if verification is None or verification.result():
+            return True
+
+        self.logger.warning(f"Decomposition not valid for '{task_description}'. Rolling back speculative subtree.")
+        return False
+
+    def _classify_children(self, depth: int) -> bool:
+        """Whether the children of a node at this depth should be batch-classified."""
+        # Children at max depth become leaves without asking the verifier
+        return self.batch_leaf_checks and depth + 1 < self.max_depth
+
+    @staticmethod
+    def _child_metadata(parent_metadata: Dict[str, Any], index: int) -> Dict[str, Any]:
+        """
+        Seed a child's metadata from its parent's expansion.
+
+        Args:
+            parent_metadata: Metadata of the expanded parent
+            index: Position of the child among its siblings
+
+        Returns:
+            The child's initial metadata, carrying its batch leaf verdict if known
+        """
+        verdicts = parent_metadata.get('child_leaf_verdicts')
+        return {'batch_leaf_verdict': verdicts[index]} if verdicts else {}
+
+    def _expand_three_call(self, task_description: str, parent_task: Optional[str], check_leaf: bool = True,
+                           defer_verification: bool = False):
+        """
+        Expand a task with separate leaf-check, decompose and verify calls.
+
+        Args:
+            task_description: The task to expand
+            parent_task: Description of the parent task (None for root)
+            check_leaf: Ask the verifier whether the task is a leaf first; skipped
+                when it is already known not to be one
+            defer_verification: Start the decomposition check in the background
+                and return the sub-tasks without waiting for it
+
+        Returns:
+            Tuple of (sub-tasks or None for a leaf, number of model calls,
+            pending verification Future or None)
+        """
+        calls = 0
+
+        # Phase 2: Check if this is a leaf node
+        if check_leaf:
+            calls += 1
+            if self.verifier.is_leaf_node(task_description, parent_task):
+                return None, calls, None
+
+        # Phase 1: Decompose the task
+        sub_tasks = self.decomposer.decompose(task_description)
+        calls += 1
+
+        if not sub_tasks:
+            # Decomposition failed or returned empty - mark as leaf
+            self.logger.warning(f"Decomposition returned no sub-tasks for '{task_description}'. Marking as leaf.")
+            return None, calls, None
+
         # Verify the decomposition quality
-        is_valid = self.verifier.verify_decomposition(node.task_description, sub_tasks)
+        calls += 1
+        if defer_verification:
+            verification = self._verification_pool.submit(
+                self.verifier.verify_decomposition, task_description, sub_tasks)
+            return sub_tasks, calls, verification
 
-        if not is_valid:
+        if not self.verifier.verify_decomposition(task_description, sub_tasks):
             # Decomposition not valid - mark as leaf and let solver handle it
-            self.logger.warning(f"Decomposition not valid for {node.node_id}. Marking as leaf.")
+            self.logger.warning(f"Decomposition not valid for '{task_description}'. Marking as leaf.")
+            return None, calls, None
+
+        return sub_tasks, calls, None
+
+    def _expand_fused(self, task_description: str, parent_task: Optional[str]):
+        """
+        Expand a task with a single fused decomposer call.
+
+        Falls back to the three-call path if the fused response is unusable.
+
+        Returns:
+            Tuple of (verified sub-tasks or None for a leaf, number of model calls)
+        """
+        expansion = self.decomposer.expand(task_description, parent_task)
+        if expansion is None:
+            self.logger.warning(f"Fused expansion failed for '{task_description}'. Using three-call path.")
+            sub_tasks, calls, _ = self._expand_three_call(task_description, parent_task)
+            return sub_tasks, calls + 1
+
+        return self._accept_expansion(task_description, expansion), 1
+
+    def _accept_expansion(self, task_description: str, expansion: Dict[str, Any]) -> Optional[List[str]]:
+        """Turn a fused expansion verdict into sub-tasks, or None for a leaf."""
+        if expansion['is_leaf']:
+            return None
+
+        if not expansion['sub_tasks']:
+            self.logger.warning(f"Decomposition returned no sub-tasks for '{task_description}'. Marking as leaf.")
+            return None
+
+        if not expansion['valid']:
+            self.logger.warning(f"Decomposition not valid for '{task_description}'. Marking as leaf.")
+            return None
+
+        return expansion['sub_tasks']
+
+    def _build_tree_concurrent(self):
+        """
+        Build the tree with sibling subtrees expanded concurrently.
+
+        Expansion runs on plain plan dicts in a bounded thread pool. Workers
+        never wait on each other, so deep trees cannot deadlock the pool.
+        Once every branch has settled, the plan is attached depth-first in
+        the same order as the serial build, so node IDs are identical.
+        """
+        root_plan = self._new_plan(self.tree.root.task_description, None, 0)
+        outstanding = [1]
+        settled = threading.Condition()
+        errors: List[Exception] = []
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            def expand(plan: Dict[str, Any]):
+                try:
+                    if plan['rejected']:
+                        return
+                    sub_tasks, verification = self._expand_task(plan['task'], plan['parent_task'],
+                                                                plan['depth'], plan['metadata'])
+                    if sub_tasks is None:
+                        return
+
+                    with settled:
+                        if plan['rejected']:
+                            return
+                        plan['sub_tasks'] = sub_tasks
+                        plan['children'] = [
+                            self._new_plan(sub_task, plan['task'], plan['depth'] + 1,
+                                           self._child_metadata(plan['metadata'], index))
+                            for index, sub_task in enumerate(sub_tasks)
+                        ]
+                        outstanding[0] += len(plan['children']) + (verification is not None)
+
+                    for child_plan in plan['children']:
+                        pool.submit(expand, child_plan)
+                    if verification is not None:
+                        verification.add_done_callback(lambda future: verified(plan, future))
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    with settled:
+                        outstanding[0] -= 1
+                        settled.notify_all()
+
+            def verified(plan: Dict[str, Any], verification: Future):
+                try:
+                    if not self._verification_passed(plan['task'], verification):
+                        with settled:
+                            self._reject_plan(plan)
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    with settled:
+                        outstanding[0] -= 1
+                        settled.notify_all()
+
+            pool.submit(expand, root_plan)
+            with settled:
+                settled.wait_for(lambda: outstanding[0] == 0)
+
+        if errors:
+            raise errors[0]
+
+        self._attach_plan(self.tree, self.tree.root, root_plan)
+
+    @staticmethod
+    def _new_plan(task_description: str, parent_task: Optional[str], depth: int,
+                  metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Create an unexpanded plan entry for the concurrent builder."""
+        return {
+            'task': task_description,
+            'parent_task': parent_task,
+            'depth': depth,
+            'sub_tasks': None,
+            'children': [],
+            'rejected': False,
+            'metadata': metadata or {}
+        }
+
+    @staticmethod
+    def _reject_plan(plan: Dict[str, Any]):
+        """
+        Roll back the speculative children of a plan whose decomposition failed review.
+
+        Descendants are flagged so any work still queued for them is skipped.
+        """
+        stack = list(plan['children'])
+        while stack:
+            child_plan = stack.pop()
+            child_plan['rejected'] = True
+            stack.extend(child_plan['children'])
+
+        plan['sub_tasks'] = None
+        plan['children'] = []
+        plan['metadata'].pop('child_leaf_verdicts', None)
+        plan['metadata']['speculation_rolled_back'] = True
+
+    def _attach_plan(self, tree: TaskDecompositionTree, node: TaskNode, plan: Dict[str, Any]):
+        """
+        Materialize an expanded plan under a tree node, depth-first.
+
+        Args:
+            tree: The tree that owns the node
+            node: The tree node the plan describes
+            plan: The expanded plan entry for that node
+        """
+        node.metadata.update(plan['metadata'])
+
+        if plan['sub_tasks'] is None:
             node.mark_as_leaf()
             node.status = TaskStatus.VERIFIED
+            self.logger.info(f"Node {node.node_id} verified as leaf")
             return
 
-        # Add sub-tasks as children
-        for sub_task in sub_tasks:
-            child_node = self.tree.add_node(sub_task, node.node_id)
-            # Recursively decompose each child
-            self._decompose_node(child_node, depth + 1)
+        for sub_task, child_plan in zip(plan['sub_tasks'], plan['children']):
+            child_node = tree.add_node(sub_task, node.node_id)
+            self._attach_plan(tree, child_node, child_plan)
 
-        # Mark this node as verified (not a leaf, but properly decomposed)
         node.status = TaskStatus.VERIFIED
-        self.logger.info(f"Node {node.node_id} decomposed into {len(sub_tasks)} sub-tasks")
+        self.logger.info(f"Node {node.node_id} decomposed into {len(plan['sub_tasks'])} sub-tasks")
 
     def _execute_and_synthesize(self) -> str:
         """
@@ -161,25 +653,63 @@ class TaskOrchestrator:
         return self._synthesize_node(self.tree.root)
 
     def _execute_leaves(self):
-        """Execute all leaf nodes in the tree."""
-        leaf_nodes = self.tree.get_leaf_nodes()
+        """
+        Execute all leaf nodes in the tree.
+
+        Leaves are independent by construction, so up to `max_inflight_solves`
+        of them are solved at once. Results are applied in leaf order and each
+        leaf records its solve time in `metadata['solve_time_ms']`.
+        """
+        leaf_nodes = self._leaves_to_solve(self.tree)
         self.logger.info(f"Executing {len(leaf_nodes)} leaf nodes")
 
         for leaf in leaf_nodes:
-            try:
-                leaf.status = TaskStatus.EXECUTING
-                self.logger.debug(f"Executing leaf {leaf.node_id}: {leaf.task_description}")
+            leaf.status = TaskStatus.EXECUTING
 
-                # Execute the task
-                result = self.solver.solve(leaf.task_description)
+        start_time = time.perf_counter()
+        outcomes = run_parallel_tasks(
+            [self._make_leaf_solve(leaf) for leaf in leaf_nodes],
+            max_workers=self.max_inflight_solves,
+            timeout=self.leaf_timeout,
+            return_exceptions=True
+        )
 
-                # Store the result
+        for leaf, outcome in zip(leaf_nodes, outcomes):
+            # A solver may raise TimeoutError itself; only leaf_timeout marks a leaf timed out
+            if isinstance(outcome, TimeoutError) and self.leaf_timeout is not None:
+                leaf.metadata['solve_time_ms'] = self.leaf_timeout * 1000
+                leaf.metadata['timed_out'] = True
+                leaf.set_error(f"Leaf execution timed out after {self.leaf_timeout}s")
+            elif isinstance(outcome, Exception):
+                self.logger.error(f"Error executing leaf {leaf.node_id}: {outcome}")
+                leaf.set_error(str(outcome))
+            else:
+                result, elapsed_ms = outcome
+                leaf.metadata['solve_time_ms'] = elapsed_ms
                 leaf.set_result(result)
-                self.logger.info(f"Leaf {leaf.node_id} executed successfully")
+                self.logger.info(f"Leaf {leaf.node_id} executed successfully in {elapsed_ms:.2f} ms")
+
+        self.tree.propagate_canonical_results()
+
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        self.logger.info(f"Executed {len(leaf_nodes)} leaf nodes in {elapsed_ms:.2f} ms")
 
-            except Exception as e:
-                self.logger.error(f"Error executing leaf {leaf.node_id}: {e}")
-                leaf.set_error(str(e))
+    def _leaves_to_solve(self, tree: TaskDecompositionTree) -> List[TaskNode]:
+        """Get the leaves that need a solver call, skipping duplicates if enabled."""
+        if not self.deduplicate_subtasks:
+            return tree.get_leaf_nodes()
+
+        tree.deduplicate_leaves()
+        return tree.get_canonical_leaves()
+
+    def _make_leaf_solve(self, leaf: TaskNode):
+        """Build a callable that solves one leaf and reports its duration."""
+        def solve():
+            self.logger.debug(f"Executing leaf {leaf.node_id}: {leaf.task_description}")
+            start_time = time.perf_counter()
+            result = self.solver.solve(leaf.task_description)
+            return result, (time.perf_counter() - start_time) * 1000
+        return solve
 
     def _synthesize_node(self, node: TaskNode) -> str:
         """
@@ -240,6 +770,236 @@ class TaskOrchestrator:
             node.set_error(error)
             return f"Error: {error}"
 
+    async def process_task_async(self, task_description: str) -> str:
+        """
+        Process a task through the three-phase pipeline on the running event loop.
+
+        Siblings are expanded, leaves solved and siblings synthesized
+        concurrently, with at most `max_concurrency` model calls in flight per
+        task. Each call builds its own tree, so one orchestrator can serve many
+        tasks on a single loop; `self.tree` is set to the tree of the most
+        recently finished task.
+
+        Args:
+            task_description: The task to process
+
+        Returns:
+            The final result after synthesis
+        """
+        self.logger.info(f"Starting async task processing: {task_description}")
+        self._model_calls_before = self._model_call_totals()
+
+        try:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            cached_tree = self._cached_tree(task_description)
+            if cached_tree is not None:
+                await self._execute_leaves_async(cached_tree, semaphore)
+                result = await self._synthesize_node_async(cached_tree.root, semaphore)
+                self.tree = cached_tree
+                return result
+
+            tree = TaskDecompositionTree(task_description)
+
+            speculation = None
+            if self.speculative_root:
+                speculation = asyncio.ensure_future(self.solver.solve_async(task_description, route_leaf=False))
+
+            # Phase 1 & 2: Build the tree (decomposition + verification)
+            root_plan = await self._expand_plan_async(task_description, None, 0, semaphore)
+            self._attach_plan(tree, tree.root, root_plan)
+
+            if speculation is not None:
+                if tree.root.is_leaf:
+                    result = await speculation
+                    tree.root.metadata['speculative_solve'] = 'used'
+                    tree.root.set_result(result)
+                    self._store_plan(tree)
+                    self.tree = tree
+                    return result
+
+                # Cancelled calls were still sent, so count their input as wasted
+                response = speculation.result() if speculation.done() and not speculation.exception() else ''
+                speculation.cancel()
+                tree.root.metadata['speculative_solve'] = 'discarded'
+                tree.root.metadata['speculative_wasted_cost'] = estimate_cost(
+                    self.solver._solve_prompt(task_description), response, self.solver.model)
+
+            # Phase 3: Execute and synthesize
+            await self._execute_leaves_async(tree, semaphore)
+            result = await self._synthesize_node_async(tree.root, semaphore)
+            self._store_plan(tree)
+
+            self.tree = tree
+            self.logger.info("Async task processing completed successfully")
+            return result
+
+        except Exception as e:
+            self.logger.error(f"Error processing task: {e}", exc_info=True)
+            return f"Error processing task: {str(e)}"
+
+    async def _expand_task_async(self, task_description: str, parent_task: Optional[str], depth: int,
+                                 semaphore: asyncio.Semaphore, metadata: Dict[str, Any]):
+        """
+        Async variant of _expand_task().
+
+        Returns:
+            Tuple of (sub-tasks or None for a leaf, pending verification task or None)
+        """
+        if depth >= self.max_depth:
+            self.logger.warning(f"Max depth {self.max_depth} reached for '{task_description}'. Marking as leaf.")
+            return None, None
+
+        start_time = time.perf_counter()
+        known_leaf = metadata.get('batch_leaf_verdict')
+        verification = None
+        if known_leaf:
+            sub_tasks, calls = None, 0
+        elif self.expansion_mode == 'fused':
+            async with semaphore:
+                expansion = await self.decomposer.expand_async(task_description, parent_task)
+            if expansion is not None:
+                sub_tasks, calls = self._accept_expansion(task_description, expansion), 1
+            else:
+                self.logger.warning(f"Fused expansion failed for '{task_description}'. Using three-call path.")
+                sub_tasks, calls, _ = await self._expand_three_call_async(task_description, parent_task, semaphore)
+                calls += 1
+        else:
+            sub_tasks, calls, verification = await self._expand_three_call_async(
+                task_description, parent_task, semaphore, check_leaf=known_leaf is None,
+                defer_verification=self.optimistic_expansion)
+
+        if sub_tasks is not None and self._classify_children(depth):
+            async with semaphore:
+                verdicts = await self.verifier.classify_leaves_async(task_description, sub_tasks, fallback=False)
+            calls += 1
+            if verdicts is not None:
+                metadata['child_leaf_verdicts'] = verdicts
+
+        metadata['expansion_calls'] = calls
+        metadata['expansion_time_ms'] = (time.perf_counter() - start_time) * 1000
+        return sub_tasks, verification
+
+    async def _expand_three_call_async(self, task_description: str, parent_task: Optional[str],
+                                       semaphore: asyncio.Semaphore, check_leaf: bool = True,
+                                       defer_verification: bool = False):
+        """Async variant of _expand_three_call()."""
+        calls = 0
+
+        if check_leaf:
+            calls += 1
+            async with semaphore:
+                is_leaf = await self.verifier.is_leaf_node_async(task_description, parent_task)
+            if is_leaf:
+                return None, calls, None
+
+        async with semaphore:
+            sub_tasks = await self.decomposer.decompose_async(task_description)
+        calls += 1
+        if not sub_tasks:
+            self.logger.warning(f"Decomposition returned no sub-tasks for '{task_description}'. Marking as leaf.")
+            return None, calls, None
+
+        calls += 1
+        if defer_verification:
+            async def verify() -> bool:
+                async with semaphore:
+                    return await self.verifier.verify_decomposition_async(task_description, sub_tasks)
+            return sub_tasks, calls, asyncio.ensure_future(verify())
+
+        async with semaphore:
+            is_valid = await self.verifier.verify_decomposition_async(task_description, sub_tasks)
+        if not is_valid:
+            self.logger.warning(f"Decomposition not valid for '{task_description}'. Marking as leaf.")
+            return None, calls, None
+
+        return sub_tasks, calls, None
+
+    async def _expand_plan_async(self, task_description: str, parent_task: Optional[str], depth: int,
+                                 semaphore: asyncio.Semaphore,
+                                 metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Expand a task and, concurrently, all of its descendants into a plan."""
+        plan = self._new_plan(task_description, parent_task, depth, metadata)
+        sub_tasks, verification = await self._expand_task_async(task_description, parent_task, depth, semaphore,
+                                                                plan['metadata'])
+        if sub_tasks is None:
+            return plan
+
+        children = asyncio.ensure_future(asyncio.gather(*(
+            self._expand_plan_async(sub_task, task_description, depth + 1, semaphore,
+                                    self._child_metadata(plan['metadata'], index))
+            for index, sub_task in enumerate(sub_tasks)
+        )))
+
+        if verification is not None and not await verification:
+            self.logger.warning(f"Decomposition not valid for '{task_description}'. "
+                                f"Rolling back speculative subtree.")
+            children.cancel()
+            await asyncio.gather(children, return_exceptions=True)
+            plan['children'] = []
+            self._reject_plan(plan)
+            return plan
+
+        plan['sub_tasks'] = sub_tasks
+        plan['children'] = list(await children)
+        return plan
+
+    async def _execute_leaves_async(self, tree: TaskDecompositionTree, semaphore: asyncio.Semaphore):
+        """Async variant of _execute_leaves()."""
+        leaf_nodes = self._leaves_to_solve(tree)
+        self.logger.info(f"Executing {len(leaf_nodes)} leaf nodes")
+
+        async def solve(leaf: TaskNode):
+            leaf.status = TaskStatus.EXECUTING
+            async with semaphore:
+                start_time = time.perf_counter()
+                try:
+                    result = await asyncio.wait_for(self.solver.solve_async(leaf.task_description),
+                                                    timeout=self.leaf_timeout)
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError) and self.leaf_timeout is not None:
+                        leaf.metadata['solve_time_ms'] = self.leaf_timeout * 1000
+                        leaf.metadata['timed_out'] = True
+                        leaf.set_error(f"Leaf execution timed out after {self.leaf_timeout}s")
+                    else:
+                        self.logger.error(f"Error executing leaf {leaf.node_id}: {e}")
+                        leaf.set_error(str(e))
+                    return
+
+            leaf.metadata['solve_time_ms'] = (time.perf_counter() - start_time) * 1000
+            leaf.set_result(result)
+
+        await asyncio.gather(*(solve(leaf) for leaf in leaf_nodes))
+        tree.propagate_canonical_results()
+
+    async def _synthesize_node_async(self, node: TaskNode, semaphore: asyncio.Semaphore) -> str:
+        """Async variant of _synthesize_node(); children are synthesized concurrently."""
+        if node.is_leaf:
+            if node.result:
+                return node.result
+            if node.error:
+                return f"Error: {node.error}"
+
+            self.logger.warning(f"Leaf node {node.node_id} has no result. Executing now.")
+            async with semaphore:
+                result = await self.solver.solve_async(node.task_description)
+            node.set_result(result)
+            return result
+
+        child_results = await asyncio.gather(*(
+            self._synthesize_node_async(child, semaphore) for child in node.children
+        ))
+        sub_results = [
+            {'task': child.task_description, 'result': child_result}
+            for child, child_result in zip(node.children, child_results)
+        ]
+
+        self.logger.debug(f"Synthesizing {len(sub_results)} results for node {node.node_id}")
+        async with semaphore:
+            result = await self.synthesizer.synthesize_async(node.task_description, sub_results)
+        node.set_result(result)
+        return result
+
     def get_tree_summary(self) -> Dict[str, Any]:
         """
         Get a summary of the task tree.
@@ -255,7 +1015,58 @@ class TaskOrchestrator:
             'leaf_nodes': len(self.tree.get_leaf_nodes()),
             'depth': self.tree.get_tree_depth(),
             'completed': self.tree.is_complete(),
-            'root_task': self.tree.root.task_description
+            'root_task': self.tree.root.task_description,
+            'expansion': self._expansion_summary(),
+            'deduplication': {
+                'canonical_leaves': len(self.tree.get_leaf_nodes()) - len(self.tree.duplicates),
+                'solver_calls_saved': len(self.tree.duplicates)
+            },
+            'plan_cache': self.tree.root.metadata.get('plan_cache'),
+            'solver_cache': self.solver.cache.stats() if self.solver.cache is not None else None,
+            'verdict_cache': self.verifier.verdicts.stats() if self.verifier.verdicts is not None else None,
+            'subtree_memo': self.synthesizer.memo.stats() if self.synthesizer.memo is not None else None,
+            'model_calls': self._model_calls_for_task(),
+            'output_tokens': {
+                'decomposer': self.decomposer.usage_stats(),
+                'verifier': self.verifier.usage_stats(),
+                'solver': self.solver.usage_stats(),
+                'synthesizer': self.synthesizer.usage_stats()
+            },
+            'speculation': {
+                'outcome': self.tree.root.metadata.get('speculative_solve'),
+                'wasted_cost': self.tree.root.metadata.get('speculative_wasted_cost', 0.0)
+            }
+        }
+
+    def _model_call_totals(self) -> Dict[str, int]:
+        """Calls made so far by all four agents, per model."""
+        totals: Dict[str, int] = {}
+        for agent in (self.decomposer, self.verifier, self.solver, self.synthesizer):
+            for model, calls in agent.model_call_counts().items():
+                totals[model] = totals.get(model, 0) + calls
+        return totals
+
+    def _model_calls_for_task(self) -> Dict[str, int]:
+        """Calls made per model while processing the current task."""
+        calls = {model: total - self._model_calls_before.get(model, 0)
+                 for model, total in self._model_call_totals().items()}
+        return {model: count for model, count in calls.items() if count}
+
+    def _expansion_summary(self) -> Dict[str, Any]:
+        """Aggregate the per-node expansion call counts and latencies."""
+        expanded = [node for node in self.tree.nodes.values() if 'expansion_calls' in node.metadata]
+        internal = [node for node in expanded if not node.is_leaf]
+
+        def average(nodes: List[TaskNode], key: str) -> float:
+            return sum(node.metadata[key] for node in nodes) / len(nodes) if nodes else 0.0
+
+        return {
+            'mode': self.expansion_mode,
+            'expanded_nodes': len(expanded),
+            'model_calls': sum(node.metadata['expansion_calls'] for node in expanded),
+            'calls_per_internal_node': average(internal, 'expansion_calls'),
+            'latency_per_internal_node_ms': average(internal, 'expansion_time_ms'),
+            'speculative_rollbacks': sum(1 for node in expanded if node.metadata.get('speculation_rolled_back'))
         }
 
     def print_results(self):
@@ -0,0 +1,338 @@
+"""
+Dataflow Scheduler for the Task Decomposition Tree
+
+The phased pipeline waits for the whole tree to be built before solving any
+leaf, and for every leaf to be solved before synthesizing any parent. This
+module removes those barriers by scheduling work per node:
+- A node is expanded (leaf check, decomposition, verification) as soon as it exists
+- A leaf is sent to the solver as soon as it is identified
+- A parent is synthesized as soon as its last child completes
+- A leaf identical to one already scheduled waits for that solve instead of
+  making its own call
+
+Ready work is ordered by its estimated remaining critical path, so the deepest
+and slowest branches are kept moving first.
+"""
+
+import heapq
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, TYPE_CHECKING
+
+from agent.task_tree import TaskNode, exact_task_key
+
+if TYPE_CHECKING:
+    from agent.task_orchestrator import TaskOrchestrator
+
+
+# Starting latency estimates (seconds) until real timings have been observed
+DEFAULT_WORK_ESTIMATES = {
+    'expand': 3.0,      # leaf check + decompose + verify
+    'solve': 1.0,
+    'synthesize': 1.5
+}
+
+
+class DataflowScheduler:
+    """
+    Runs decomposition, solving and synthesis for one tree as a single dataflow.
+
+    All tree bookkeeping happens on the calling thread; worker threads only
+    make model calls. The finished plan is attached to the orchestrator's tree
+    in the same depth-first order as the serial build, so node IDs are stable.
+    """
+
+    def __init__(self, orchestrator: 'TaskOrchestrator'):
+        """
+        Initialize the scheduler.
+
+        Args:
+            orchestrator: The orchestrator whose agents, tree and limits to use
+        """
+        self.orchestrator = orchestrator
+        self.logger = logging.getLogger(__name__)
+        self.estimates = dict(DEFAULT_WORK_ESTIMATES)
+        self._ready: List[tuple] = []
+        self._sequence = 0
+        self._pending_verifications = 0
+        self._solves: Dict[str, Dict[str, Any]] = {}  # exact task -> canonical leaf plan
+
+    def run(self) -> str:
+        """
+        Process the orchestrator's tree to completion.
+
+        Returns:
+            The final result for the root task
+        """
+        tree = self.orchestrator.tree
+        root_plan = self._new_plan(tree.root.task_description, None, 0)
+        self._push('expand', root_plan)
+
+        completions: queue.Queue = queue.Queue()
+        inflight: Dict[int, Dict[str, Any]] = {}
+        leaf_timeout = self.orchestrator.leaf_timeout
+
+        with ThreadPoolExecutor(max_workers=self.orchestrator.max_concurrency) as pool:
+            while self._ready or inflight or self._pending_verifications:
+                while self._ready and len(inflight) < self.orchestrator.max_concurrency:
+                    _, sequence, kind, plan = heapq.heappop(self._ready)
+                    if plan['rejected']:
+                        continue
+                    item = {'kind': kind, 'plan': plan, 'started': time.perf_counter()}
+                    inflight[sequence] = item
+                    pool.submit(self._run_item, sequence, item, completions)
+
+                wait_for = None
+                if leaf_timeout is not None:
+                    deadlines = [item['started'] + leaf_timeout for item in inflight.values()
+                                 if item['kind'] == 'solve']
+                    if deadlines:
+                        wait_for = max(0.0, min(deadlines) - time.perf_counter())
+
+                try:
+                    sequence, outcome, elapsed = completions.get(timeout=wait_for)
+                except queue.Empty:
+                    self._expire_solves(inflight, leaf_timeout)
+                    continue
+
+                # Deferred decomposition check from optimistic expansion
+                if sequence is None:
+                    self._verified(*outcome)
+                    continue
+
+                # Late result from a solve that already timed out
+                if sequence not in inflight:
+                    continue
+
+                item = inflight.pop(sequence)
+                self._record_estimate(item['kind'], elapsed)
+                self._handle(item['kind'], item['plan'], outcome, elapsed, completions)
+
+        self._attach(tree.root, root_plan)
+        if self.orchestrator.deduplicate_subtasks:
+            tree.deduplicate_leaves()
+        if root_plan['error'] is not None:
+            return f"Error: {root_plan['error']}"
+        return root_plan['result']
+
+    @staticmethod
+    def _new_plan(task_description: str, parent: Optional[Dict[str, Any]], depth: int) -> Dict[str, Any]:
+        """Create the bookkeeping entry for one node of the dataflow."""
+        return {
+            'task': task_description,
+            'parent': parent,
+            'depth': depth,
+            'sub_tasks': None,
+            'children': [],
+            'remaining': 0,
+            'rejected': False,
+            'followers': [],
+            'result': None,
+            'error': None,
+            'metadata': {}
+        }
+
+    def _priority(self, kind: str, plan: Dict[str, Any]) -> float:
+        """
+        Estimate the remaining critical path through a piece of work.
+
+        Every node's result still has to be synthesized into each ancestor,
+        and an unexpanded node has at least an expansion and a solve below it.
+        """
+        chain_above = plan['depth'] * self.estimates['synthesize']
+        if kind == 'expand':
+            return self.estimates['expand'] + self.estimates['solve'] + chain_above
+        if kind == 'solve':
+            return self.estimates['solve'] + chain_above
+        return self.estimates['synthesize'] + chain_above
+
+    def _push(self, kind: str, plan: Dict[str, Any]):
+        """Queue ready work, highest critical-path estimate first."""
+        self._sequence += 1
+        heapq.heappush(self._ready, (-self._priority(kind, plan), self._sequence, kind, plan))
+
+    def _record_estimate(self, kind: str, elapsed: float):
+        """Blend an observed duration into the running estimate for its kind."""
+        self.estimates[kind] = 0.8 * self.estimates[kind] + 0.2 * elapsed
+
+    def _run_item(self, sequence: int, item: Dict[str, Any], completions: queue.Queue):
+        """Execute one piece of work on a worker thread and report back."""
+        start_time = time.perf_counter()
+        try:
+            outcome = self._call(item['kind'], item['plan'])
+        except Exception as e:
+            outcome = e
+        completions.put((sequence, outcome, time.perf_counter() - start_time))
+
+    def _call(self, kind: str, plan: Dict[str, Any]):
+        """Make the model call(s) for one piece of work."""
+        orchestrator = self.orchestrator
+        if kind == 'expand':
+            parent_task = plan['parent']['task'] if plan['parent'] else None
+            return orchestrator._expand_task(plan['task'], parent_task, plan['depth'], plan['metadata'])
+        if kind == 'solve':
+            return orchestrator.solver.solve(plan['task'])
+
+        sub_results = [
+            {
+                'task': child['task'],
+                'result': child['result'] if child['error'] is None else f"Error: {child['error']}"
+            }
+            for child in plan['children']
+        ]
+        return orchestrator.synthesizer.synthesize(plan['task'], sub_results)
+
+    def _handle(self, kind: str, plan: Dict[str, Any], outcome: Any, elapsed: float,
+                completions: queue.Queue):
+        """Apply a finished piece of work and release whatever it unblocks."""
+        if plan['rejected']:
+            # Belongs to a speculative subtree that has been rolled back
+            return
+
+        if kind == 'expand':
+            if isinstance(outcome, Exception):
+                self.logger.error(f"Error expanding '{plan['task']}': {outcome}")
+                outcome = (None, None)
+
+            sub_tasks, verification = outcome
+            if sub_tasks is None:
+                self._schedule_solve(plan)
+                return
+
+            plan['sub_tasks'] = sub_tasks
+            plan['children'] = [self._new_plan(sub_task, plan, plan['depth'] + 1) for sub_task in sub_tasks]
+            for index, child in enumerate(plan['children']):
+                child['metadata'].update(self.orchestrator._child_metadata(plan['metadata'], index))
+            plan['remaining'] = len(plan['children'])
+
+            if verification is not None:
+                # The parent can't be synthesized until its decomposition passes review
+                plan['remaining'] += 1
+                self._pending_verifications += 1
+                verification.add_done_callback(lambda future: completions.put((None, (plan, future), 0.0)))
+
+            for child in plan['children']:
+                self._push('expand', child)
+            return
+
+        if isinstance(outcome, Exception):
+            self.logger.error(f"Error during {kind} of '{plan['task']}': {outcome}")
+            plan['error'] = str(outcome)
+        else:
+            plan['result'] = outcome
+
+        plan['metadata']['solve_time_ms' if kind == 'solve' else 'synthesis_time_ms'] = elapsed * 1000
+        self._complete(plan)
+
+    def _schedule_solve(self, plan: Dict[str, Any]):
+        """Queue a leaf solve, or share the solve of an identical leaf."""
+        if not self.orchestrator.deduplicate_subtasks:
+            self._push('solve', plan)
+            return
+
+        canonical = self._solves.setdefault(exact_task_key(plan['task']), plan)
+        if canonical is plan:
+            self._push('solve', plan)
+        elif canonical['result'] is not None or canonical['error'] is not None:
+            self._share_solve(canonical, plan)
+            self._complete(plan)
+        else:
+            canonical['followers'].append(plan)
+
+    @staticmethod
+    def _share_solve(canonical: Dict[str, Any], plan: Dict[str, Any]):
+        """Give a duplicate leaf the outcome of its canonical solve."""
+        plan['result'] = canonical['result']
+        plan['error'] = canonical['error']
+
+    def _release_followers(self, plan: Dict[str, Any]):
+        """Complete every duplicate leaf that was waiting on this solve."""
+        followers, plan['followers'] = plan['followers'], []
+        for follower in followers:
+            self._share_solve(plan, follower)
+            self._complete(follower)
+
+    def _verified(self, plan: Dict[str, Any], verification):
+        """Apply a deferred decomposition check, rolling back rejected subtrees."""
+        self._pending_verifications -= 1
+        if plan['rejected']:
+            return
+
+        if self.orchestrator._verification_passed(plan['task'], verification):
+            self._child_done(plan)
+            return
+
+        rejected = []
+        stack = list(plan['children'])
+        while stack:
+            child = stack.pop()
+            child['rejected'] = True
+            rejected.append(child)
+            stack.extend(child['children'])
+
+        # Duplicates that were waiting on a discarded solve need a new canonical leaf
+        orphans = []
+        for child in rejected:
+            key = exact_task_key(child['task'])
+            if self._solves.get(key) is child:
+                del self._solves[key]
+                orphans.extend(child['followers'])
+
+        plan['sub_tasks'] = None
+        plan['children'] = []
+        plan['remaining'] = 0
+        plan['metadata'].pop('child_leaf_verdicts', None)
+        plan['metadata']['speculation_rolled_back'] = True
+        self._schedule_solve(plan)
+        for orphan in orphans:
+            if not orphan['rejected']:
+                self._schedule_solve(orphan)
+
+    def _expire_solves(self, inflight: Dict[int, Dict[str, Any]], leaf_timeout: float):
+        """Fail any solve that has been running longer than the leaf timeout."""
+        now = time.perf_counter()
+        for sequence, item in list(inflight.items()):
+            if item['kind'] == 'solve' and now - item['started'] >= leaf_timeout:
+                del inflight[sequence]
+                plan = item['plan']
+                plan['error'] = f"Leaf execution timed out after {leaf_timeout}s"
+                plan['metadata']['solve_time_ms'] = leaf_timeout * 1000
+                plan['metadata']['timed_out'] = True
+                self._complete(plan)
+
+    def _complete(self, plan: Dict[str, Any]):
+        """Mark a node finished and schedule its parent once all siblings are done."""
+        if plan['rejected']:
+            return
+        self._release_followers(plan)
+        if plan['parent'] is not None:
+            self._child_done(plan['parent'])
+
+    def _child_done(self, plan: Dict[str, Any]):
+        """Count down a node's outstanding inputs and synthesize it once none are left."""
+        plan['remaining'] -= 1
+        if plan['remaining'] == 0:
+            self._push('synthesize', plan)
+
+    def _attach(self, node: TaskNode, plan: Dict[str, Any]):
+        """
+        Materialize a finished plan under a tree node, depth-first.
+
+        Args:
+            node: The tree node the plan describes
+            plan: The finished plan entry for that node
+        """
+        if plan['sub_tasks'] is None:
+            node.mark_as_leaf()
+        else:
+            for sub_task, child_plan in zip(plan['sub_tasks'], plan['children']):
+                child_node = self.orchestrator.tree.add_node(sub_task, node.node_id)
+                self._attach(child_node, child_plan)
+
+        node.metadata.update(plan['metadata'])
+        if plan['error'] is not None:
+            node.set_error(plan['error'])
+        else:
+            node.set_result(plan['result'])
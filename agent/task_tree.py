@@ -16,6 +16,23 @@ from typing import List, Dict, Optional, Any
 from enum import Enum
 
 
+def exact_task_key(task_description: str) -> str:
+    """
+    Reduce a task description to a key that only identical tasks share.
+
+    Only surrounding and repeated whitespace is ignored, so case, filler
+    words and punctuation all count: "Reverse AbC" and "Reverse abc" ask
+    for different answers.
+
+    Args:
+        task_description: Natural language description of the task
+
+    Returns:
+        The key
+    """
+    return ' '.join(task_description.split())
+
+
 class TaskStatus(Enum):
     """Status of a task node in the tree."""
     PENDING = "pending"           # Not yet processed
@@ -116,10 +133,38 @@ class TaskDecompositionTree:
         self.root = TaskNode(root_task, node_id="root")
         self.nodes: Dict[str, TaskNode] = {"root": self.root}
         self._node_counter = 0
+        self.duplicates: Dict[str, str] = {}  # duplicate leaf ID -> canonical leaf ID
         self.logger = logging.getLogger(__name__)
 
         self.logger.info(f"Task Decomposition Tree initialized with root task: {root_task}")
 
+    @classmethod
+    def from_plan(cls, plan: Dict[str, Any]) -> 'TaskDecompositionTree':
+        """
+        Build an already-verified tree from a nested plan.
+
+        Nodes are added depth-first in the plan's child order, so they get the
+        same IDs as a serial build of the same decomposition.
+
+        Args:
+            plan: Nested dict with 'task', 'is_leaf' and 'children' entries
+
+        Returns:
+            The tree, ready for leaf execution
+        """
+        tree = cls(plan['task'])
+
+        def attach(node: TaskNode, node_plan: Dict[str, Any]):
+            if node_plan['is_leaf'] or not node_plan['children']:
+                node.mark_as_leaf()
+                return
+            for child_plan in node_plan['children']:
+                attach(tree.add_node(child_plan['task'], node.node_id), child_plan)
+            node.status = TaskStatus.VERIFIED
+
+        attach(tree.root, plan)
+        return tree
+
     def generate_node_id(self) -> str:
         """Generate a unique node ID."""
         self._node_counter += 1
@@ -152,6 +197,37 @@ class TaskDecompositionTree:
         self.logger.debug(f"Added node {node_id} as child of {parent_id}: {task_description}")
         return node
 
+    def remove_children(self, node_id: str) -> int:
+        """
+        Remove every descendant of a node from the tree.
+
+        If the removed nodes were the most recently added ones, the ID counter
+        is rewound so that later nodes get the same IDs they would have had if
+        the removed nodes had never been added.
+
+        Args:
+            node_id: ID of the node whose subtree should be pruned
+
+        Returns:
+            Number of nodes removed
+        """
+        node = self.nodes[node_id]
+        removed = []
+        stack = list(node.children)
+        while stack:
+            child = stack.pop()
+            removed.append(child.node_id)
+            stack.extend(child.children)
+            del self.nodes[child.node_id]
+        node.children = []
+
+        numbers = {int(removed_id.split('_')[1]) for removed_id in removed}
+        if numbers == set(range(self._node_counter - len(numbers) + 1, self._node_counter + 1)):
+            self._node_counter -= len(numbers)
+
+        self.logger.debug(f"Removed {len(removed)} descendants of {node_id}")
+        return len(removed)
+
     def get_node(self, node_id: str) -> Optional[TaskNode]:
         """Get a node by its ID."""
         return self.nodes.get(node_id)
@@ -160,6 +236,44 @@ class TaskDecompositionTree:
         """Get all leaf nodes in the tree."""
         return [node for node in self.nodes.values() if node.is_leaf]
 
+    def deduplicate_leaves(self) -> int:
+        """
+        Map identical leaf tasks onto one canonical leaf each.
+
+        Leaves are compared by their exact_task_key(); the first leaf in
+        node-ID order becomes canonical and later ones record it in
+        `metadata['canonical_node']`. Only canonical leaves need to be solved,
+        after which propagate_canonical_results() fills in the duplicates.
+
+        Returns:
+            Number of duplicate leaves (solver calls saved)
+        """
+        self.duplicates = {}
+        canonical_by_key: Dict[str, TaskNode] = {}
+        for leaf in self.get_leaf_nodes():
+            leaf.metadata.pop('canonical_node', None)
+            canonical = canonical_by_key.setdefault(exact_task_key(leaf.task_description), leaf)
+            if canonical is not leaf:
+                self.duplicates[leaf.node_id] = canonical.node_id
+                leaf.metadata['canonical_node'] = canonical.node_id
+
+        if self.duplicates:
+            self.logger.info(f"Found {len(self.duplicates)} duplicate leaf tasks")
+        return len(self.duplicates)
+
+    def get_canonical_leaves(self) -> List[TaskNode]:
+        """Get the leaf nodes that are not duplicates of an earlier leaf."""
+        return [node for node in self.get_leaf_nodes() if node.node_id not in self.duplicates]
+
+    def propagate_canonical_results(self):
+        """Copy each canonical leaf's result (or error) to its duplicates."""
+        for duplicate_id, canonical_id in self.duplicates.items():
+            duplicate, canonical = self.nodes[duplicate_id], self.nodes[canonical_id]
+            if canonical.error is not None:
+                duplicate.set_error(canonical.error)
+            elif canonical.result is not None:
+                duplicate.set_result(canonical.result)
+
     def get_pending_nodes(self) -> List[TaskNode]:
         """Get all nodes that are pending (not yet decomposed or executed)."""
         return [node for node in self.nodes.values()
@@ -204,7 +318,8 @@ class TaskDecompositionTree:
             'nodes': {node_id: node.to_dict() for node_id, node in self.nodes.items()},
             'depth': self.get_tree_depth(),
             'total_nodes': len(self.nodes),
-            'leaf_nodes': len(self.get_leaf_nodes())
+            'leaf_nodes': len(self.get_leaf_nodes()),
+            'duplicate_leaves': len(self.duplicates)
         }
 
     def __repr__(self):
@@ -76,18 +76,24 @@ def select_agent_interactive():
     print("1. Tree-of-Thought Agent")
     print("2. Standard Agent")
     print("3. Task Decomposition Tree Agent")
+    print("4. Auto (choose an agent per prompt)")
+    print("5. Race (Nova Lite and Tree-of-Thought at once, first acceptable answer)")
     print("-" * 30)
 
     while True:
-        choice = input("Enter your choice (1-3): ").strip()
+        choice = input("Enter your choice (1-5): ").strip()
         if choice == '1':
             return 'tree-of-thought-agent'
         elif choice == '2':
             return 'standard-agent'
         elif choice == '3':
             return 'task-decomposition-tree'
+        elif choice == '4':
+            return 'auto'
+        elif choice == '5':
+            return 'race'
         else:
-            print("Invalid choice. Please enter 1, 2, or 3.")
+            print("Invalid choice. Please enter 1, 2, 3, 4, or 5.")
 
 def main():
     # 0. Parse Command-Line Arguments
@@ -100,6 +106,9 @@ Examples:
   python chat.py --agent=tree-of-thought-agent      # Use Tree-of-Thought Agent
   python chat.py --agent=standard-agent             # Use Standard Agent
   python chat.py --agent=task-decomposition-tree    # Use Task Decomposition Tree Agent
+  python chat.py --agent=standard-agent --cascade   # Nova Lite first, escalate only when needed
+  python chat.py --agent=auto                       # Pick the cheapest adequate agent per prompt
+  python chat.py --agent=race                       # Race a cheap and a strong agent, take the first good answer
   python chat.py --append-please                    # Append "please" to every prompt
   python chat.py --append-threat                    # Append "or I will terminate you" to every prompt
   python chat.py --ask-question-twice               # Repeat prompt twice for LLM clarity
@@ -110,8 +119,18 @@ Examples:
     parser.add_argument(
         '--agent',
         type=str,
-        choices=['tree-of-thought-agent', 'standard-agent', 'task-decomposition-tree'],
-        help="Select which agent to use: tree-of-thought-agent, standard-agent, or task-decomposition-tree"
+        choices=['tree-of-thought-agent', 'standard-agent', 'task-decomposition-tree', 'auto', 'race'],
+        help="Select which agent to use: tree-of-thought-agent, standard-agent, task-decomposition-tree, auto, or race"
+    )
+    parser.add_argument(
+        '--cascade',
+        action='store_true',
+        help="Standard Agent (also within auto): answer with Nova Lite and escalate to Haiku, then Sonnet, when the answer fails a check"
+    )
+    parser.add_argument(
+        '--response-cache',
+        action='store_true',
+        help="Answer repeated prompts from the response cache (ignored when the agent keeps conversation history)"
     )
     parser.add_argument(
         '--append-please',
@@ -171,7 +190,13 @@ Examples:
         logger.info(f"Agent selected interactively: {agent_type}")
 
     # 3. Initialize Agent (Agent-Logic Team)
-    agent = AgentController(config, agent_type=agent_type)
+    agent_options = None
+    if args.cascade and agent_type == 'standard-agent':
+        agent_options = {'cascade': True}
+    elif args.cascade and agent_type == 'auto':
+        agent_options = {'pipeline_options': {'standard-agent': {'cascade': True}}}
+    agent = AgentController(config, agent_type=agent_type, use_response_cache=args.response_cache,
+                            agent_options=agent_options)
     logger.info(f"AgentController initialized with {agent_type}. Ready for conversation.")
 
     # 4. Start Interactive Chat Loop
@@ -24,40 +24,7 @@ if env_path.exists():
     load_dotenv(env_path)
 
 from agent.controller import AgentController
-
-
-# Simple model pricing (USD per 1K tokens)
-# These are approximate - adjust based on actual pricing
-MODEL_PRICING = {
-    'anthropic.claude-3-5-sonnet-20240620-v1:0': {'input': 0.003, 'output': 0.015},
-    'anthropic.claude-3-haiku-20240307-v1:0': {'input': 0.00025, 'output': 0.00125},
-    'us.amazon.nova-lite-v1:0': {'input': 0.00006, 'output': 0.00024},
-}
-
-
-def estimate_tokens(text):
-    """
-    Rough token estimation (1 token ≈ 4 characters).
-    This is a simplification - real token count varies by model.
-    """
-    return len(text) // 4
-
-
-def estimate_cost(prompt, response, model):
-    """
-    Estimate the cost of an LLM call.
-    """
-    if model not in MODEL_PRICING:
-        return 0.0
-
-    pricing = MODEL_PRICING[model]
-    input_tokens = estimate_tokens(prompt)
-    output_tokens = estimate_tokens(response)
-
-    input_cost = (input_tokens / 1000) * pricing['input']
-    output_cost = (output_tokens / 1000) * pricing['output']
-
-    return input_cost + output_cost
+from optimise.costs import MODEL_PRICING, estimate_tokens, estimate_cost, estimate_pipeline_cost
 
 
 def get_agent_response(prompt, agent_type='task-decomposition-tree'):
@@ -76,7 +43,9 @@ def get_agent_response(prompt, agent_type='task-decomposition-tree'):
 
     try:
         # Initialize the agent
-        agent = AgentController(config=None, agent_type=agent_type)
+        # Answers are only reused when a shared response cache is configured
+        agent = AgentController(config=None, agent_type=agent_type,
+                                use_response_cache=bool(os.environ.get("RESPONSE_CACHE_PATH")))
 
         # Get the response
         response = agent.run_step(prompt)
@@ -84,23 +53,8 @@ def get_agent_response(prompt, agent_type='task-decomposition-tree'):
         end_time = time.time()
         processing_time = end_time - start_time
 
-        # Estimate cost based on agent type
-        # For task-decomposition-tree: uses Haiku + Nova Lite
-        # For tree-of-thought-agent: uses Sonnet
-        # For standard-agent: uses dynamic selection
-        estimated_cost = 0.0
-
-        if agent_type == 'task-decomposition-tree':
-            # Rough estimate: multiple Haiku calls + Nova Lite calls
-            # Assume average of 8 Haiku calls and 5 Nova Lite calls per prompt
-            estimated_cost += estimate_cost(prompt, response, 'anthropic.claude-3-haiku-20240307-v1:0') * 8
-            estimated_cost += estimate_cost(prompt, response, 'us.amazon.nova-lite-v1:0') * 5
-        elif agent_type == 'tree-of-thought-agent':
-            # Single Sonnet call
-            estimated_cost = estimate_cost(prompt, response, 'anthropic.claude-3-5-sonnet-20240620-v1:0')
-        elif agent_type == 'standard-agent':
-            # Dynamic - assume average uses Haiku
-            estimated_cost = estimate_cost(prompt, response, 'anthropic.claude-3-haiku-20240307-v1:0')
+        # Estimate cost from the agent type's typical calls (see optimise.costs.PIPELINE_CALLS)
+        estimated_cost = estimate_pipeline_cost(agent_type, prompt, str(response))
 
         metrics = {
             "cost": estimated_cost,
@@ -1,21 +1,511 @@
+import argparse
+import json
 import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
-# A simple in-memory cache. In a real app, this could be Redis.
-_cache = {}
+# Sentinel so cached falsy values ("" or 0) are not mistaken for misses
+_MISSING = object()
+
+
+def make_cache_key(agent_type: str, prompt: str) -> str:
+    """
+    Builds a cache key from the agent type and a normalized prompt.
+
+    Unicode forms and runs of whitespace are normalized. Case is kept, because
+    prompts like "Reverse this string: 'AbC'" depend on it.
+    """
+    normalized = " ".join(unicodedata.normalize("NFKC", prompt).split())
+    return f"{agent_type}\x1f{normalized}"
+
+
+def _entry_size(key: str, value) -> int:
+    """Approximate memory held by one entry, in bytes."""
+    value_size = len(value.encode("utf-8")) if isinstance(value, str) else sys.getsizeof(value)
+    return len(key.encode("utf-8")) + value_size
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory cache bounded by entry count and total size.
+
+    The least recently used entries are evicted once either `max_entries`
+    or `max_bytes` would be exceeded. Each entry expires `ttl` seconds after
+    it was set (per-entry override, else `default_ttl`; None = never).
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024,
+                 default_ttl: Optional[float] = 3600):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        """Returns the cached value for `key`, or `default` on a miss or expiry."""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[1] is not None and time.monotonic() >= entry[1]:
+                self._remove(key)
+                self.expirations += 1
+                entry = _MISSING
+
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value, ttl: Optional[float] = _MISSING):
+        """
+        Stores a value, evicting least recently used entries to make room.
+
+        Values larger than `max_bytes` on their own are not cached.
+        """
+        ttl = self.default_ttl if ttl is _MISSING else ttl
+        size = _entry_size(key, value)
+        if size > self.max_bytes:
+            logger.debug(f"Value for key {key!r} is {size} bytes, too large to cache")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            expires_at = time.monotonic() + ttl if ttl is not None else None
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        """Removes a key if present."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """Removes every entry; statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Returns size and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        """Drops an entry and its size. Caller holds the lock."""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+class SQLiteCache:
+    """
+    Disk-backed cache that several processes can share through one SQLite file.
+
+    Same interface as LRUCache. The database runs in WAL mode, so readers
+    never block and writers queue up behind `busy_timeout`. Values are
+    stored as JSON, so strings, verdicts (bools) and decompositions (lists)
+    all round-trip. Limits are enforced on every write, evicting the least
+    recently used rows; compact() additionally purges expired rows and
+    reclaims file space. Reads don't write: access times are batched and
+    saved with the next write, or once `access_batch` keys are pending.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, max_bytes: int = 256 * 1024 * 1024,
+                 default_ttl: Optional[float] = None, busy_timeout: float = 5.0, access_batch: int = 64):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.access_batch = max(1, access_batch)
+        self._accessed = {}  # key -> last hit time not yet written
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit mode; multi-statement writes open their own transactions
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None,
+                                     check_same_thread=False)
+        self._initialize(busy_timeout)
+
+    def _initialize(self, busy_timeout: float):
+        """Creates the schema, retrying while another process is doing the same."""
+        deadline = time.monotonic() + busy_timeout
+        while True:
+            try:
+                # Switching to WAL doesn't wait on the busy handler, hence the retry loop
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._create_schema()
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+
+    def _create_schema(self):
+        """
+        Creates the cache table and its one-row totals table. Caller holds a transaction.
+
+        Triggers keep the row count and total size in `cache_totals` current
+        for every process, so limits are checked without scanning the table.
+        """
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache(last_access)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_totals ("
+            " id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS cache_totals_insert AFTER INSERT ON cache BEGIN"
+            " UPDATE cache_totals SET entries = entries + 1, bytes = bytes + NEW.size; END"
+        )
+        self._conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS cache_totals_delete AFTER DELETE ON cache BEGIN"
+            " UPDATE cache_totals SET entries = entries - 1, bytes = bytes - OLD.size; END"
+        )
+        self._conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS cache_totals_update AFTER UPDATE OF size ON cache BEGIN"
+            " UPDATE cache_totals SET bytes = bytes + NEW.size - OLD.size; END"
+        )
+        # Caches created before the totals table existed are counted once
+        self._conn.execute(
+            "INSERT OR IGNORE INTO cache_totals SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+        )
+
+    def get(self, key: str, default=None):
+        """Returns the cached value for `key`, or `default` on a miss or expiry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] is not None and now >= row[1]:
+                try:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                except sqlite3.OperationalError as e:
+                    # Expired rows are also purged by eviction and compact()
+                    logger.debug(f"Left expired key {key!r} in place: {e}")
+                self.expirations += 1
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return default
+
+            self._accessed[key] = now
+            if len(self._accessed) >= self.access_batch:
+                self._flush_access_times()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value, ttl: Optional[float] = _MISSING):
+        """Stores a JSON-serializable value, evicting least recently used rows to make room."""
+        ttl = self.default_ttl if ttl is _MISSING else ttl
+        encoded = json.dumps(value)
+        size = _entry_size(key, encoded)
+        if size > self.max_bytes:
+            logger.debug(f"Value for key {key!r} is {size} bytes, too large to cache")
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._write_access_times()
+                # An upsert rather than INSERT OR REPLACE, whose implicit delete skips triggers
+                self._conn.execute(
+                    "INSERT INTO cache (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size,"
+                    " expires_at = excluded.expires_at, last_access = excluded.last_access",
+                    (key, encoded, size, now + ttl if ttl is not None else None, now)
+                )
+                self.evictions += self._evict(self.max_entries, self.max_bytes)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, key: str):
+        """Removes a key if present."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        """Removes every entry; statistics are kept."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def compact(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> dict:
+        """
+        Purges expired rows, evicts down to the given (or configured) limits and
+        reclaims file space.
+
+        Returns:
+            Counts of expired and evicted rows
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._write_access_times()
+                expired = self._conn.execute(
+                    "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+                ).rowcount
+                evicted = self._evict(max_entries or self.max_entries, max_bytes or self.max_bytes)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+
+        self.expirations += expired
+        self.evictions += evicted
+        logger.info(f"Compacted cache {self.path}: {expired} expired, {evicted} evicted")
+        return {"expired": expired, "evicted": evicted}
+
+    def snapshot(self, snapshot_path: str):
+        """Writes a consistent copy of the cache to `snapshot_path` (safe while others write)."""
+        with self._lock:
+            target = sqlite3.connect(snapshot_path)
+            try:
+                self._conn.backup(target)
+            finally:
+                target.close()
+        logger.info(f"Saved cache snapshot to {snapshot_path}")
+
+    def warm_start(self, snapshot_path: str) -> int:
+        """
+        Loads entries from a snapshot that aren't already cached.
+
+        Returns:
+            Number of entries loaded
+        """
+        if not os.path.exists(snapshot_path):
+            logger.warning(f"Cache snapshot {snapshot_path} not found, starting cold")
+            return 0
+
+        with self._lock:
+            self._conn.execute("ATTACH DATABASE ? AS snapshot", (snapshot_path,))
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                loaded = self._conn.execute(
+                    "INSERT OR IGNORE INTO cache SELECT * FROM snapshot.cache"
+                    " WHERE expires_at IS NULL OR expires_at > ?", (time.time(),)
+                ).rowcount
+                self.evictions += self._evict(self.max_entries, self.max_bytes)
+                self._conn.execute("COMMIT")
+            finally:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                self._conn.execute("DETACH DATABASE snapshot")
+
+        logger.info(f"Warm-started cache with {loaded} entries from {snapshot_path}")
+        return loaded
+
+    def stats(self) -> dict:
+        """Returns size and this process's hit/miss/eviction counters."""
+        with self._lock:
+            entries, total_bytes = self._totals()
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+    def close(self):
+        """Saves pending access times and closes the database connection."""
+        with self._lock:
+            self._flush_access_times()
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._totals()[0]
+
+    def _totals(self):
+        """Returns (rows, total size in bytes) from the totals table. Caller holds the lock."""
+        return self._conn.execute("SELECT entries, bytes FROM cache_totals").fetchone()
+
+    def _write_access_times(self):
+        """Saves pending access times, never moving one back. Caller holds the lock and a transaction."""
+        if self._accessed:
+            self._conn.executemany("UPDATE cache SET last_access = ? WHERE key = ? AND last_access < ?",
+                                   [(accessed, key, accessed) for key, accessed in self._accessed.items()])
+            self._accessed.clear()
+
+    def _flush_access_times(self):
+        """
+        Saves pending access times in their own transaction. Best-effort: they
+        only order eviction, so they are dropped if the database stays busy.
+        Caller holds the lock.
+        """
+        if not self._accessed:
+            return
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._write_access_times()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Dropped {len(self._accessed)} cache access times: {e}")
+            self._accessed.clear()
+
+    def _evict(self, max_entries: int, max_bytes: int) -> int:
+        """Deletes least recently used rows until both limits hold. Caller holds the lock and a transaction."""
+        evicted = 0
+        entries, total_bytes = self._totals()
+        while entries > max_entries or total_bytes > max_bytes:
+            # Rows over the entry limit, or the average number of rows holding the excess bytes
+            excess_bytes = total_bytes - max_bytes
+            count = max(entries - max_entries, -(-excess_bytes * entries // total_bytes) if excess_bytes > 0 else 0, 1)
+            deleted = self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_access LIMIT ?)", (count,)
+            ).rowcount
+            if deleted <= 0:
+                break
+            evicted += deleted
+            entries, total_bytes = self._totals()
+        return evicted
+
+
+def create_cache():
+    """
+    Builds the process-wide response cache.
+
+    Set RESPONSE_CACHE_PATH to share one SQLite cache between processes
+    (chat sessions, benchmark subprocesses, workers); otherwise an in-memory
+    LRUCache is used. RESPONSE_CACHE_SNAPSHOT optionally names a snapshot to
+    warm-start from.
+    """
+    path = os.environ.get("RESPONSE_CACHE_PATH")
+    if not path:
+        return LRUCache()
+
+    try:
+        cache = SQLiteCache(path)
+        snapshot_path = os.environ.get("RESPONSE_CACHE_SNAPSHOT")
+        if snapshot_path:
+            cache.warm_start(snapshot_path)
+        logger.info(f"Using shared response cache at {path}")
+        return cache
+    except Exception as e:
+        logger.error(f"Failed to open shared cache {path}: {e}. Falling back to in-memory cache.")
+        return LRUCache()
+
+
+# Process-wide cache used by the module-level helpers
+response_cache = create_cache()
+
 
 def get_cached_response(key: str):
-    """Checks the cache for a given key (e.g., the user input)."""
-    result = _cache.get(key)
-    if result:
+    """Checks the cache for a given key (e.g. from make_cache_key()). Returns None on a miss or error."""
+    try:
+        result = response_cache.get(key, _MISSING)
+    except Exception as e:
+        # A shared cache can be locked or unreadable; the agent answers instead
+        logger.warning(f"Cache lookup failed, treating as a miss: {e}")
+        return None
+    if result is not _MISSING:
         logger.debug(f"Cache hit for key: {key}")
         return result
-    
+
     logger.debug(f"Cache miss for key: {key}")
     return None
 
-def set_cached_response(key: str, value: str):
-    """Saves a response to the cache."""
-    _cache[key] = value
+
+def set_cached_response(key: str, value: str, ttl: Optional[float] = _MISSING):
+    """Saves a response to the cache. Failures are logged and the response is simply not cached."""
+    try:
+        response_cache.set(key, value, ttl)
+    except Exception as e:
+        logger.warning(f"Failed to cache response: {e}")
+        return
     logger.debug(f"Cache set for key: {key}")
+
+
+def main():
+    """Maintenance commands for a shared SQLite cache."""
+    parser = argparse.ArgumentParser(description="Manage a shared SQLite response cache")
+    parser.add_argument("path", help="Path to the cache database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compact_parser = subparsers.add_parser("compact", help="Purge expired rows, evict to limits and vacuum")
+    compact_parser.add_argument("--max-entries", type=int, default=None)
+    compact_parser.add_argument("--max-bytes", type=int, default=None)
+    snapshot_parser = subparsers.add_parser("snapshot", help="Copy the cache to a snapshot file")
+    snapshot_parser.add_argument("snapshot_path")
+    warm_parser = subparsers.add_parser("warm-start", help="Load entries from a snapshot file")
+    warm_parser.add_argument("snapshot_path")
+    subparsers.add_parser("stats", help="Show entry count and size")
+
+    args = parser.parse_args()
+    cache = SQLiteCache(args.path)
+    try:
+        if args.command == "compact":
+            print(cache.compact(args.max_entries, args.max_bytes))
+        elif args.command == "snapshot":
+            cache.snapshot(args.snapshot_path)
+        elif args.command == "warm-start":
+            print({"loaded": cache.warm_start(args.snapshot_path)})
+        print(cache.stats())
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
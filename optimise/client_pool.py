@@ -0,0 +1,128 @@
+import logging
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 8
+
+
+class ClientPool:
+    """
+    Thread-safe pool of warm model clients (Strands Agents), keyed by model.
+
+    A client is checked out for the duration of one call, so two concurrent
+    requests never drive the same stateful Agent. Returned clients keep their
+    model client and its keep-alive connections, so the next checkout skips
+    client setup and the TLS handshake. Up to `max_size` idle clients are kept
+    per key; clients returned beyond that are dropped. Checkout never blocks:
+    when no idle client is available a new one is created.
+
+    Keys are arbitrary hashables, typically (model ID, generation profile).
+    """
+
+    def __init__(self, max_size: int = DEFAULT_POOL_SIZE, sizes: Optional[dict] = None):
+        """
+        Args:
+            max_size: Idle clients kept per key
+            sizes: Per-key overrides of max_size
+        """
+        self.max_size = max(0, max_size)
+        self.sizes = dict(sizes or {})
+        self.created = 0
+        self.reused = 0
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def checkout(self, key, create):
+        """
+        Borrows a client for one call and returns it to the pool afterwards.
+
+        The client's conversation is cleared on the way out and on the way
+        back, so each checkout starts from an empty history.
+
+        Args:
+            key: Pool key, e.g. (model ID, generation profile)
+            create: Zero-argument callable that builds a new client for the key
+        """
+        client = self._acquire(key, create)
+        _reset(client)
+        try:
+            yield client
+        finally:
+            self._release(key, client)
+
+    def warm(self, key, create, count: int = 1):
+        """Tops a key up to `count` idle clients, so the first calls don't pay client setup."""
+        with self._lock:
+            missing = min(count, self._size(key)) - len(self._idle[key])
+        clients = [create() for _ in range(max(0, missing))]
+        with self._lock:
+            self.created += len(clients)
+        for client in clients:
+            self._release(key, client)
+
+    def clear(self):
+        """Drops every idle client."""
+        with self._lock:
+            self._idle.clear()
+
+    def stats(self) -> dict:
+        """Returns client creation and reuse counts, and idle clients per key."""
+        with self._lock:
+            return {
+                "created": self.created,
+                "reused": self.reused,
+                "idle": {str(key): len(clients) for key, clients in self._idle.items() if clients}
+            }
+
+    def _acquire(self, key, create):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                # Most recently returned first: its connection is the likeliest to still be open
+                return idle.pop()
+            self.created += 1
+        logger.debug(f"Creating pooled client for {key}")
+        return create()
+
+    def _release(self, key, client):
+        _reset(client)
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self._size(key):
+                idle.append(client)
+
+    def _size(self, key) -> int:
+        return self.sizes.get(key, self.max_size)
+
+
+def _reset(client):
+    """Clears an Agent's conversation so it can serve an unrelated call."""
+    if hasattr(client, "messages"):
+        client.messages = []
+
+
+def create_pool():
+    """
+    Builds the process-wide client pool.
+
+    MODEL_POOL_SIZE sets how many idle clients are kept per model and profile.
+    """
+    size = os.environ.get("MODEL_POOL_SIZE")
+    if not size:
+        return ClientPool()
+    try:
+        return ClientPool(max_size=int(size))
+    except ValueError:
+        logger.error(f"Invalid MODEL_POOL_SIZE '{size}'. Using {DEFAULT_POOL_SIZE}.")
+        return ClientPool()
+
+
+# Shared by the controller agents and the task tree sub-agents
+client_pool = create_pool()
@@ -0,0 +1,65 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Simple model pricing (USD per 1K tokens)
+# These are approximate - adjust based on actual pricing
+MODEL_PRICING = {
+    'anthropic.claude-3-5-sonnet-20240620-v1:0': {'input': 0.003, 'output': 0.015},
+    'anthropic.claude-3-haiku-20240307-v1:0': {'input': 0.00025, 'output': 0.00125},
+    'us.amazon.nova-lite-v1:0': {'input': 0.00006, 'output': 0.00024},
+}
+
+
+def estimate_tokens(text):
+    """
+    Rough token estimation (1 token ≈ 4 characters).
+    This is a simplification - real token count varies by model.
+    """
+    return len(text) // 4
+
+
+def estimate_cost(prompt, response, model):
+    """
+    Estimate the cost of an LLM call.
+    """
+    if model not in MODEL_PRICING:
+        logger.debug(f"No pricing for model {model}; counting cost as 0")
+        return 0.0
+
+    pricing = MODEL_PRICING[model]
+    input_tokens = estimate_tokens(prompt)
+    output_tokens = estimate_tokens(response)
+
+    input_cost = (input_tokens / 1000) * pricing['input']
+    output_cost = (output_tokens / 1000) * pricing['output']
+
+    return input_cost + output_cost
+
+
+# Typical LLM calls per prompt for each agent pipeline: {model: calls}
+PIPELINE_CALLS = {
+    # Single Sonnet call
+    'tree-of-thought-agent': {'anthropic.claude-3-5-sonnet-20240620-v1:0': 1},
+    # Dynamic selection - assume average uses Haiku
+    'standard-agent': {'anthropic.claude-3-haiku-20240307-v1:0': 1},
+    # Multiple Haiku calls + Nova Lite calls: about 8 and 5 per prompt
+    'task-decomposition-tree': {
+        'anthropic.claude-3-haiku-20240307-v1:0': 8,
+        'us.amazon.nova-lite-v1:0': 5,
+    },
+}
+
+
+def estimate_pipeline_cost(agent_type, prompt, response):
+    """
+    Estimate the cost of answering a prompt with an agent pipeline.
+
+    Each of the pipeline's typical calls is priced as if it sent the prompt
+    and returned the response.
+    """
+    calls = PIPELINE_CALLS.get(agent_type)
+    if calls is None:
+        logger.debug(f"No call profile for agent type {agent_type}; counting cost as 0")
+        return 0.0
+    return sum(estimate_cost(prompt, response, model) * count for model, count in calls.items())
@@ -0,0 +1,266 @@
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+from typing import Optional
+
+from optimise.semantic_cache import embed_text
+from utils.helpers import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Kept next to this module rather than in the working directory; DIFFICULTY_MODEL_PATH
+# and DIFFICULTY_LOG_PATH move them
+DEFAULT_MODEL_PATH = os.environ.get("DIFFICULTY_MODEL_PATH") or os.path.join(_PACKAGE_DIR, "difficulty_model.json")
+DEFAULT_LOG_PATH = os.environ.get("DIFFICULTY_LOG_PATH") or os.path.join(_PACKAGE_DIR, "difficulty_log.jsonl")
+BENCHMARK_PROMPTS_PATH = os.path.join(_PACKAGE_DIR, "..", "evaluation", "benchmark_prompts.json")
+
+LABELS = ("low", "medium", "high")
+# Benchmark levels and the difficulty they are trained as
+LEVEL_LABELS = {"L1": "low", "L2": "medium", "L3": "high"}
+
+TEXT_DIMENSIONS = 512
+# Prompt shape: length, how many literals, structured data, multi-step wording
+SHAPE_FEATURES = 4
+FEATURE_DIMENSIONS = TEXT_DIMENSIONS + SHAPE_FEATURES
+# Bumped whenever prompt_features() changes, so models trained on the old features are retrained
+FEATURE_VERSION = 2
+
+_STEP_WORDS = re.compile(r"\b(then|after|first|finally|each|every|all|both)\b", re.IGNORECASE)
+
+# Leaf tasks that small models get wrong: code, logic puzzles, non-trivial maths
+_HARD_LEAF = re.compile(
+    r"\b(code|function|program|script|implement\w*|algorithm|python|javascript|sql|regex|"
+    r"recursi\w+|debug\w*|puzzle|riddle|logic\w*|deduce|prove|proof|constraints?|"
+    r"knights?|knaves?|liars?|probability|derivative|integral|equations?|permutations?|combinations?)\b",
+    re.IGNORECASE
+)
+# Leaf tasks that need some reasoning or writing, but not the strongest model
+_MEDIUM_LEAF = re.compile(
+    r"\b(explain|analy[sz]e|compare|justify|summari[sz]e|evaluate|design|plan|restructure|infer)\b",
+    re.IGNORECASE
+)
+
+
+def prompt_features(prompt: str) -> dict:
+    """
+    Sparse feature vector of a prompt: {index: value}.
+
+    The wording is embedded as hashed word and character n-grams (the same
+    embedding the semantic cache uses); a few shape features are appended
+    after it.
+    """
+    features = {index: value for index, value in enumerate(embed_text(prompt, TEXT_DIMENSIONS)) if value}
+    words = len(prompt.split())
+    shape = [
+        min(words / 50.0, 3.0),
+        min(len(re.findall(r"\d+", prompt)) / 10.0, 3.0),
+        1.0 if re.search(r"[\[{]", prompt) else 0.0,
+        min(len(_STEP_WORDS.findall(prompt)) / 3.0, 3.0),
+    ]
+    for offset, value in enumerate(shape):
+        if value:
+            features[TEXT_DIMENSIONS + offset] = value
+    return features
+
+
+def leaf_difficulty(task: str) -> str:
+    """
+    Scores a decomposed leaf task as low, medium or high difficulty.
+
+    Leaves are short and phrased unlike whole prompts, so keyword and length
+    rules are used instead of the trained classifier. Most leaves score low.
+    """
+    if _HARD_LEAF.search(task):
+        return "high"
+    if _MEDIUM_LEAF.search(task) or len(task.split()) > 40:
+        return "medium"
+    return "low"
+
+
+class DifficultyClassifier:
+    """
+    CPU-only low/medium/high classifier: softmax regression over hashed n-grams.
+
+    Classifying a prompt takes well under a millisecond, so it can replace the
+    LLM round trip whenever it is confident. Trained with plain SGD; no
+    third-party dependencies.
+    """
+
+    def __init__(self, weights: Optional[dict] = None, bias: Optional[dict] = None):
+        self.weights = weights or {label: [0.0] * FEATURE_DIMENSIONS for label in LABELS}
+        self.bias = bias or {label: 0.0 for label in LABELS}
+        self._lock = threading.Lock()
+
+    def predict(self, prompt: str):
+        """
+        Classifies a prompt.
+
+        Returns:
+            (label, confidence): the most likely difficulty and its probability
+        """
+        probabilities = self._probabilities(prompt_features(prompt))
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    def train(self, examples: list, epochs: int = 40, learning_rate: float = 0.5,
+              l2: float = 1e-4, seed: int = 0):
+        """
+        Fits the model to (prompt, label) pairs, starting from the current weights.
+
+        Args:
+            examples: List of (prompt, label) with label in LABELS
+            epochs: Passes over the examples
+            learning_rate: Initial SGD step size, decayed per epoch
+            l2: Weight decay applied to the features of each example
+            seed: Shuffle seed, so retraining on the same data is reproducible
+        """
+        data = [(prompt_features(prompt), label) for prompt, label in examples if label in LABELS]
+        rng = random.Random(seed)
+        with self._lock:
+            for epoch in range(epochs):
+                rng.shuffle(data)
+                step = learning_rate / (1.0 + epoch * 0.1)
+                for features, target in data:
+                    probabilities = self._probabilities(features)
+                    for label in LABELS:
+                        error = probabilities[label] - (1.0 if label == target else 0.0)
+                        weights = self.weights[label]
+                        for index, value in features.items():
+                            weights[index] -= step * (error * value + l2 * weights[index])
+                        self.bias[label] -= step * error
+        logger.info(f"Trained difficulty classifier on {len(data)} prompts")
+
+    def save(self, path: str):
+        write_json_atomic(path, {"feature_version": FEATURE_VERSION, "weights": self.weights, "bias": self.bias})
+
+    @classmethod
+    def load(cls, path: str) -> "DifficultyClassifier":
+        with open(path, "r") as f:
+            data = json.load(f)
+        if (data.get("feature_version", 1) != FEATURE_VERSION
+                or any(len(data["weights"].get(label, [])) != FEATURE_DIMENSIONS for label in LABELS)):
+            raise ValueError("model was trained with a different feature layout")
+        return cls(data["weights"], data["bias"])
+
+    def _probabilities(self, features: dict) -> dict:
+        scores = {
+            label: self.bias[label] + sum(self.weights[label][index] * value for index, value in features.items())
+            for label in LABELS
+        }
+        top = max(scores.values())
+        exponentials = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exponentials.values())
+        return {label: value / total for label, value in exponentials.items()}
+
+
+def load_training_data(benchmark_path: str = BENCHMARK_PROMPTS_PATH,
+                       log_path: Optional[str] = DEFAULT_LOG_PATH) -> list:
+    """
+    Collects (prompt, label) pairs from the benchmark and from logged prompts.
+
+    Benchmark prompts are labelled by level (L1 low, L2 medium, L3 high).
+    Logged prompts carry the label the LLM classifier gave them.
+    """
+    examples = []
+    try:
+        with open(benchmark_path, "r") as f:
+            for task_name, prompts in json.load(f).items():
+                label = LEVEL_LABELS.get(task_name[:2])
+                if label:
+                    examples.extend((prompt, label) for prompt in prompts)
+    except Exception as e:
+        logger.error(f"Failed to read benchmark prompts {benchmark_path}: {e}")
+
+    if log_path and os.path.exists(log_path):
+        with open(log_path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    examples.append((entry["prompt"], entry["label"]))
+                except (ValueError, KeyError):
+                    continue
+    return examples
+
+
+def log_labelled_prompt(prompt: str, label: str, path: Optional[str] = DEFAULT_LOG_PATH):
+    """Appends a prompt and its LLM-assigned difficulty to the training log."""
+    if not path:
+        return
+    try:
+        with open(path, "a") as f:
+            f.write(json.dumps({"prompt": prompt, "label": label}) + "\n")
+    except Exception as e:
+        logger.error(f"Failed to log labelled prompt to {path}: {e}")
+
+
+def load_classifier(path: str = DEFAULT_MODEL_PATH, log_path: Optional[str] = DEFAULT_LOG_PATH):
+    """
+    Loads the trained classifier, training and saving one first if there is none.
+
+    Returns:
+        A DifficultyClassifier, or None if no training data could be found
+    """
+    if path and os.path.exists(path):
+        try:
+            return DifficultyClassifier.load(path)
+        except Exception as e:
+            logger.error(f"Failed to load difficulty model {path}: {e}. Retraining.")
+
+    examples = load_training_data(log_path=log_path)
+    if not examples:
+        return None
+    classifier = DifficultyClassifier()
+    classifier.train(examples)
+    if path:
+        try:
+            classifier.save(path)
+        except Exception as e:
+            logger.error(f"Failed to save difficulty model {path}: {e}")
+    return classifier
+
+
+def cross_validate(examples: list, folds: int = 5, seed: int = 0, **train_kwargs) -> float:
+    """Returns the k-fold accuracy of a freshly trained classifier on the examples."""
+    shuffled = list(examples)
+    random.Random(seed).shuffle(shuffled)
+    correct = 0
+    for fold in range(folds):
+        held_out = shuffled[fold::folds]
+        classifier = DifficultyClassifier()
+        classifier.train([example for index, example in enumerate(shuffled) if index % folds != fold], **train_kwargs)
+        correct += sum(1 for prompt, label in held_out if classifier.predict(prompt)[0] == label)
+    return correct / len(shuffled) if shuffled else 0.0
+
+
+def main():
+    """Retrains the local difficulty classifier from the benchmark and logged prompts."""
+    parser = argparse.ArgumentParser(description="Retrain the local prompt difficulty classifier")
+    parser.add_argument("--benchmark", default=BENCHMARK_PROMPTS_PATH, help="Benchmark prompts JSON")
+    parser.add_argument("--log", default=DEFAULT_LOG_PATH, help="JSONL log of LLM-labelled prompts")
+    parser.add_argument("--output", default=DEFAULT_MODEL_PATH, help="Where to write the model")
+    parser.add_argument("--epochs", type=int, default=40)
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds (0 to skip)")
+    args = parser.parse_args()
+
+    examples = load_training_data(args.benchmark, args.log)
+    if not examples:
+        parser.error("no training data found")
+
+    if args.folds > 1:
+        accuracy = cross_validate(examples, args.folds, epochs=args.epochs)
+        print(f"{args.folds}-fold accuracy: {accuracy:.1%} on {len(examples)} prompts")
+
+    classifier = DifficultyClassifier()
+    classifier.train(examples, epochs=args.epochs)
+    classifier.save(args.output)
+    print(f"Saved model to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import datetime
+from typing import Optional
 
-def fast_path_check(input_data: str) -> str | None:
+def fast_path_check(input_data: str) -> Optional[str]:
     """Checks for simple inputs about the agent itself that can be answered without an LLM.
     Returns a string response if a fast path is found, otherwise None.
     Kept fast paths: agent introduction, greetings, time-based responses.
@@ -0,0 +1,77 @@
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from strands.models import BedrockModel
+    BEDROCK_MODEL_AVAILABLE = True
+except ImportError:
+    BEDROCK_MODEL_AVAILABLE = False
+
+try:
+    from botocore.config import Config as BotocoreConfig
+    # Pooled clients are reused across calls, so keep their connections open
+    KEEPALIVE_CONFIG = BotocoreConfig(tcp_keepalive=True, max_pool_connections=32)
+except ImportError:
+    KEEPALIVE_CONFIG = None
+
+# Generation settings per role. A call that only needs one word is capped at a
+# few tokens and stopped at the first punctuation, so a model that starts to
+# explain itself is cut off instead of being paid (and waited) for.
+GENERATION_PROFILES = {
+    # YES/NO verdicts from the verifier
+    'verdict': {'max_tokens': 5, 'temperature': 0.0, 'stop_sequences': ['.', ',']},
+    # low/medium/high from the StandardAgent classifier
+    'classifier': {'max_tokens': 5, 'temperature': 0.0, 'stop_sequences': ['.', ',']},
+    # JSON array of YES/NO for a batch of siblings
+    'leaf_batch': {'max_tokens': 200, 'temperature': 0.0},
+    # JSON array of sub-tasks
+    'decomposer': {'max_tokens': 500, 'temperature': 0.2},
+    # Fused leaf check + decomposition JSON object
+    'expansion': {'max_tokens': 600, 'temperature': 0.2},
+    'solver': {'max_tokens': 1024, 'temperature': 0.3},
+    'synthesizer': {'max_tokens': 2048, 'temperature': 0.3},
+    # Rolling conversation summaries
+    'summary': {'max_tokens': 400, 'temperature': 0.2},
+}
+
+
+def create_model(model_id: str, profile: Optional[str] = None):
+    """
+    Builds the model argument for a Strands Agent with a role's generation limits.
+
+    Args:
+        model_id: Bedrock model ID
+        profile: Key into GENERATION_PROFILES, or None for the model defaults
+
+    Returns:
+        A BedrockModel with the profile's settings and keep-alive connections,
+        or the bare model ID when the Bedrock provider can't be imported
+    """
+    settings = GENERATION_PROFILES.get(profile) if profile else None
+    if profile and settings is None:
+        logger.warning(f"Unknown generation profile '{profile}'; using model defaults")
+    if not BEDROCK_MODEL_AVAILABLE:
+        return model_id
+
+    try:
+        if KEEPALIVE_CONFIG is not None:
+            return BedrockModel(model_id=model_id, boto_client_config=KEEPALIVE_CONFIG, **(settings or {}))
+        return BedrockModel(model_id=model_id, **(settings or {}))
+    except Exception as e:
+        logger.error(f"Failed to apply generation profile '{profile}' to {model_id}: {e}. Using model defaults.")
+        return model_id
+
+
+def output_tokens(result) -> Optional[int]:
+    """
+    Reads the number of output tokens from an AgentResult.
+
+    Returns:
+        The token count, or None if the result carries no usage metrics
+    """
+    try:
+        return int(result.metrics.accumulated_usage['outputTokens'])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
@@ -1,16 +1,243 @@
+import atexit
+import json
 import logging
+import os
+import random
+import re
+import threading
+from typing import Optional
+
+from optimise.costs import MODEL_PRICING
+from utils.helpers import write_json_atomic
 
 logger = logging.getLogger(__name__)
 
-def choose_model(task_type: str = "default"):
+DEFAULT_ROUTER_PATH = "model_router.json"
+
+# The three Bedrock models used by the agents, strongest first
+MODELS = [
+    'anthropic.claude-3-5-sonnet-20240620-v1:0',
+    'anthropic.claude-3-haiku-20240307-v1:0',
+    'us.amazon.nova-lite-v1:0',
+]
+
+# Starting latency guesses (seconds) until a model has been observed
+DEFAULT_LATENCIES = {
+    'anthropic.claude-3-5-sonnet-20240620-v1:0': 4.0,
+    'anthropic.claude-3-haiku-20240307-v1:0': 1.5,
+    'us.amazon.nova-lite-v1:0': 1.0,
+}
+
+# Pseudo-successes credited to the model a role is configured with, so the
+# router starts from the existing choice and only moves when data says so
+DEFAULT_PRIOR = 4
+
+# Answers that admit they don't know, or refuse, don't count as successes
+_HEDGE_PATTERN = re.compile(
+    r"\b(i'?m not sure|i am not sure|i don'?t know|i do not know|i cannot|i can'?t|"
+    r"unable to|not enough information|as an ai)\b",
+    re.IGNORECASE
+)
+
+
+class ModelRouter:
     """
-    Selects the best model for a given task.
-    Iron Man Strategy: Default to fast models.
+    Online model router: a bandit over MODELS per (role, task class).
+
+    Each arm keeps its call count, running mean latency and cost, and how
+    many of its graded calls (those whose correctness is known) succeeded. choose() draws a success rate for every candidate from its Beta
+    posterior (Thompson sampling, so rarely tried models keep being explored),
+    keeps the models whose draw reaches `min_success`, and picks the one that
+    best meets the objective: cheapest ('cost') or fastest ('latency').
+    `max_latency_s` / `max_cost` additionally rule out models whose mean is
+    above budget, unless that would rule out every model. Statistics are
+    persisted to `path` so routing improves across runs; they are written
+    every `flush_every` outcomes and at exit (or on flush()), outside the
+    lock, so agents never wait on disk to record a call.
+
+    Arms are plain strings, so the same router can choose between other
+    options, e.g. agent pipelines, given priors for their latency and cost.
     """
-    if task_type == "complex_reasoning":
-        logger.debug("ModelSelector: Choosing powerful model (e.g., gpt-4)")
-        return "gpt-4-stub"
-    else:
-        # Default to a cheap, fast model
-        logger.debug("ModelSelector: Choosing fast model (e.g., haiku)")
-        return "claude-3-haiku-stub"
+
+    def __init__(self, path: Optional[str] = DEFAULT_ROUTER_PATH, objective: str = 'cost',
+                 min_success: float = 0.8, max_latency_s: Optional[float] = None,
+                 max_cost: Optional[float] = None, seed: Optional[int] = None,
+                 default_latencies: Optional[dict] = None, default_costs: Optional[dict] = None,
+                 flush_every: int = 20):
+        if objective not in ('cost', 'latency'):
+            raise ValueError(f"Unknown routing objective: {objective}")
+        self.path = path
+        self.objective = objective
+        self.min_success = min_success
+        self.max_latency_s = max_latency_s
+        self.max_cost = max_cost
+        # Latency and cost assumed for arms that haven't been observed yet
+        self.default_latencies = default_latencies or DEFAULT_LATENCIES
+        self.default_costs = default_costs or {}
+        self.flush_every = max(1, flush_every)
+        self._stats = {}  # "role|task_class|model" -> {"calls", "graded", "successes", "latency", "cost"}
+        self._unsaved = 0  # changes since the statistics were last written
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # keeps writes in snapshot order
+        self._load()
+        if self.path:
+            atexit.register(self.flush)
+
+    def choose(self, role: str, task_class: str = 'default', candidates: Optional[list] = None,
+               default: Optional[str] = None) -> str:
+        """
+        Picks a model for one call.
+
+        Args:
+            role: What the call does, e.g. 'solver' or 'standard'
+            task_class: Coarser description of the input, e.g. a difficulty label
+            candidates: Models to choose from (defaults to MODELS)
+            default: The model the role would use without routing; starts with a prior
+
+        Returns:
+            The chosen model ID
+        """
+        candidates = candidates or MODELS
+        with self._lock:
+            arms = [(model, self._arm(role, task_class, model)) for model in candidates]
+            draws = {
+                model: self._random.betavariate(
+                    arm['successes'] + 1 + (DEFAULT_PRIOR if model == default else 0),
+                    arm['graded'] - arm['successes'] + 1
+                )
+                for model, arm in arms
+            }
+
+        within_budget = [(model, arm) for model, arm in arms if self._within_budget(model, arm)] or arms
+        reliable = [(model, arm) for model, arm in within_budget if draws[model] >= self.min_success]
+        if not reliable:
+            # Nothing looks good enough: take the best bet on success
+            choice = max(within_budget, key=lambda item: draws[item[0]])[0]
+        else:
+            choice = min(reliable, key=lambda item: self._objective_value(*item))[0]
+
+        logger.debug(f"Routed {role}/{task_class} to {choice}")
+        return choice
+
+    def record(self, role: str, task_class: str, model: str, latency_s: float, success: Optional[bool],
+               cost: float = 0.0):
+        """
+        Adds the outcome of one routed call to the statistics; they are persisted in batches.
+
+        Args:
+            success: Whether the call succeeded, or None if that isn't known;
+                the call then only counts towards latency and cost
+        """
+        with self._lock:
+            arm = self._arm(role, task_class, model)
+            arm['calls'] += 1
+            if success is not None:
+                arm['graded'] += 1
+                arm['successes'] += 1 if success else 0
+            # Running means, so the file stays a fixed size
+            arm['latency'] += (latency_s - arm['latency']) / arm['calls']
+            arm['cost'] += (cost - arm['cost']) / arm['calls']
+            self._stats[self._key(role, task_class, model)] = arm
+            self._unsaved += 1
+            due = self._unsaved >= self.flush_every
+        if due:
+            self.flush()
+
+    def seed(self, role: str, task_class: str, model: str, calls: int, successes: int,
+             latency_s: float, cost: float = 0.0) -> bool:
+        """
+        Starts an unobserved arm from statistics gathered elsewhere, e.g. a benchmark run.
+
+        Returns:
+            True if the arm was seeded, False if it already has statistics
+        """
+        if calls <= 0:
+            return False
+        with self._lock:
+            key = self._key(role, task_class, model)
+            if key in self._stats:
+                return False
+            self._stats[key] = {'calls': calls, 'graded': calls, 'successes': min(successes, calls),
+                                'latency': latency_s, 'cost': cost}
+            self._unsaved += 1
+        return True
+
+    def flush(self):
+        """Writes statistics that haven't been persisted yet."""
+        with self._save_lock:
+            with self._lock:
+                if not self._unsaved:
+                    return
+                self._unsaved = 0
+                snapshot = {key: dict(arm) for key, arm in self._stats.items()}
+            self._save(snapshot)
+
+    def stats(self) -> dict:
+        """Returns the per-arm statistics, keyed "role|task_class|model"."""
+        with self._lock:
+            return {key: dict(arm) for key, arm in self._stats.items()}
+
+    @staticmethod
+    def _key(role: str, task_class: str, model: str) -> str:
+        return f"{role}|{task_class}|{model}"
+
+    def _arm(self, role: str, task_class: str, model: str) -> dict:
+        """Statistics for one arm, with priors if it hasn't been tried. Caller holds the lock."""
+        arm = self._stats.get(self._key(role, task_class, model))
+        if arm is not None:
+            return dict(arm)
+        return {'calls': 0, 'graded': 0, 'successes': 0, 'latency': 0.0, 'cost': 0.0}
+
+    def _mean_latency(self, model: str, arm: dict) -> float:
+        return arm['latency'] if arm['calls'] else self.default_latencies.get(model, 2.0)
+
+    def _mean_cost(self, model: str, arm: dict) -> float:
+        if arm['calls']:
+            return arm['cost']
+        if model in self.default_costs:
+            return self.default_costs[model]
+        # Unobserved: price a typical call of ~500 input and ~200 output tokens
+        pricing = MODEL_PRICING.get(model, {'input': 0.0, 'output': 0.0})
+        return 0.5 * pricing['input'] + 0.2 * pricing['output']
+
+    def _within_budget(self, model: str, arm: dict) -> bool:
+        if self.max_latency_s is not None and self._mean_latency(model, arm) > self.max_latency_s:
+            return False
+        if self.max_cost is not None and self._mean_cost(model, arm) > self.max_cost:
+            return False
+        return True
+
+    def _objective_value(self, model: str, arm: dict) -> float:
+        if self.objective == 'latency':
+            return self._mean_latency(model, arm)
+        return self._mean_cost(model, arm)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                self._stats = json.load(f).get("arms", {})
+            logger.info(f"Loaded routing statistics for {len(self._stats)} arms from {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to load router statistics {self.path}: {e}. Starting fresh.")
+            self._stats = {}
+
+    def _save(self, stats: dict):
+        if not self.path:
+            return
+        try:
+            write_json_atomic(self.path, {"arms": stats})
+        except Exception as e:
+            logger.error(f"Failed to save router statistics {self.path}: {e}")
+
+
+def call_succeeded(response_text: str) -> bool:
+    """Cheapest success signal for a routed call: it produced a non-error answer."""
+    return bool(response_text) and not response_text.startswith("Error")
+
+
+def answered(response_text: str) -> bool:
+    """Success signal for free-text calls: a non-error answer that doesn't hedge or refuse."""
+    return call_succeeded(response_text) and not _HEDGE_PATTERN.search(response_text)
@@ -1,20 +1,66 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
-def run_parallel_tasks(tasks: list):
+def run_parallel_tasks(tasks: list, max_workers: int = 4, timeout: Optional[float] = None,
+                       return_exceptions: bool = False):
     """
-    A stub for parallel execution.
-    For the MVP, it just runs tasks sequentially.
+    Runs task callables concurrently on a bounded thread pool.
+
+    Results are returned in the same order as `tasks`. A task that raises, or
+    that runs longer than `timeout` seconds once it has started, yields None
+    (or the exception / a TimeoutError if `return_exceptions` is set).
+    Timed-out calls cannot be interrupted; their late results are dropped.
     """
-    logger.warning("Parallel execution stub: Running tasks sequentially.")
-    
-    results = []
-    for task_function in tasks:
-        try:
-            results.append(task_function())
-        except Exception as e:
-            logger.error(f"Task in parallel set failed: {e}")
-            results.append(None) # Add None for a failed task
-            
+    if not tasks:
+        return []
+
+    results = [None] * len(tasks)
+    started = {}
+
+    def make_runner(index, task_function):
+        def runner():
+            started[index] = time.monotonic()
+            return task_function()
+        return runner
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = {pool.submit(make_runner(i, task)): i for i, task in enumerate(tasks)}
+        pending = set(futures)
+
+        while pending:
+            wait_for = None
+            if timeout is not None:
+                now = time.monotonic()
+                # Unstarted tasks cannot expire sooner than a full timeout from now
+                deadlines = [started[futures[f]] + timeout - now for f in pending if futures[f] in started]
+                wait_for = max(0.0, min(deadlines + [timeout]))
+
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    logger.error(f"Task in parallel set failed: {e}")
+                    results[index] = e if return_exceptions else None
+
+            if timeout is not None:
+                now = time.monotonic()
+                expired = {f for f in pending
+                           if futures[f] in started and now - started[futures[f]] >= timeout}
+                for future in expired:
+                    index = futures[future]
+                    logger.error(f"Task {index} in parallel set timed out after {timeout}s")
+                    results[index] = TimeoutError(f"Timed out after {timeout}s") if return_exceptions else None
+                pending -= expired
+    finally:
+        # Don't block on calls that overran their timeout
+        pool.shutdown(wait=False, cancel_futures=True)
+
     return results
@@ -0,0 +1,233 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from utils.helpers import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PLAN_CACHE_PATH = "plan_cache.json"
+
+# Quoted strings and flat lists are matched before bare numbers so the
+# numbers inside them stay part of one literal
+_LITERAL_PATTERN = re.compile(r"'[^'\n]*'|\"[^\"\n]*\"|\[[^\[\]\n]*\]|-?\d+(?:\.\d+)?")
+_PLACEHOLDER_PATTERN = re.compile(r"<lit:(\d+)>")
+
+
+def extract_template(prompt: str):
+    """
+    Splits a prompt into a template key and the literals it was filled with.
+
+    "Reverse this string: 'dxzayi'" becomes ("Reverse this string: '<lit:0>'",
+    ["dxzayi"]). Quotes are kept in the template, so only the literal value
+    is substituted when a plan is re-instantiated.
+    """
+    literals = []
+
+    def abstract(match):
+        text = match.group(0)
+        if text[0] in "'\"":
+            literals.append(text[1:-1])
+            return f"{text[0]}<lit:{len(literals) - 1}>{text[0]}"
+        literals.append(text)
+        return f"<lit:{len(literals) - 1}>"
+
+    template = _LITERAL_PATTERN.sub(abstract, prompt.strip())
+    return template, literals
+
+
+def _literal_atoms(literals: list) -> set:
+    """Words and numbers inside the literals that should not leak into a skeleton."""
+    atoms = set()
+    for literal in literals:
+        for token in re.findall(r"[A-Za-z0-9]+", literal):
+            if token.isdigit() or len(token) >= 3:
+                atoms.add(token.lower())
+    return atoms
+
+
+def _templatize(text: str, literals: list):
+    """Replaces literal values in a sub-task with placeholders, or returns None if that isn't clean."""
+    # Longest literals first so "98" inside a list is not replaced on its own
+    for index in sorted(range(len(literals)), key=lambda i: -len(literals[i])):
+        value = literals[index]
+        if not value:
+            continue
+        text = re.sub(rf"(?<![\w.]){re.escape(value)}(?![\w]|\.\d)", f"<lit:{index}>", text)
+
+    # Pieces of a literal left behind (e.g. "compare 38 and 80") tie the plan to these inputs
+    remaining = {token.lower() for token in re.findall(r"[A-Za-z0-9]+", _PLACEHOLDER_PATTERN.sub(" ", text))}
+    if remaining & _literal_atoms(literals):
+        return None
+    return text
+
+
+def skeleton_from_tree_dict(tree_dict: dict, literals: list):
+    """
+    Builds a reusable plan from TaskDecompositionTree.to_dict().
+
+    Only the shape is kept: each node's task (with literals replaced by
+    placeholders), whether it is a leaf, and its children in order. Results,
+    errors and metadata are dropped.
+
+    Returns:
+        The nested skeleton, or None if a sub-task embeds the prompt's literals
+        in a form that can't be substituted back
+    """
+    nodes = tree_dict["nodes"]
+
+    def build(node_id):
+        node = nodes[node_id]
+        task = node["task_description"]
+        if node_id != "root":
+            task = _templatize(task, literals)
+            if task is None:
+                return None
+
+        children = []
+        for child_id in node["children"]:
+            child = build(child_id)
+            if child is None:
+                return None
+            children.append(child)
+        return {"task": task, "is_leaf": node["is_leaf"], "children": children}
+
+    return build(tree_dict["root"]["node_id"])
+
+
+def instantiate_skeleton(skeleton: dict, prompt: str, literals: list) -> dict:
+    """Fills a skeleton's placeholders with new literals; the root takes the prompt itself."""
+    def fill(node, is_root=False):
+        task = prompt if is_root else _PLACEHOLDER_PATTERN.sub(lambda m: literals[int(m.group(1))], node["task"])
+        return {
+            "task": task,
+            "is_leaf": node["is_leaf"],
+            "children": [fill(child) for child in node["children"]]
+        }
+    return fill(skeleton, is_root=True)
+
+
+class PlanCache:
+    """
+    Disk-backed cache of verified decomposition plans keyed by prompt template.
+
+    Prompts that differ only in their literals ("Reverse this string: 'abc'"
+    vs "... 'xyz'") share one entry. Entries are evicted least recently used
+    first once `max_entries` is reached, and expire after `ttl_seconds`.
+    With `min_support` > 1 a plan is only served after that many builds
+    produced the same skeleton, which guards against plans whose shape
+    depends on the literal values.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_PLAN_CACHE_PATH, max_entries: int = 256,
+                 ttl_seconds: Optional[float] = None, min_support: int = 1):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.min_support = max(1, min_support)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def lookup(self, prompt: str):
+        """
+        Returns an instantiated plan for the prompt, or None on a miss.
+
+        The plan is a nested dict of {"task", "is_leaf", "children"} with the
+        prompt's own literals substituted in.
+        """
+        template, literals = extract_template(prompt)
+        with self._lock:
+            entry = self._entries.get(template)
+            if entry is not None and self._expired(entry):
+                del self._entries[template]
+                entry = None
+
+            if entry is None or entry["support"] < self.min_support:
+                self.misses += 1
+                logger.debug(f"Plan cache miss for template: {template}")
+                return None
+
+            self._entries.move_to_end(template)
+            entry["last_used"] = time.time()
+            self.hits += 1
+
+        logger.info(f"Plan cache hit for template: {template}")
+        return instantiate_skeleton(entry["skeleton"], prompt, literals)
+
+    def store(self, prompt: str, tree_dict: dict) -> bool:
+        """
+        Saves the verified tree built for a prompt under the prompt's template.
+
+        Returns:
+            True if the plan was cached, False if it couldn't be abstracted
+        """
+        template, literals = extract_template(prompt)
+        skeleton = skeleton_from_tree_dict(tree_dict, literals)
+        if skeleton is None:
+            logger.debug(f"Plan for template is tied to its literals, not caching: {template}")
+            return False
+        skeleton["task"] = template
+
+        with self._lock:
+            entry = self._entries.pop(template, None)
+            if entry is not None and entry["skeleton"] == skeleton and not self._expired(entry):
+                entry["support"] += 1
+            else:
+                entry = {"skeleton": skeleton, "support": 1, "created": time.time()}
+            entry["last_used"] = time.time()
+            self._entries[template] = entry
+
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.debug(f"Evicted plan for template: {evicted}")
+
+            self._save()
+
+        logger.debug(f"Stored plan for template: {template}")
+        return True
+
+    def clear(self):
+        """Removes every cached plan, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def stats(self) -> dict:
+        """Returns hit/miss counts and the number of cached templates."""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _expired(self, entry: dict) -> bool:
+        return self.ttl_seconds is not None and time.time() - entry["created"] > self.ttl_seconds
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            # Saved oldest-used first, so insertion order is the LRU order
+            for template, entry in data.get("entries", []):
+                self._entries[template] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            logger.info(f"Loaded {len(self._entries)} cached plans from {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to load plan cache {self.path}: {e}. Starting empty.")
+            self._entries.clear()
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            write_json_atomic(self.path, {"entries": list(self._entries.items())})
+        except Exception as e:
+            logger.error(f"Failed to save plan cache {self.path}: {e}")
@@ -0,0 +1,284 @@
+import atexit
+import json
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+from optimise.plan_cache import _PLACEHOLDER_PATTERN, extract_template
+from utils.helpers import write_json_atomic
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEMANTIC_CACHE_PATH = "solver_cache.json"
+EMBEDDING_DIMENSIONS = 512
+
+# Function words that change the wording of a task but not what it asks for
+_STOP_WORDS = {"a", "an", "the", "this", "that", "these", "those", "all", "of", "in", "on",
+               "for", "to", "please", "given", "following"}
+
+# Arithmetic, comparison and logic symbols: "48 + 13" and "48 - 13" ask different things
+_OPERATOR_PATTERN = re.compile(r"[-+*/^%=<>!×÷≤≥≠&|]")
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[-+*/^%=<>!×÷≤≥≠&|]")
+
+
+def _content_words(text: str) -> list:
+    """Lowercased words and operator symbols of a text, in order, without stop words."""
+    return [word for word in _TOKEN_PATTERN.findall(text.lower()) if word not in _STOP_WORDS]
+
+
+def embed_text(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> list:
+    """
+    Embeds text as an L2-normalized vector of hashed n-gram counts.
+
+    Word unigrams and bigrams capture wording; character trigrams make the
+    vector tolerant of small spelling and inflection differences. Operator
+    and comparison symbols count as words, so "48 + 13" and "48 - 13" embed
+    differently. Stop words are ignored. crc32 is used instead of hash() so
+    vectors are stable across processes.
+    """
+    words = _content_words(text)
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        if _OPERATOR_PATTERN.fullmatch(word):
+            continue
+        padded = f" {word} "
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    vector = [0.0] * dimensions
+    for feature in features:
+        digest = zlib.crc32(feature.encode("utf-8"))
+        # The top bit picks a sign so unrelated collisions tend to cancel out
+        vector[digest % dimensions] += 1.0 if digest & 0x80000000 else -1.0
+
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+
+def _literal_key(task: str) -> list:
+    """
+    What must match exactly for two tasks to share a result: the literals
+    (quoted strings, lists, numbers) and the operator symbols between them.
+    """
+    template, literals = extract_template(task)
+    operators = _OPERATOR_PATTERN.findall(_PLACEHOLDER_PATTERN.sub(" ", template))
+    return literals + ["".join(operators)]
+
+
+def _same_word_order(words: list, other: list) -> bool:
+    """
+    Whether the words two tasks share appear in the same order in both.
+
+    Swapping two words barely moves the embedding, but "Convert 5 miles to
+    kilometers" and "Convert 5 kilometers to miles" ask opposite things.
+    """
+    shared = set(words) & set(other)
+    return ([word for word in dict.fromkeys(words) if word in shared] ==
+            [word for word in dict.fromkeys(other) if word in shared])
+
+
+class SemanticCache:
+    """
+    In-memory vector index of solved tasks that matches near-duplicate wording.
+
+    A lookup returns the stored result of the most similar task if its cosine
+    similarity reaches `threshold`. Tasks only match when their literals
+    (quoted strings, lists, numbers) and operator symbols are identical and
+    the words they share come in the same order, so "Reverse 'abc'" never
+    answers "Reverse 'abd'", "Is 7 > 3?" never answers "Is 7 < 3?" and
+    "Convert 5 miles to kilometers" never answers "Convert 5 kilometers to
+    miles". The least recently used entries are evicted
+    beyond `max_entries`. The index is persisted to `path` when set, every
+    `flush_every` stores and at exit (or on flush()/close()), so solves don't
+    wait on disk. NumPy is used for the similarity search when installed; a
+    store appends one row to its matrix instead of rebuilding it.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_SEMANTIC_CACHE_PATH, threshold: float = 0.9,
+                 max_entries: int = 2048, flush_every: int = 32):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.flush_every = max(1, flush_every)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # task -> {"literals", "words", "vector", "sparse", "result"}
+        self._matrix = None            # NumPy rows of the vectors, grown in place
+        self._rows = []                # task per matrix row; None for rows of removed tasks
+        self._row_of = {}              # task -> its matrix row
+        self._dead_rows = 0
+        self._unsaved = 0              # stores since the index was last written
+        self._lock = threading.Lock()
+        self._load()
+        if self.path:
+            atexit.register(self.flush)
+
+    def lookup(self, task: str):
+        """Returns the cached result for the task or a near-duplicate of it, or None."""
+        literals = _literal_key(task)
+        words = _content_words(task)
+        vector = embed_text(task)
+
+        with self._lock:
+            match, similarity = self._nearest(vector, literals, words)
+            if match is None or similarity < self.threshold:
+                self.misses += 1
+                logger.debug(f"Semantic cache miss for task: {task[:50]}")
+                return None
+
+            self._entries.move_to_end(match)
+            self.hits += 1
+            result = self._entries[match]["result"]
+
+        logger.info(f"Semantic cache hit ({similarity:.2f}) for task: {task[:50]}")
+        return result
+
+    def store(self, task: str, result: str):
+        """Adds a solved task to the index, evicting the least recently used entry if full."""
+        entry = self._new_entry(task, result)
+        with self._lock:
+            if self._entries.pop(task, None) is not None:
+                self._remove_row(task)
+            self._entries[task] = entry
+            self._append_row(task, entry["vector"])
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._remove_row(evicted)
+
+            self._unsaved += 1
+            if self._unsaved >= self.flush_every:
+                self._save()
+
+    def flush(self):
+        """Writes stores that haven't been persisted yet."""
+        with self._lock:
+            if self._unsaved:
+                self._save()
+
+    def close(self):
+        """Persists the index; the cache stays usable."""
+        self.flush()
+
+    def clear(self):
+        """Removes every cached result, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+            self._rebuild_rows()
+            self._save()
+
+    def stats(self) -> dict:
+        """Returns hit/miss counts and the number of indexed tasks."""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    @staticmethod
+    def _new_entry(task: str, result: str) -> dict:
+        vector = embed_text(task)
+        return {
+            "literals": _literal_key(task),
+            "words": _content_words(task),
+            "vector": vector,
+            "sparse": {index: value for index, value in enumerate(vector) if value},
+            "result": result
+        }
+
+    def _append_row(self, task: str, vector: list):
+        """Adds a task's vector as the next matrix row, doubling the capacity when full. Caller holds the lock."""
+        if not NUMPY_AVAILABLE:
+            return
+        if self._matrix is None or len(self._rows) == self._matrix.shape[0]:
+            grown = np.zeros((max(64, 2 * len(self._rows)), len(vector)))
+            if self._matrix is not None:
+                grown[:len(self._rows)] = self._matrix[:len(self._rows)]
+            self._matrix = grown
+        self._matrix[len(self._rows)] = vector
+        self._row_of[task] = len(self._rows)
+        self._rows.append(task)
+
+    def _remove_row(self, task: str):
+        """Blanks a removed task's row; compacts once most rows are blank. Caller holds the lock."""
+        row = self._row_of.pop(task, None)
+        if row is None:
+            return
+        self._rows[row] = None
+        self._matrix[row] = 0.0
+        self._dead_rows += 1
+        if self._dead_rows > 64 and 2 * self._dead_rows > len(self._rows):
+            self._rebuild_rows()
+
+    def _rebuild_rows(self):
+        """Rebuilds the matrix from the current entries. Caller holds the lock."""
+        self._matrix = None
+        self._rows = []
+        self._row_of = {}
+        self._dead_rows = 0
+        for task, entry in self._entries.items():
+            self._append_row(task, entry["vector"])
+
+    def _nearest(self, vector: list, literals: list, words: list):
+        """Finds the most similar entry with the same literals and word order. Caller holds the lock."""
+        if not self._entries:
+            return None, 0.0
+
+        if NUMPY_AVAILABLE:
+            similarities = self._matrix[:len(self._rows)] @ np.array(vector)
+            ranked = np.argsort(-similarities)
+            for index in ranked:
+                if similarities[index] < self.threshold:
+                    break
+                task = self._rows[index]
+                if task is not None and self._matches(self._entries[task], literals, words):
+                    return task, float(similarities[index])
+            return None, 0.0
+
+        # Without NumPy only the few non-zero dimensions of each entry are multiplied
+        best_key, best_similarity = None, 0.0
+        for key, entry in self._entries.items():
+            if not self._matches(entry, literals, words):
+                continue
+            similarity = sum(value * vector[index] for index, value in entry["sparse"].items())
+            if similarity > best_similarity:
+                best_key, best_similarity = key, similarity
+        return best_key, best_similarity
+
+    @staticmethod
+    def _matches(entry: dict, literals: list, words: list) -> bool:
+        """Whether an entry may answer a task with these literals and words, however similar."""
+        return entry["literals"] == literals and _same_word_order(entry["words"], words)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            # Vectors are recomputed rather than stored, so the file stays small
+            for entry in data.get("entries", []):
+                self._entries[entry["task"]] = self._new_entry(entry["task"], entry["result"])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            logger.info(f"Loaded {len(self._entries)} cached results from {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to load semantic cache {self.path}: {e}. Starting empty.")
+            self._entries.clear()
+        self._rebuild_rows()
+
+    def _save(self):
+        self._unsaved = 0
+        if not self.path:
+            return
+        try:
+            entries = [{"task": task, "result": entry["result"]} for task, entry in self._entries.items()]
+            write_json_atomic(self.path, {"entries": entries})
+        except Exception as e:
+            logger.error(f"Failed to save semantic cache {self.path}: {e}")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared SQLite response cache
+
+Reads must not write: hits are recorded in memory and saved in batches, and
+a database that stays locked only costs those access times, never a lookup.
+Row count and size totals stay exact across processes without table scans.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from optimise.caching import SQLiteCache
+
+
+class TestSQLiteCache(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "responses.db")
+
+    def open_cache(self, **options):
+        cache = SQLiteCache(self.path, busy_timeout=0.1, **options)
+        self.addCleanup(cache.close)
+        return cache
+
+    def access_time(self, key):
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute("SELECT last_access FROM cache WHERE key = ?", (key,)).fetchone()[0]
+
+    def test_hits_are_written_in_batches(self):
+        cache = self.open_cache(access_batch=3)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        stored = self.access_time("a")
+        cache.get("a")
+        cache.get("b")
+        self.assertEqual(self.access_time("a"), stored)
+        cache.get("c")
+        self.assertGreater(self.access_time("a"), stored)
+
+    def test_pending_hits_still_order_eviction(self):
+        cache = self.open_cache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        self.assertEqual(cache.get("a"), "1")
+        cache.set("c", "3")
+        self.assertEqual(cache.get("a"), "1")
+        self.assertIsNone(cache.get("b"))
+
+    def test_totals_track_every_write(self):
+        cache = self.open_cache(max_entries=3)
+        for key in ("a", "b", "c", "d"):
+            cache.set(key, key * 10)
+        cache.set("d", "replaced")
+        cache.delete("b")
+        other = self.open_cache()
+        other.set("e", "from another process")
+        with sqlite3.connect(self.path) as conn:
+            actual = conn.execute("SELECT COUNT(*), SUM(size) FROM cache").fetchone()
+        self.assertEqual((cache.stats()["entries"], cache.stats()["bytes"]), actual)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_byte_limit_evicts_the_oldest_rows(self):
+        cache = self.open_cache(max_bytes=100)
+        for key in ("a", "b", "c", "d"):
+            cache.set(key, "x" * 40)
+        self.assertEqual([key for key in "abcd" if cache.get(key) is not None], ["c", "d"])
+        self.assertLessEqual(cache.stats()["bytes"], 100)
+
+    def test_caches_without_totals_are_counted_on_open(self):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                         " expires_at REAL, last_access REAL NOT NULL)")
+            conn.executemany("INSERT INTO cache VALUES (?, ?, ?, NULL, ?)",
+                             [("a", '"1"', 4, 1.0), ("b", '"2"', 4, 2.0)])
+        cache = self.open_cache(max_entries=2)
+        self.assertEqual(len(cache), 2)
+        cache.set("c", "3")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "2")
+
+    def test_hits_while_another_process_writes(self):
+        cache = self.open_cache(access_batch=1)
+        cache.set("a", "1")
+        writer = sqlite3.connect(self.path, isolation_level=None)
+        self.addCleanup(writer.close)
+        writer.execute("BEGIN IMMEDIATE")
+        try:
+            self.assertEqual(cache.get("a"), "1")
+            self.assertIsNone(cache.get("b"))
+        finally:
+            writer.execute("ROLLBACK")
+        self.assertEqual(cache.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
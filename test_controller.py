@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Tests for AgentController and the agents it builds
+
+Checks when the response cache may answer a prompt: never for an agent whose
+answers depend on earlier turns, since a cached answer would ignore the
+conversation and skip recording the turn. A failing cache is a miss. Auto
+mode must not count an ungraded live answer as a success. Race mode must
+return the first accepted answer, cancel racers that haven't started, and
+fall back to the strongest answer when none is accepted.
+
+The Strands Agent is replaced by a fake that echoes the prompt and the
+history it was sent, so these tests run without AWS credentials. The local
+difficulty classifier is never loaded, so no model file is trained or written.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import unittest
+from unittest import mock
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from agent import controller
+from optimise import caching
+from optimise.client_pool import ClientPool
+from optimise.model_selector import ModelRouter
+
+
+class EchoAgent:
+    """Stands in for strands.Agent: answers with the prompt and the number of earlier messages."""
+
+    prompts = []  # every prompt sent to a model, in call order
+
+    def __init__(self, model=None, callback_handler="default", **kwargs):
+        self.model = model
+        self.messages = []
+
+    def __call__(self, prompt):
+        EchoAgent.prompts.append(prompt)
+        return f"{prompt} (after {len(self.messages)} messages)"
+
+
+class ControllerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        EchoAgent.prompts = []
+        patches = [
+            mock.patch.object(controller, "Agent", EchoAgent, create=True),
+            mock.patch.object(controller, "STRANDS_AVAILABLE", True),
+            mock.patch.object(controller, "client_pool", ClientPool()),
+            mock.patch.object(caching, "response_cache", caching.LRUCache()),
+            mock.patch.object(controller, "load_classifier", return_value=None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+
+class TestResponseCache(ControllerTestCase):
+
+    def test_cache_is_off_by_default(self):
+        agent = controller.AgentController(agent_options={'stream_output': False, 'max_history_turns': 0})
+        self.assertFalse(agent.use_response_cache)
+        agent.run_step("Explain recursion")
+        agent.run_step("Explain recursion")
+        self.assertEqual(EchoAgent.prompts, ["Explain recursion", "Explain recursion"])
+
+    def test_follow_ups_are_never_answered_from_the_cache(self):
+        agent = controller.AgentController(use_response_cache=True, agent_options={'stream_output': False})
+        self.assertFalse(agent.use_response_cache)
+        agent.run_step("Is 7 prime?")
+        first = agent.run_step("Why?")
+        second = agent.run_step("Why?")
+        self.assertEqual(EchoAgent.prompts, ["Is 7 prime?", "Why?", "Why?"])
+        self.assertNotEqual(str(first), str(second))
+        self.assertEqual(len(agent.agent.memory.history_messages()), 6)
+
+    def test_stateless_agents_reuse_answers(self):
+        agent = controller.AgentController(use_response_cache=True,
+                                           agent_options={'stream_output': False, 'max_history_turns': 0})
+        self.assertTrue(agent.use_response_cache)
+        first = agent.run_step("Explain recursion")
+        self.assertEqual(agent.run_step("Explain recursion"), str(first))
+        self.assertEqual(EchoAgent.prompts, ["Explain recursion"])
+
+    def test_a_locked_cache_is_a_miss(self):
+        class LockedCache(caching.LRUCache):
+            def get(self, key, default=None):
+                raise sqlite3.OperationalError("database is locked")
+
+            def set(self, key, value, ttl=None):
+                raise sqlite3.OperationalError("database is locked")
+
+        agent = controller.AgentController(use_response_cache=True,
+                                           agent_options={'stream_output': False, 'max_history_turns': 0})
+        with mock.patch.object(caching, "response_cache", LockedCache()):
+            self.assertEqual(str(agent.run_step("Explain recursion")), "Explain recursion (after 0 messages)")
+        self.assertEqual(EchoAgent.prompts, ["Explain recursion"])
+
+
+class TestAutoAgent(ControllerTestCase):
+
+    def test_live_answers_are_not_counted_as_successes(self):
+        router = ModelRouter(path=None)
+        agent = controller.AgentController(agent_type='auto', agent_options={
+            'router': router, 'seed_from_benchmarks': False,
+            'pipeline_options': {'tree-of-thought-agent': {'stream_output': False}}
+        })
+        with mock.patch.object(router, "choose", return_value='tree-of-thought-agent'):
+            agent.run_step("Explain recursion")
+            agent.run_step("I don't know what to ask")
+        arms = router.stats().values()
+        self.assertEqual(sum(arm['calls'] for arm in arms), 2)
+        self.assertEqual(sum(arm['graded'] for arm in arms), 1)
+        self.assertEqual(sum(arm['successes'] for arm in arms), 0)
+
+
+class FakeRacer:
+    """Stands in for a race pipeline: answers, fails, or waits for `release` first."""
+
+    def __init__(self, answer="", error=None, release=None):
+        self.answer = answer
+        self.error = error
+        self.release = release
+        self.started = threading.Event()
+        self.calls = 0
+
+    def run(self, user_input):
+        self.calls += 1
+        self.started.set()
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.answer
+
+
+class TestRaceAgent(ControllerTestCase):
+
+    RACERS = (('cheap', 'standard-agent', None), ('strong', 'tree-of-thought-agent', None))
+
+    def race(self, cheap, strong, **options):
+        """A RaceAgent over the two fakes; returns it and an event set once every racer has settled."""
+        fakes = {'standard-agent': cheap, 'tree-of-thought-agent': strong}
+        with mock.patch.object(controller, "create_agent", lambda agent_type, options=None: fakes[agent_type]):
+            agent = controller.RaceAgent(racers=self.RACERS, log_path=None, **options)
+        settled = threading.Event()
+        finish_race = agent._finish_race
+        agent._finish_race = lambda race: (finish_race(race), settled.set())
+        return agent, settled
+
+    def test_first_accepted_answer_wins(self):
+        release = threading.Event()
+        strong = FakeRacer("Paris, France", release=release)
+        agent, settled = self.race(FakeRacer("Paris", release=strong.started), strong)
+        self.assertEqual(agent.run("What is the capital of France?"), "Paris")
+        self.assertEqual(agent.last_race['winner'], 'cheap')
+        self.assertFalse(settled.is_set())
+
+        # The loser was already running; its spend is counted as wasted once it finishes
+        release.set()
+        self.assertTrue(settled.wait(5))
+        self.assertEqual(agent.last_race['racers']['strong']['status'], 'abandoned')
+        self.assertGreater(agent.wasted_cost, 0.0)
+        self.assertEqual(agent.race_stats()['wins'], {'cheap': 1})
+
+    def test_hedged_racer_is_cancelled_once_the_race_is_decided(self):
+        strong = FakeRacer("Paris, France")
+        agent, settled = self.race(FakeRacer("Paris"), strong, hedge_after_s=5)
+        self.assertEqual(agent.run("What is the capital of France?"), "Paris")
+        self.assertTrue(settled.wait(5))
+        self.assertEqual(strong.calls, 0)
+        self.assertEqual(agent.last_race['racers']['strong'], {'status': 'cancelled', 'finished_s': None, 'cost': 0.0})
+        self.assertEqual(agent.wasted_cost, 0.0)
+
+    def test_rejected_answer_starts_the_hedged_racer(self):
+        agent, settled = self.race(FakeRacer("I don't know"), FakeRacer("Paris"), hedge_after_s=5)
+        self.assertEqual(agent.run("What is the capital of France?"), "Paris")
+        self.assertEqual(agent.last_race['winner'], 'strong')
+        self.assertEqual(agent.last_race['racers']['cheap']['status'], 'rejected')
+
+    def test_failed_racer_falls_back_to_the_strongest_answer(self):
+        agent, settled = self.race(FakeRacer(error=RuntimeError("ThrottlingException")),
+                                   FakeRacer("I'm not sure, maybe Paris"))
+        self.assertEqual(agent.run("What is the capital of France?"), "I'm not sure, maybe Paris")
+        self.assertIsNone(agent.last_race['winner'])
+        self.assertEqual(agent.last_race['returned'], 'strong')
+        self.assertEqual(agent.last_race['racers']['strong']['status'], 'fallback')
+        self.assertTrue(settled.wait(5))
+        self.assertEqual(agent.race_stats()['wins'], {'none': 1})
+
+    def test_every_racer_failing_returns_an_error(self):
+        error = RuntimeError("ThrottlingException")
+        agent, _ = self.race(FakeRacer(error=error), FakeRacer(error=error))
+        self.assertTrue(str(agent.run("What is the capital of France?")).startswith("Error processing request"))
+
+    def test_fixed_model_racer_skips_the_difficulty_classifier(self):
+        with mock.patch.object(controller, "warm_agent") as warm_agent:
+            agent = controller.StandardAgent(model='us.amazon.nova-lite-v1:0', stream_output=False)
+        self.assertIsNone(agent.local_classifier)
+        controller.load_classifier.assert_not_called()
+        self.assertEqual(warm_agent.call_args_list, [mock.call('us.amazon.nova-lite-v1:0', callback_handler=None)])
+        self.assertEqual(str(agent.run("What is the capital of France?")),
+                         "What is the capital of France? (after 0 messages)")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the local prompt difficulty classifier
+
+Training is seeded, so the same examples always give the same model and the
+same predictions. A saved model must load back unchanged, and loading must
+never write outside the path it was given. Runs without AWS credentials; no
+model is called.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from optimise import difficulty
+from optimise.difficulty import DifficultyClassifier, load_classifier
+
+EXAMPLES = [
+    ("What is 2 + 2?", "low"),
+    ("What is the capital of France?", "low"),
+    ("Reverse the string 'abc'", "low"),
+    ("Explain how photosynthesis works and compare it to cellular respiration", "medium"),
+    ("Summarize the plot of Hamlet, then analyze its main themes", "medium"),
+    ("Compare the economic policies of two countries and evaluate their outcomes", "medium"),
+    ("Write a Python function that solves the knights and knaves puzzle for every island, "
+     "then prove it is correct and analyze its complexity", "high"),
+    ("Implement a recursive algorithm for all permutations of [1, 2, 3, 4], then derive its "
+     "running time and prove each step", "high"),
+    ("Given the constraints {a < b, b < c, c < d}, deduce every ordering, then write SQL "
+     "that checks each one", "high"),
+]
+
+
+def trained():
+    classifier = DifficultyClassifier()
+    classifier.train(EXAMPLES)
+    return classifier
+
+
+class TestDifficultyClassifier(unittest.TestCase):
+
+    def test_predictions_are_deterministic(self):
+        first, second = trained(), trained()
+        for prompt, label in EXAMPLES:
+            self.assertEqual(first.predict(prompt), second.predict(prompt))
+            self.assertEqual(first.predict(prompt)[0], label, prompt)
+
+    def test_save_load_round_trip(self):
+        classifier = trained()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "difficulty_model.json")
+            classifier.save(path)
+            loaded = DifficultyClassifier.load(path)
+        self.assertEqual(loaded.weights, classifier.weights)
+        self.assertEqual(loaded.bias, classifier.bias)
+        for prompt, _ in EXAMPLES:
+            self.assertEqual(loaded.predict(prompt), classifier.predict(prompt))
+
+    def test_models_with_other_features_are_rejected(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "difficulty_model.json")
+            trained().save(path)
+            original = difficulty.FEATURE_VERSION
+            difficulty.FEATURE_VERSION = original + 1
+            try:
+                self.assertRaises(ValueError, DifficultyClassifier.load, path)
+            finally:
+                difficulty.FEATURE_VERSION = original
+
+    def test_load_classifier_trains_and_saves_to_the_given_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "difficulty_model.json")
+            log_path = os.path.join(directory, "difficulty_log.jsonl")
+            cwd = set(os.listdir(os.getcwd()))
+            classifier = load_classifier(path=path, log_path=log_path)
+            self.assertIsNotNone(classifier)
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(set(os.listdir(os.getcwd())), cwd)
+            self.assertEqual(load_classifier(path=path, log_path=log_path).weights, classifier.weights)
+
+    def test_default_paths_are_not_in_the_working_directory(self):
+        for path in (difficulty.DEFAULT_MODEL_PATH, difficulty.DEFAULT_LOG_PATH):
+            self.assertTrue(os.path.isabs(path), path)
+
+
+if __name__ == "__main__":
+    unittest.main()
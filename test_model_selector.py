@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the online model router
+
+Recording an outcome must not write the statistics file every time: writes
+happen every `flush_every` outcomes, on flush(), and at exit. Only graded
+outcomes move an arm's success rate.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from optimise.model_selector import MODELS, ModelRouter, answered
+
+
+class TestRouterPersistence(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "model_router.json")
+
+    def saved_calls(self):
+        with open(self.path, "r") as f:
+            return sum(arm["calls"] for arm in json.load(f)["arms"].values())
+
+    def test_outcomes_are_written_in_batches(self):
+        router = ModelRouter(path=self.path, flush_every=3)
+        for _ in range(2):
+            router.record('solver', 'default', MODELS[2], 1.0, True)
+        self.assertFalse(os.path.exists(self.path))
+        router.record('solver', 'default', MODELS[2], 1.0, True)
+        self.assertEqual(self.saved_calls(), 3)
+
+        router.record('solver', 'default', MODELS[2], 1.0, False)
+        self.assertEqual(self.saved_calls(), 3)
+        router.flush()
+        self.assertEqual(self.saved_calls(), 4)
+        self.assertEqual(ModelRouter(path=self.path).stats(), router.stats())
+
+    def test_flush_without_changes_does_not_write(self):
+        ModelRouter(path=self.path).flush()
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestGradedOutcomes(unittest.TestCase):
+
+    def test_ungraded_calls_do_not_change_the_success_rate(self):
+        router = ModelRouter(path=None)
+        self.assertTrue(router.seed('pipeline', 'high', 'task-decomposition-tree', 200, 146, 20.0))
+        for _ in range(50):
+            router.record('pipeline', 'high', 'task-decomposition-tree', 18.0, None)
+        arm = router.stats()['pipeline|high|task-decomposition-tree']
+        self.assertEqual((arm['calls'], arm['graded'], arm['successes']), (250, 200, 146))
+        self.assertAlmostEqual(arm['latency'], 19.6)
+
+        router.record('pipeline', 'high', 'task-decomposition-tree', 18.0, False)
+        arm = router.stats()['pipeline|high|task-decomposition-tree']
+        self.assertEqual((arm['graded'], arm['successes']), (201, 146))
+
+    def test_ungraded_calls_do_not_make_a_weak_arm_look_reliable(self):
+        router = ModelRouter(path=None, min_success=0.8, seed=0)
+        router.seed('pipeline', 'high', 'cheap', 200, 100, 1.0, 0.001)
+        router.seed('pipeline', 'high', 'strong', 200, 190, 10.0, 0.01)
+        for _ in range(1000):
+            router.record('pipeline', 'high', 'cheap', 1.0, None, 0.001)
+        picks = [router.choose('pipeline', 'high', candidates=['cheap', 'strong']) for _ in range(200)]
+        self.assertEqual(picks.count('strong'), 200)
+
+
+class TestSuccessSignal(unittest.TestCase):
+
+    def test_hedging_and_failed_answers_are_not_successes(self):
+        self.assertTrue(answered("The capital of France is Paris."))
+        for text in ("", "Error processing request: timeout", "I don't know.", "I'm not sure, maybe 4"):
+            self.assertFalse(answered(text), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
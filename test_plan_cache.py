@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for the decomposition-plan cache
+
+Checks template extraction on the benchmark prompt families, the guard that
+refuses plans whose sub-tasks embed pieces of the prompt's literals, and
+that a cached plan is never reused for a prompt it doesn't fit. Runs without
+AWS credentials; no model is called.
+"""
+
+import json
+import os
+import sys
+import unittest
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from agent.task_tree import TaskDecompositionTree
+from optimise.plan_cache import PlanCache, extract_template, skeleton_from_tree_dict, _templatize
+
+BENCHMARK_PROMPTS_PATH = os.path.join(project_root, "evaluation", "benchmark_prompts.json")
+
+
+def build_tree(prompt, sub_tasks):
+    """A verified two-level tree: the prompt with one leaf per sub-task."""
+    tree = TaskDecompositionTree(prompt)
+    for sub_task in sub_tasks:
+        tree.add_node(sub_task, "root").mark_as_leaf()
+    return tree.to_dict()
+
+
+def leaf_tasks(plan):
+    return [child["task"] for child in plan["children"]]
+
+
+class TestTemplateExtraction(unittest.TestCase):
+
+    def setUp(self):
+        with open(BENCHMARK_PROMPTS_PATH, "r") as f:
+            self.families = json.load(f)
+
+    def family(self, prefix):
+        return next(prompts for name, prompts in self.families.items() if name.startswith(prefix))
+
+    def test_literal_only_families_share_one_template(self):
+        for prefix in ("L1: Task 2", "L1: Task 3", "L1: Task 4", "L1: Task 5",
+                       "L2: Task 2", "L2: Task 4", "L2: Task 5"):
+            prompts = self.family(prefix)
+            templates = {extract_template(prompt)[0] for prompt in prompts}
+            self.assertEqual(len(templates), 1, f"{prefix}: {templates}")
+
+    def test_literals_round_trip(self):
+        for prompts in self.families.values():
+            for prompt in prompts:
+                template, literals = extract_template(prompt)
+                rebuilt = template
+                for index, literal in enumerate(literals):
+                    rebuilt = rebuilt.replace(f"<lit:{index}>", literal, 1)
+                self.assertEqual(rebuilt, prompt.strip())
+
+    def test_examples(self):
+        self.assertEqual(extract_template("Reverse this string: 'dxzayi'"),
+                         ("Reverse this string: '<lit:0>'", ["dxzayi"]))
+        self.assertEqual(extract_template("Find the largest number in this list: [38, 80, 9]"),
+                         ("Find the largest number in this list: <lit:0>", ["[38, 80, 9]"]))
+        self.assertEqual(extract_template("What is 3.5 * -2?"), ("What is <lit:0> * <lit:1>?", ["3.5", "-2"]))
+
+    def test_operators_stay_in_the_template(self):
+        templates = {extract_template(prompt)[0] for prompt in self.family("L1: Task 1")}
+        self.assertTrue(all(any(op in template for op in "+-*/") for template in templates))
+        self.assertNotEqual(extract_template("What is 48 + 13?")[0], extract_template("What is 48 - 13?")[0])
+
+
+class TestLiteralGuard(unittest.TestCase):
+
+    def test_whole_literals_are_replaced(self):
+        self.assertEqual(_templatize("Reverse the characters of 'dxzayi'", ["dxzayi"]),
+                         "Reverse the characters of '<lit:0>'")
+        self.assertEqual(_templatize("Add 48 and 13", ["48", "13"]), "Add <lit:0> and <lit:1>")
+
+    def test_pieces_of_a_literal_are_refused(self):
+        # Sub-tasks that split a list literal tie the plan to these values
+        self.assertIsNone(_templatize("Compare 38 and 80", ["[38, 80, 9, 56]"]))
+        self.assertIsNone(_templatize("Find the user id 123 in the text", ["User Alice (id: 123) is active."]))
+
+    def test_numbers_inside_larger_numbers_are_left_alone(self):
+        self.assertEqual(_templatize("Multiply 480 by 2", ["48"]), "Multiply 480 by 2")
+
+    def test_skeleton_is_refused_when_a_leaf_splits_a_literal(self):
+        prompt = "Find the largest number in this list: [38, 80, 9]"
+        _, literals = extract_template(prompt)
+        tree = build_tree(prompt, ["Compare 38 and 80", "Compare the winner with 9"])
+        self.assertIsNone(skeleton_from_tree_dict(tree, literals))
+
+
+class TestPlanReuse(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = PlanCache(path=None)
+
+    def test_plan_is_reused_with_the_new_literals(self):
+        self.assertTrue(self.cache.store("Reverse this string: 'dxzayi'", build_tree(
+            "Reverse this string: 'dxzayi'", ["List the characters of 'dxzayi'", "Join them in reverse order"])))
+        plan = self.cache.lookup("Reverse this string: 'AbC'")
+        self.assertEqual(plan["task"], "Reverse this string: 'AbC'")
+        self.assertEqual(leaf_tasks(plan), ["List the characters of 'AbC'", "Join them in reverse order"])
+
+    def test_no_reuse_across_operators(self):
+        self.cache.store("What is 48 + 13?", build_tree("What is 48 + 13?", ["Add 48 and 13"]))
+        self.assertIsNone(self.cache.lookup("What is 48 - 13?"))
+        self.assertIsNone(self.cache.lookup("What is 48 * 13?"))
+        self.assertEqual(leaf_tasks(self.cache.lookup("What is 7 + 2?")), ["Add 7 and 2"])
+
+    def test_no_reuse_of_a_plan_tied_to_its_literals(self):
+        prompt = "Find the largest number in this list: [38, 80, 9]"
+        self.assertFalse(self.cache.store(prompt, build_tree(prompt, ["Compare 38 and 80", "Compare the winner with 9"])))
+        self.assertIsNone(self.cache.lookup("Find the largest number in this list: [1, 2, 3]"))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_reused_plan_never_carries_the_old_literals(self):
+        prompt = "In the sentence 'The red car.', replace all instances of 'red' with 'blue'."
+        self.cache.store(prompt, build_tree(prompt, ["Find each 'red' in 'The red car.'",
+                                                     "Replace each with 'blue'"]))
+        other = "In the sentence 'A tan hat.', replace all instances of 'tan' with 'gray'."
+        tasks = leaf_tasks(self.cache.lookup(other))
+        self.assertEqual(tasks, ["Find each 'tan' in 'A tan hat.'", "Replace each with 'gray'"])
+        for task in tasks:
+            for old in ("red", "blue", "The red car."):
+                self.assertNotIn(old, task)
+
+
+if __name__ == "__main__":
+    unittest.main()
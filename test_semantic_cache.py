@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the semantic result cache in front of SolverAgent.solve
+
+A near-duplicate wording of a solved task may reuse its result; a task that
+differs in a literal or an operator, or swaps the order of its words, must
+never do so. Runs without AWS
+credentials; no model is called.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from optimise.semantic_cache import SemanticCache, embed_text
+
+
+def similarity(first, second):
+    return sum(a * b for a, b in zip(embed_text(first), embed_text(second)))
+
+
+class TestSemanticCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SemanticCache(path=None)
+
+    def test_near_duplicate_wording_hits(self):
+        self.cache.store("Calculate 48 + 13", "61")
+        self.assertEqual(self.cache.lookup("Calculate 48 + 13"), "61")
+        self.assertEqual(self.cache.lookup("calculate 48 + 13 please"), "61")
+
+    def test_different_operators_miss(self):
+        self.cache.store("Calculate 48 + 13", "61")
+        for task in ("Calculate 48 - 13", "Calculate 48 * 13", "Calculate 48 / 13", "Calculate 48 ^ 13"):
+            self.assertIsNone(self.cache.lookup(task), task)
+
+    def test_different_comparisons_miss(self):
+        self.cache.store("Is 7 > 3?", "Yes")
+        self.assertIsNone(self.cache.lookup("Is 7 < 3?"))
+        self.assertIsNone(self.cache.lookup("Is 7 >= 3?"))
+        self.assertEqual(self.cache.lookup("Is 7 > 3"), "Yes")
+
+    def test_different_literals_miss(self):
+        self.cache.store("Reverse the string 'AbC'", "CbA")
+        self.assertIsNone(self.cache.lookup("Reverse the string 'abc'"))
+        self.assertIsNone(self.cache.lookup("Reverse the string 'AbD'"))
+
+    def test_swapped_directions_miss(self):
+        for task, swapped in [("Convert 5 miles to kilometers", "Convert 5 kilometers to miles"),
+                              ("Convert 100 degrees Celsius to Fahrenheit",
+                               "Convert 100 degrees Fahrenheit to Celsius"),
+                              ("Translate 'good morning' from English to French",
+                               "Translate 'good morning' from French to English")]:
+            self.cache.store(task, "answer")
+            self.assertGreaterEqual(similarity(task, swapped), self.cache.threshold)
+            self.assertIsNone(self.cache.lookup(swapped), swapped)
+            self.assertEqual(self.cache.lookup(f"Please {task.lower()}"), "answer")
+
+    def test_embedding_distinguishes_operators(self):
+        self.assertLess(similarity("Calculate 48 + 13", "Calculate 48 - 13"), 1.0 - 1e-9)
+        self.assertLess(similarity("Is 7 > 3?", "Is 7 < 3?"), 1.0 - 1e-9)
+
+
+class TestSemanticCacheStorage(unittest.TestCase):
+
+    def test_lookups_stay_correct_as_rows_are_replaced_and_evicted(self):
+        cache = SemanticCache(path=None, max_entries=50)
+        for round_ in range(4):
+            for n in range(100):
+                cache.store(f"Calculate {n} + {n + 1}", f"{round_}:{2 * n + 1}")
+        self.assertIsNone(cache.lookup("Calculate 10 + 11"))
+        for n in range(50, 100):
+            self.assertEqual(cache.lookup(f"Calculate {n} + {n + 1}"), f"3:{2 * n + 1}")
+        self.assertEqual(cache.stats()["entries"], 50)
+
+    def test_stores_are_written_in_batches(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "semantic_cache.json")
+            cache = SemanticCache(path=path, flush_every=3)
+            cache.store("Calculate 48 + 13", "61")
+            cache.store("Calculate 48 - 13", "35")
+            self.assertFalse(os.path.exists(path))
+            cache.store("Calculate 48 * 13", "624")
+            self.assertTrue(os.path.exists(path))
+
+            cache.store("Calculate 48 / 13", "3.69")
+            self.assertIsNone(SemanticCache(path=path).lookup("Calculate 48 / 13"))
+            cache.close()
+            reloaded = SemanticCache(path=path)
+            self.assertEqual(reloaded.lookup("Calculate 48 / 13"), "3.69")
+            self.assertEqual(reloaded.lookup("Calculate 48 + 13"), "61")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Guard tests for the Task Decomposition Tree sub-agents
+
+Checks that every sub-agent call is one-shot: the prompt sent to the model
+does not grow with the number of earlier calls, and no console callback is
+attached. The Strands Agent is replaced by a recorder that keeps history the
+way a real Agent does, so these tests run without AWS credentials.
+Agents are borrowed from a client pool, so the tests also check that calls
+reuse warm agents and that concurrent calls never share one, and that only
+verdicts the model actually gave are remembered.
+"""
+
+import asyncio
+import os
+import re
+import sys
+import threading
+import unittest
+from unittest import mock
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from agent import task_agents
+from optimise.client_pool import ClientPool
+from optimise.model_selector import ModelRouter
+
+
+# Holds two "hold" calls inside their agents at the same time
+hold_barrier = threading.Barrier(2, timeout=5)
+
+
+class RecordingAgent:
+    """Stands in for strands.Agent: keeps message history and records input size per call."""
+
+    instances = []
+    input_sizes = []  # input size of every call, in call order
+
+    def __init__(self, model=None, callback_handler="default", **kwargs):
+        self.model = model
+        self.callback_handler = callback_handler
+        self.messages = []
+        RecordingAgent.instances.append(self)
+
+    def __call__(self, prompt):
+        # A real Agent sends its whole history plus the new prompt
+        self.messages.append({"role": "user", "content": [{"text": prompt}]})
+        RecordingAgent.input_sizes.append(sum(len(m["content"][0]["text"]) for m in self.messages))
+        if prompt == "hold":
+            hold_barrier.wait()
+        response = self._respond(prompt)
+        self.messages.append({"role": "assistant", "content": [{"text": response}]})
+        return response
+
+    @staticmethod
+    def _respond(prompt):
+        if "JSON array of sub-task" in prompt:
+            return '["Step one", "Step two"]'
+        if "Is each task a leaf node?" in prompt:
+            return '["YES", "YES"]'
+        if "YES or NO" in prompt:
+            return "YES"
+        return "Done."
+
+
+class TestStatelessSubAgents(unittest.TestCase):
+
+    def setUp(self):
+        RecordingAgent.instances = []
+        RecordingAgent.input_sizes = []
+        self.pool = ClientPool()
+        patches = [
+            mock.patch.object(task_agents, "Agent", RecordingAgent, create=True),
+            mock.patch.object(task_agents, "STRANDS_AVAILABLE", True),
+            mock.patch.object(task_agents, "client_pool", self.pool),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def assert_constant_input(self, sub_agent, call, calls=10):
+        for _ in range(calls):
+            call()
+        sizes = RecordingAgent.input_sizes
+        self.assertEqual(len(sizes), calls)
+        self.assertEqual(sizes, [sizes[0]] * calls,
+                         f"{type(sub_agent).__name__} input grew across calls: {sizes}")
+        for agent in RecordingAgent.instances:
+            self.assertEqual(agent.messages, [])
+
+    def test_decomposer_input_is_constant(self):
+        decomposer = task_agents.DecomposerAgent()
+        self.assert_constant_input(decomposer, lambda: decomposer.decompose("Plan a trip"))
+
+    def test_verifier_input_is_constant(self):
+        verifier = task_agents.VerifierAgent()
+        self.assert_constant_input(verifier, lambda: verifier.is_leaf_node("Book a flight", "Plan a trip"))
+
+    def test_solver_input_is_constant(self):
+        solver = task_agents.SolverAgent()
+        self.assert_constant_input(solver, lambda: solver.solve("Book a flight"))
+
+    def test_synthesizer_input_is_constant(self):
+        synthesizer = task_agents.SynthesizerAgent()
+        sub_results = [{"task": "Book a flight", "result": "Booked."}]
+        self.assert_constant_input(synthesizer, lambda: synthesizer.synthesize("Plan a trip", sub_results))
+
+    def test_mixed_calls_do_not_leak_between_prompts(self):
+        """Earlier, longer prompts must not inflate later ones on the same agent."""
+        verifier = task_agents.VerifierAgent()
+        verifier.is_leaf_node("Book a flight")
+        verifier.verify_decomposition("Plan a trip", ["Book a flight", "Book a hotel"] * 20)
+        verifier.is_leaf_node("Book a flight")
+        sizes = RecordingAgent.input_sizes
+        self.assertEqual(sizes[0], sizes[2])
+
+    def test_no_console_callback(self):
+        for agent_class in (task_agents.DecomposerAgent, task_agents.VerifierAgent,
+                            task_agents.SolverAgent, task_agents.SynthesizerAgent):
+            agent_class()
+        self.assertTrue(RecordingAgent.instances)
+        for agent in RecordingAgent.instances:
+            self.assertIsNone(agent.callback_handler)
+
+    def test_calls_reuse_a_pooled_agent(self):
+        solver = task_agents.SolverAgent()
+        for _ in range(10):
+            solver.solve("Book a flight")
+        # The agent warmed in __init__ serves every call
+        self.assertEqual(len(RecordingAgent.instances), 1)
+        self.assertEqual(self.pool.stats()["reused"], 10)
+
+    def test_concurrent_calls_get_separate_agents(self):
+        solver = task_agents.SolverAgent()
+        threads = [threading.Thread(target=solver._invoke, args=("hold",)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Both calls were inside an agent at once, so they can't have shared one
+        self.assertEqual(len(RecordingAgent.instances), 2)
+
+
+class FlakyVerifierAgent(RecordingAgent):
+    """Stands in for strands.Agent: garbles batch leaf checks and fails per-task checks of `failing` tasks."""
+
+    failing = set()
+
+    async def invoke_async(self, prompt):
+        return self(prompt)
+
+    @classmethod
+    def _respond(cls, prompt):
+        if "Is each task a leaf node?" in prompt:
+            return "Both look atomic to me."
+        task = re.search(r'Task: "(.*?)"', prompt).group(1)
+        if task in cls.failing:
+            raise RuntimeError("ThrottlingException")
+        return "NO"
+
+
+class TestVerdictMemo(unittest.TestCase):
+
+    def setUp(self):
+        FlakyVerifierAgent.failing = {"Book a hotel"}
+        patches = [
+            mock.patch.object(task_agents, "Agent", FlakyVerifierAgent, create=True),
+            mock.patch.object(task_agents, "STRANDS_AVAILABLE", True),
+            mock.patch.object(task_agents, "client_pool", ClientPool()),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.verdicts = task_agents.VerdictStore()
+        self.verifier = task_agents.VerifierAgent(verdicts=self.verdicts)
+
+    def remembered(self, task, parent="Plan a trip"):
+        return self.verdicts.cache.get(task_agents.VerdictStore.leaf_key(task, parent))
+
+    def test_fallback_verdicts_are_not_remembered(self):
+        verdicts = self.verifier.classify_leaves("Plan a trip", ["Book a flight", "Book a hotel"])
+        self.assertEqual(verdicts, [False, True])
+        self.assertIs(self.remembered("Book a flight"), False)
+        self.assertIsNone(self.remembered("Book a hotel"))
+
+    def test_fallback_verdicts_are_not_remembered_async(self):
+        verdicts = asyncio.run(self.verifier.classify_leaves_async("Plan a trip", ["Book a flight", "Book a hotel"]))
+        self.assertEqual(verdicts, [False, True])
+        self.assertIs(self.remembered("Book a flight"), False)
+        self.assertIsNone(self.remembered("Book a hotel"))
+
+    def test_failed_check_is_asked_again(self):
+        self.assertTrue(self.verifier.is_leaf_node("Book a hotel", "Plan a trip"))
+        FlakyVerifierAgent.failing = set()
+        self.assertFalse(self.verifier.is_leaf_node("Book a hotel", "Plan a trip"))
+
+    def test_keys_keep_the_exact_task(self):
+        key = task_agents.VerdictStore.leaf_key
+        self.assertEqual(key("Calculate  48 + 13 ", "Do the sums"), key("Calculate 48 + 13", "Do the sums"))
+        for first, second in [("Calculate 48 + 13", "Calculate 48 - 13"), ("Reverse AbC", "Reverse abc"),
+                              ("Sort the list", "Sort a list")]:
+            self.assertNotEqual(key(first, None), key(second, None), (first, second))
+
+
+class TestRouterSignal(unittest.TestCase):
+
+    def test_verdicts_must_start_with_yes_or_no(self):
+        for text in ("YES", "No.", "  yes, it is atomic"):
+            self.assertTrue(task_agents._route_success('verdict', text), text)
+        for text in ("I don't KNOW", "NOTE: unclear", "EYES", "The answer is YES"):
+            self.assertFalse(task_agents._route_success('verdict', text), text)
+
+    def test_structured_responses_must_parse(self):
+        self.assertTrue(task_agents._route_success('decomposer', 'Sub-tasks: ["Book a flight", "Book a hotel"]'))
+        self.assertTrue(task_agents._route_success('leaf_batch', '["YES", "NO"]'))
+        self.assertTrue(task_agents._route_success('expansion', '{"is_leaf": false, "sub_tasks": ["A", "B"]}'))
+        self.assertFalse(task_agents._route_success('decomposer', '[]'))
+        self.assertFalse(task_agents._route_success('decomposer', '[not json]'))
+        self.assertFalse(task_agents._route_success('leaf_batch', '["YES", "maybe"]'))
+        self.assertFalse(task_agents._route_success('expansion', '{"sub_tasks": ["A"]}'))
+
+    def test_free_text_is_ungraded_unless_it_fails(self):
+        self.assertIsNone(task_agents._route_success('solver', "61"))
+        self.assertIsNone(task_agents._route_success('synthesizer', "Plan a trip: flight booked"))
+        self.assertIs(task_agents._route_success('solver', "I don't know"), False)
+        self.assertIs(task_agents._route_success('synthesizer', "Error executing task: timeout"), False)
+        self.assertIs(task_agents._route_success('solver', ""), False)
+
+    def test_routed_answers_are_not_graded_as_successes(self):
+        router = ModelRouter(path=None)
+        with mock.patch.object(task_agents, "Agent", RecordingAgent, create=True), \
+                mock.patch.object(task_agents, "STRANDS_AVAILABLE", True), \
+                mock.patch.object(task_agents, "client_pool", ClientPool()):
+            task_agents.SolverAgent(router=router).solve("Book a flight")
+            task_agents.VerifierAgent(router=router).is_leaf_node("Book a flight")
+        arms = {key.split("|")[0]: arm for key, arm in router.stats().items()}
+        self.assertEqual((arms['solver']['calls'], arms['solver']['graded']), (1, 0))
+        self.assertEqual((arms['verdict']['graded'], arms['verdict']['successes']), (1, 1))
+
+    def test_verdict_parsing_reads_whole_words(self):
+        parse = task_agents.VerifierAgent._parse_yes_no
+        self.assertTrue(parse("Yes."))
+        self.assertFalse(parse("NO, it needs sub-steps; YES would be wrong"))
+        self.assertFalse(parse("EYES"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Equivalence tests for the TaskOrchestrator build and execution modes
+
+Every mode must build the same tree, with the same node IDs, and produce the
+same answer as the plain serial build. The Strands Agent is replaced by a
+scripted agent whose answers depend only on the prompt, so these tests run
+without AWS credentials and the outcome doesn't depend on thread timing.
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import unittest
+from concurrent.futures import wait
+from unittest import mock
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from agent import task_agents
+from agent.task_orchestrator import TaskOrchestrator
+from optimise.client_pool import ClientPool
+from optimise.costs import estimate_cost
+
+
+class ScriptedAgent:
+    """Stands in for strands.Agent: answers from a fixed plan of task -> sub-tasks."""
+
+    plan = {}         # non-leaf task -> its sub-tasks
+    rejected = set()  # tasks whose decomposition the reviewer rejects
+    solved = []       # leaf tasks sent to the solver, in call order
+
+    def __init__(self, model=None, callback_handler="default", **kwargs):
+        self.model = model
+        self.messages = []
+
+    def __call__(self, prompt):
+        return self._respond(prompt)
+
+    async def invoke_async(self, prompt):
+        return self._respond(prompt)
+
+    @classmethod
+    def _respond(cls, prompt):
+        if "Decide whether a task is atomic" in prompt:
+            task = re.search(r'Task: "(.*?)"', prompt).group(1)
+            sub_tasks = cls.plan.get(task, [])
+            return json.dumps({"is_leaf": not sub_tasks, "sub_tasks": sub_tasks, "valid": task not in cls.rejected})
+        if "JSON array of sub-task" in prompt:
+            task = re.search(r'Given the following task:\n"(.*?)"', prompt).group(1)
+            return json.dumps(cls.plan.get(task, []))
+        if "Is each task a leaf node?" in prompt:
+            tasks = re.findall(r"^\d+\. (.*)$", prompt.split("Tasks:\n", 1)[1].split("\n\n", 1)[0], re.M)
+            return json.dumps(["NO" if task in cls.plan else "YES" for task in tasks])
+        if "Is this task a leaf node?" in prompt:
+            task = re.search(r'Task: "(.*?)"', prompt).group(1)
+            return "NO" if task in cls.plan else "YES"
+        if "Is this a good decomposition?" in prompt:
+            parent = re.search(r'Parent Task: "(.*?)"', prompt).group(1)
+            return "NO" if parent in cls.rejected else "YES"
+        if "synthesis expert" in prompt:
+            parent = re.search(r'Parent Task: "(.*?)"', prompt).group(1)
+            results = re.findall(r"^Result: (.*)$", prompt, re.M)
+            return f"{parent}: " + "; ".join(results)
+        task = prompt.split("question:\n\n", 1)[1].split("\n\nProvide", 1)[0]
+        cls.solved.append(task)
+        return f"answer({task})"
+
+
+PLAN = {
+    "Plan a trip": ["Book a flight", "Book a hotel", "Plan the itinerary"],
+    "Plan the itinerary": ["Pick museums", "Pick restaurants"],
+}
+
+
+class OrchestratorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        ScriptedAgent.plan = dict(PLAN)
+        ScriptedAgent.rejected = set()
+        ScriptedAgent.solved = []
+        patches = [
+            mock.patch.object(task_agents, "Agent", ScriptedAgent, create=True),
+            mock.patch.object(task_agents, "STRANDS_AVAILABLE", True),
+            mock.patch.object(task_agents, "client_pool", ClientPool()),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    @staticmethod
+    def run_task(task, **options):
+        """Process a task and return (answer, {node_id: (task, parent_id, is_leaf, result)}, orchestrator)."""
+        orchestrator = TaskOrchestrator(**options)
+        answer = orchestrator.process_task(task)
+        nodes = {
+            node_id: (node.task_description, node.parent_id, node.is_leaf, node.result)
+            for node_id, node in orchestrator.tree.nodes.items()
+        }
+        return answer, nodes, orchestrator
+
+    @staticmethod
+    def run_task_async(task, **options):
+        """Like run_task(), through process_task_async()."""
+        orchestrator = TaskOrchestrator(**options)
+        answer = asyncio.run(orchestrator.process_task_async(task))
+        nodes = {
+            node_id: (node.task_description, node.parent_id, node.is_leaf, node.result)
+            for node_id, node in orchestrator.tree.nodes.items()
+        }
+        return answer, nodes, orchestrator
+
+    def assert_same_as_serial(self, task="Plan a trip", run=None, **options):
+        serial_answer, serial_nodes, _ = self.run_task(task)
+        self.assertTrue(any(is_leaf and result for _, _, is_leaf, result in serial_nodes.values()))
+        answer, nodes, orchestrator = (run or self.run_task)(task, **options)
+        self.assertEqual(list(nodes), list(serial_nodes))
+        self.assertEqual(nodes, serial_nodes)
+        self.assertEqual(answer, serial_answer)
+        return orchestrator
+
+
+class TestBuildModes(OrchestratorTestCase):
+
+    def test_serial_build_follows_the_plan(self):
+        answer, nodes, _ = self.run_task("Plan a trip")
+        self.assertEqual(len(nodes), 6)
+        self.assertIn("answer(Pick museums)", answer)
+
+    def test_concurrent_build_matches_serial(self):
+        self.assert_same_as_serial(build_mode='concurrent', max_concurrency=4)
+
+    def test_concurrent_build_matches_serial_without_batch_checks(self):
+        serial_answer, serial_nodes, _ = self.run_task("Plan a trip", batch_leaf_checks=False)
+        answer, nodes, _ = self.run_task("Plan a trip", batch_leaf_checks=False,
+                                         build_mode='concurrent', max_concurrency=4)
+        self.assertEqual(nodes, serial_nodes)
+        self.assertEqual(answer, serial_answer)
+
+
+class TestExecutionModes(OrchestratorTestCase):
+
+    def test_dataflow_matches_serial(self):
+        self.assert_same_as_serial(execution_mode='dataflow', max_concurrency=4)
+
+    def test_dataflow_matches_serial_without_batch_checks(self):
+        serial_answer, serial_nodes, _ = self.run_task("Plan a trip", batch_leaf_checks=False)
+        answer, nodes, _ = self.run_task("Plan a trip", batch_leaf_checks=False,
+                                         execution_mode='dataflow', max_concurrency=4)
+        self.assertEqual(nodes, serial_nodes)
+        self.assertEqual(answer, serial_answer)
+
+
+class TestExpansionModes(OrchestratorTestCase):
+
+    def test_fused_expansion_makes_one_call_per_node(self):
+        orchestrator = self.assert_same_as_serial(expansion_mode='fused', batch_leaf_checks=False)
+        expansion = orchestrator.get_tree_summary()['expansion']
+        self.assertEqual(expansion['calls_per_internal_node'], 1.0)
+        self.assertEqual(expansion['model_calls'], expansion['expanded_nodes'])
+
+        _, _, orchestrator = self.run_task("Plan a trip", batch_leaf_checks=False)
+        self.assertEqual(orchestrator.get_tree_summary()['expansion']['calls_per_internal_node'], 3.0)
+
+    def test_fused_expansion_with_batch_leaf_checks_makes_fewer_calls(self):
+        orchestrator = self.assert_same_as_serial(expansion_mode='fused')
+        fused = orchestrator.get_tree_summary()['expansion']
+        # One fused call plus one batch check of its children per internal node
+        self.assertEqual(fused['calls_per_internal_node'], 2.0)
+
+        _, _, orchestrator = self.run_task("Plan a trip")
+        self.assertLess(fused['model_calls'], orchestrator.get_tree_summary()['expansion']['model_calls'])
+
+    def test_fused_expansion_rejects_an_invalid_decomposition(self):
+        ScriptedAgent.rejected = {"Plan the itinerary"}
+        serial_answer, serial_nodes, _ = self.run_task("Plan a trip")
+        answer, nodes, _ = self.run_task("Plan a trip", expansion_mode='fused')
+        self.assertEqual(nodes, serial_nodes)
+        self.assertEqual(answer, serial_answer)
+
+
+class TestSpeculativeRoot(OrchestratorTestCase):
+
+    def test_leaf_root_uses_the_speculative_answer(self):
+        orchestrator = self.assert_same_as_serial("Book a flight", speculative_root=True)
+        self.assertEqual(orchestrator.get_tree_summary()['speculation'], {'outcome': 'used', 'wasted_cost': 0.0})
+        self.assertEqual(ScriptedAgent.solved, ["Book a flight", "Book a flight"])
+
+    def test_discarded_speculation_is_counted_as_wasted(self):
+        orchestrator = TaskOrchestrator(speculative_root=True)
+        speculations = []
+        start_speculative_solve = orchestrator._start_speculative_solve
+        build_tree = orchestrator._build_tree
+        orchestrator._start_speculative_solve = (
+            lambda: speculations.append(start_speculative_solve()) or speculations[-1])
+        # Let the speculative solve finish first, so it can no longer be cancelled
+        orchestrator._build_tree = lambda: (wait(speculations), build_tree())
+
+        answer = orchestrator.process_task("Plan a trip")
+        self.assertEqual(answer, self.run_task("Plan a trip")[0])
+        speculation = orchestrator.get_tree_summary()['speculation']
+        self.assertEqual(speculation['outcome'], 'discarded')
+        self.assertEqual(speculation['wasted_cost'], estimate_cost(
+            orchestrator.solver._solve_prompt("Plan a trip"), "answer(Plan a trip)", orchestrator.solver.model))
+        self.assertGreater(speculation['wasted_cost'], 0.0)
+
+
+class TestAsyncOrchestrator(OrchestratorTestCase):
+
+    def test_async_matches_serial(self):
+        self.assert_same_as_serial(run=self.run_task_async)
+
+    def test_async_matches_serial_with_speculative_root(self):
+        orchestrator = self.assert_same_as_serial(run=self.run_task_async, speculative_root=True)
+        self.assertEqual(orchestrator.get_tree_summary()['speculation']['outcome'], 'discarded')
+
+    def test_async_leaf_root_matches_serial_with_speculative_root(self):
+        orchestrator = self.assert_same_as_serial("Book a flight", run=self.run_task_async, speculative_root=True)
+        self.assertEqual(orchestrator.get_tree_summary()['speculation']['outcome'], 'used')
+        self.assertEqual(ScriptedAgent.solved, ["Book a flight", "Book a flight"])
+
+
+class TestLeafFailures(OrchestratorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def orchestrator_failing(self, error=None, **options):
+        """An orchestrator whose solver raises `error` for "Book a hotel", or stalls on it if error is None."""
+        orchestrator = TaskOrchestrator(**options)
+        solve = orchestrator.solver.solve
+
+        def failing_solve(task, *args, **kwargs):
+            if task == "Book a hotel":
+                if error is not None:
+                    raise error
+                self.release.wait(5)
+            return solve(task, *args, **kwargs)
+
+        async def failing_solve_async(task, *args, **kwargs):
+            return failing_solve(task, *args, **kwargs)
+
+        orchestrator.solver.solve = failing_solve
+        orchestrator.solver.solve_async = failing_solve_async
+        return orchestrator
+
+    def assert_hotel_failed(self, orchestrator, answer, error, timed_out=False):
+        self.assertIsNotNone(answer)
+        leaves = {node.task_description: node for node in orchestrator.tree.get_leaf_nodes()}
+        self.assertEqual(leaves["Book a hotel"].error, error)
+        self.assertEqual(leaves["Book a hotel"].metadata.get('timed_out', False), timed_out)
+        self.assertEqual(leaves["Book a flight"].result, "answer(Book a flight)")
+
+    def test_solver_raising_timeout_error_is_a_plain_failure(self):
+        orchestrator = self.orchestrator_failing(TimeoutError("read timed out"))
+        answer = orchestrator.process_task("Plan a trip")
+        self.assert_hotel_failed(orchestrator, answer, "read timed out")
+
+    def test_solver_raising_timeout_error_is_a_plain_failure_async(self):
+        orchestrator = self.orchestrator_failing(TimeoutError("read timed out"))
+        answer = asyncio.run(orchestrator.process_task_async("Plan a trip"))
+        self.assert_hotel_failed(orchestrator, answer, "read timed out")
+
+    def test_slow_leaf_times_out(self):
+        orchestrator = self.orchestrator_failing(leaf_timeout=0.1)
+        answer = orchestrator.process_task("Plan a trip")
+        self.assert_hotel_failed(orchestrator, answer, "Leaf execution timed out after 0.1s", timed_out=True)
+
+
+class TestOptimisticExpansion(OrchestratorTestCase):
+
+    def test_rejected_decomposition_is_rolled_back(self):
+        ScriptedAgent.rejected = {"Plan the itinerary"}
+        orchestrator = self.assert_same_as_serial(optimistic_expansion=True)
+        self.assertEqual(orchestrator.get_tree_summary()['expansion']['speculative_rollbacks'], 1)
+        # The rejected node is solved as a leaf; its speculative children are gone
+        itinerary = next(node for node in orchestrator.tree.nodes.values()
+                         if node.task_description == "Plan the itinerary")
+        self.assertTrue(itinerary.is_leaf)
+        self.assertEqual(len(orchestrator.tree.nodes), 4)
+
+    def test_rejected_decomposition_is_rolled_back_in_concurrent_build(self):
+        ScriptedAgent.rejected = {"Plan the itinerary"}
+        orchestrator = self.assert_same_as_serial(optimistic_expansion=True, build_mode='concurrent')
+        self.assertEqual(orchestrator.get_tree_summary()['expansion']['speculative_rollbacks'], 1)
+
+    def test_accepted_decompositions_are_kept(self):
+        orchestrator = self.assert_same_as_serial(optimistic_expansion=True)
+        self.assertEqual(orchestrator.get_tree_summary()['expansion']['speculative_rollbacks'], 0)
+
+    def test_verification_threads_are_released_after_each_task(self):
+        orchestrator = TaskOrchestrator(optimistic_expansion=True, execution_mode='dataflow')
+        for _ in range(3):
+            orchestrator.process_task("Plan a trip")
+            self.assertIsNone(orchestrator._verification_pool)
+        self.assertEqual(orchestrator.get_tree_summary()['expansion']['speculative_rollbacks'], 0)
+
+
+class TestLeafDeduplication(OrchestratorTestCase):
+
+    def test_leaves_differing_in_an_operator_are_solved_separately(self):
+        ScriptedAgent.plan = {"Do the sums": ["Calculate 48 + 13", "Calculate 48 - 13", "Calculate  48 + 13 "]}
+        answer, nodes, orchestrator = self.run_task("Do the sums")
+        self.assertEqual(sorted(ScriptedAgent.solved), ["Calculate 48 + 13", "Calculate 48 - 13"])
+        self.assertEqual(orchestrator.get_tree_summary()['deduplication']['solver_calls_saved'], 1)
+        results = {task: result for task, _, is_leaf, result in nodes.values() if is_leaf}
+        self.assertEqual(results["Calculate 48 - 13"], "answer(Calculate 48 - 13)")
+        self.assertEqual(results["Calculate  48 + 13 "], "answer(Calculate 48 + 13)")
+
+    def test_leaves_differing_in_case_are_solved_separately(self):
+        ScriptedAgent.plan = {"Reverse both": ["Reverse AbC", "Reverse abc", "Reverse the string."]}
+        for options in ({}, {'execution_mode': 'dataflow', 'max_concurrency': 2}):
+            ScriptedAgent.solved = []
+            _, nodes, orchestrator = self.run_task("Reverse both", **options)
+            self.assertEqual(sorted(ScriptedAgent.solved), ["Reverse AbC", "Reverse abc", "Reverse the string."])
+            self.assertEqual(orchestrator.get_tree_summary()['deduplication']['solver_calls_saved'], 0)
+
+    def test_dataflow_shares_a_finished_solve_with_later_duplicates(self):
+        ScriptedAgent.plan = {
+            "Plan a trip": ["Book a flight", "Plan the journey"],
+            "Plan the journey": ["Book a flight", "Plan the stay"],
+            "Plan the stay": ["Book a flight", "Book a hotel"],
+        }
+        orchestrator = self.assert_same_as_serial(execution_mode='dataflow', max_concurrency=2)
+        self.assertEqual(orchestrator.get_tree_summary()['deduplication']['solver_calls_saved'], 2)
+        self.assertEqual(ScriptedAgent.solved.count("Book a flight"), 2)  # once per orchestrator
+
+    def test_memo_never_answers_a_later_prompt_with_another_operator(self):
+        orchestrator = TaskOrchestrator()
+        self.assertEqual(orchestrator.process_task("Calculate 48 + 13"), "answer(Calculate 48 + 13)")
+        self.assertEqual(orchestrator.process_task("Calculate 48 - 13"), "answer(Calculate 48 - 13)")
+        self.assertEqual(orchestrator.process_task("Calculate 48 + 13"), "answer(Calculate 48 + 13)")
+        self.assertEqual(orchestrator.process_task("Reverse AbC"), "answer(Reverse AbC)")
+        self.assertEqual(orchestrator.process_task("Reverse abc"), "answer(Reverse abc)")
+        self.assertEqual(ScriptedAgent.solved, ["Calculate 48 + 13", "Calculate 48 - 13",
+                                                "Reverse AbC", "Reverse abc"])
+
+
+if __name__ == "__main__":
+    unittest.main()
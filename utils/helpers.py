@@ -1,5 +1,20 @@
+import json
+import os
+
+
 def clean_text(text: str):
     """A generic text cleaning utility."""
     if not isinstance(text, str):
         return ""
     return text.strip().lower()
+
+
+def write_json_atomic(path: str, data):
+    """Writes JSON to a temp file and renames it over `path`, so readers never see a partial file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)